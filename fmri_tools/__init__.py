@@ -2,21 +2,27 @@
 """Python package for for analysis of high-resolution fMRI data."""
 
 # local inputs
-import fmri_tools.analysis
-import fmri_tools.cmap
-import fmri_tools.img
-import fmri_tools.io
-import fmri_tools.label
-import fmri_tools.layer
-import fmri_tools.mapping
-import fmri_tools.preprocessing
-import fmri_tools.processing
-import fmri_tools.registration
-import fmri_tools.segmentation
-import fmri_tools.simulation
-import fmri_tools.skullstrip
-import fmri_tools.surface
-import fmri_tools.utils
+from .lazy_import import lazy_import
+
+_submodules = [
+    "analysis",
+    "cmap",
+    "img",
+    "io",
+    "label",
+    "layer",
+    "mapping",
+    "preprocessing",
+    "processing",
+    "registration",
+    "segmentation",
+    "simulation",
+    "skullstrip",
+    "surface",
+    "utils",
+]
+
+__getattr__, __dir__, __all__ = lazy_import(__name__, submodules=_submodules)
 
 __author__ = "Daniel Haenelt"
 __license__ = "GPL v3"
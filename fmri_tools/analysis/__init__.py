@@ -2,8 +2,14 @@
 """Python package for for analysis of high-resolution fMRI data."""
 
 # local inputs
-from .analyze_alff_between_stripes import analyze_alff_between_stripes
-from .analyze_alff_between_conditions import analyze_alff_between_conditions
-from .analyze_fft import analyze_fft
-from .analyze_acorr import analyze_acorr
-from .get_pca import get_pca
+from ..lazy_import import lazy_import
+
+_attrs = {
+    "analyze_alff_between_stripes": ["analyze_alff_between_stripes"],
+    "analyze_alff_between_conditions": ["analyze_alff_between_conditions"],
+    "analyze_fft": ["analyze_fft"],
+    "analyze_acorr": ["analyze_acorr"],
+    "get_pca": ["get_pca"],
+}
+
+__getattr__, __dir__, __all__ = lazy_import(__name__, attrs=_attrs)
@@ -2,8 +2,17 @@
 """Python package for for analysis of high-resolution fMRI data."""
 
 # local inputs
-from .generate_coordinate_mapping import generate_coordinate_mapping
-from .crop_coordinate_mapping import crop_coordinate_mapping
-from .remove_edge_cmap import remove_edge_cmap
-from .clean_coordinate_mapping import clean_coordinate_mapping
-from .expand_coordinate_mapping import expand_coordinate_mapping
+from ..lazy_import import lazy_import
+
+_attrs = {
+    "generate_coordinate_mapping": ["generate_coordinate_mapping"],
+    "crop_coordinate_mapping": ["crop_coordinate_mapping"],
+    "remove_edge_cmap": ["remove_edge_cmap"],
+    "clean_coordinate_mapping": ["clean_coordinate_mapping"],
+    "expand_coordinate_mapping": ["expand_coordinate_mapping"],
+    "coordinate_mapping_proxy": ["CoordinateMappingProxy"],
+    "compose_coordinate_mapping": ["compose_coordinate_mapping"],
+    "invert_coordinate_mapping": ["invert_coordinate_mapping"],
+}
+
+__getattr__, __dir__, __all__ = lazy_import(__name__, attrs=_attrs)
@@ -12,13 +12,16 @@ from ..io.get_filename import get_filename
 
 
 def clean_coordinate_mapping(cmap_source, cmap_target, overwrite_file=True,
-                             save_mask=False):
+                             save_mask=False, chunk_size=8):
     """Clean coordinate mapping.
 
     Voxels in the target coordinate mapping are masked out based on found voxel 
     displacements in the source coordinate mapping. This is done to remove 
     smeared regions caused by interpolations with background values in the case 
-    of deforming a slab within a larger image array.    
+    of deforming a slab within a larger image array. All eight neighboring 
+    target voxels of each source coordinate which lies within the target array 
+    are kept. The source coordinate mapping is read in slabs (along the third 
+    dimension).
 
     Parameters
     ----------
@@ -30,6 +33,9 @@ def clean_coordinate_mapping(cmap_source, cmap_target, overwrite_file=True,
         Overwrite target coordinate mapping. The default is True.
     save_mask : bool, optional
         Write out mask. The default is False.
+    chunk_size : int, optional
+        Number of slices of the source coordinate mapping which are processed 
+        at once. The default is 8.
 
     Returns
     -------
@@ -41,74 +47,45 @@ def clean_coordinate_mapping(cmap_source, cmap_target, overwrite_file=True,
     # get filename    
     path_file, _, _ = get_filename(cmap_target)
 
-    # load data
+    # load data without reading the source cmap
     cmap1_img = nb.load(cmap_source)
-    cmap1_array = cmap1_img.get_fdata()
-
     cmap2_img = nb.load(cmap_target)
-    cmap2_array = cmap2_img.get_fdata()
-
-    mask_img = nb.load(cmap_target)
-    mask_img.header["dim"][0] = 3
-    mask_img.header["dim"][4] = 1
-    mask_array = np.zeros_like(mask_img.get_fdata()[:, :, :, 0])
-
-    x_max = cmap2_img.header["dim"][1]
-    y_max = cmap2_img.header["dim"][2]
-    z_max = cmap2_img.header["dim"][3]
-
-    # get nearest voxel coordinates
-    x0 = np.floor(cmap1_array[:, :, :, 0].flatten()).astype(int)
-    x1 = np.ceil(cmap1_array[:, :, :, 0].flatten()).astype(int)
-    y0 = np.floor(cmap1_array[:, :, :, 1].flatten()).astype(int)
-    y1 = np.ceil(cmap1_array[:, :, :, 1].flatten()).astype(int)
-    z0 = np.floor(cmap1_array[:, :, :, 2].flatten()).astype(int)
-    z1 = np.ceil(cmap1_array[:, :, :, 2].flatten()).astype(int)
-
-    # exclude voxels which do not fit in the target array
-    outlier = []
-    outlier.extend(np.where(x0 < 0)[0])
-    outlier.extend(np.where(x1 < 0)[0])
-    outlier.extend(np.where(y0 < 0)[0])
-    outlier.extend(np.where(y1 < 0)[0])
-    outlier.extend(np.where(z0 < 0)[0])
-    outlier.extend(np.where(z1 < 0)[0])
-    outlier.extend(np.where(x0 >= x_max)[0])
-    outlier.extend(np.where(x1 >= x_max)[0])
-    outlier.extend(np.where(y0 >= y_max)[0])
-    outlier.extend(np.where(y1 >= y_max)[0])
-    outlier.extend(np.where(z0 >= z_max)[0])
-    outlier.extend(np.where(z1 >= z_max)[0])
-    outlier = list(np.unique(outlier))
-
-    x0 = np.delete(x0, outlier)
-    x1 = np.delete(x1, outlier)
-    y0 = np.delete(y0, outlier)
-    y1 = np.delete(y1, outlier)
-    z0 = np.delete(z0, outlier)
-    z1 = np.delete(z1, outlier)
-
-    # get final mask
-    mask_array[x0, y0, z0] = 1
-    mask_array[x1, y1, z1] = 1
-    mask_array[x1, y0, z0] = 1
-    mask_array[x0, y1, z0] = 1
-    mask_array[x0, y0, z1] = 1
-    mask_array[x1, y1, z0] = 1
-    mask_array[x0, y1, z1] = 1
-    mask_array[x1, y0, z1] = 1
+    cmap2_array = np.array(cmap2_img.dataobj, dtype=np.float32)
+
+    dims = np.array(cmap2_img.shape[:3])
+    mask_array = np.zeros(np.prod(dims), dtype=bool)
+
+    # get all eight nearest voxels of source coordinates
+    n_z = cmap1_img.shape[2]
+    for z0 in range(0, n_z, chunk_size):
+        z1 = min(z0 + chunk_size, n_z)
+        coords = np.asarray(cmap1_img.dataobj[:, :, z0:z1, :3],
+                            dtype=np.float64).reshape((-1, 3))
+        lower = np.floor(coords).astype(int)
+        upper = np.ceil(coords).astype(int)
+
+        # exclude voxels which do not fit in the target array
+        inside = np.all(lower >= 0, axis=1) & np.all(upper < dims, axis=1)
+        lower = lower[inside]
+        upper = upper[inside]
+
+        for corner in np.ndindex(2, 2, 2):
+            vox = np.where(corner, upper, lower)
+            ind = np.ravel_multi_index(vox.T, dims)
+            mask_array[ind] = True
 
     # apply mask to cmap
-    cmap2_array[:, :, :, 0] *= mask_array
-    cmap2_array[:, :, :, 1] *= mask_array
-    cmap2_array[:, :, :, 2] *= mask_array
+    mask_array = mask_array.reshape(dims)
+    cmap2_array[:, :, :, :3] *= mask_array[:, :, :, np.newaxis]
 
     # get output
+    header = cmap2_img.header.copy()
+    header.set_data_dtype(np.float32)
+
     results = dict()
-    results["cmap"] = nb.Nifti1Image(cmap2_array, cmap2_img.affine,
-                                     cmap2_img.header)
-    results["mask"] = nb.Nifti1Image(mask_array, mask_img.affine,
-                                     mask_img.header)
+    results["cmap"] = nb.Nifti1Image(cmap2_array, cmap2_img.affine, header)
+    results["mask"] = nb.Nifti1Image(mask_array.astype(np.float32),
+                                     cmap2_img.affine, header)
 
     # write output
     if overwrite_file:
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+# python standard library inputs
+import os
+
+# external inputs
+import numpy as np
+import nibabel as nb
+
+# local inputs
+from ..cmap.coordinate_mapping_proxy import CoordinateMappingProxy
+from ..mapping.get_interpolation_matrix import get_interpolation_matrix
+
+
+def compose_coordinate_mapping(cmap_first, cmap_second, file_out=None,
+                               interpolation="linear", padding="zero",
+                               chunk_size=8):
+    """Compose coordinate mapping.
+
+    This function composes two coordinate mappings into one coordinate mapping
+    which is equivalent to applying the first and then the second mapping,
+    i.e., the first mapping is defined in the intermediate space and contains
+    source voxel coordinates and the second mapping is defined in target space
+    and contains intermediate voxel coordinates. The composed mapping is
+    defined in target space and contains source voxel coordinates. It is
+    computed by sampling the first mapping at the coordinates of the second
+    mapping, which is read in slabs (along the third dimension). Data can then
+    be resampled once through the composed mapping instead of being
+    interpolated twice. If the first mapping is a `CoordinateMappingProxy`, its
+    affine is applied directly without interpolation. Background voxels (all
+    coordinates zero) of the second mapping and coordinates outside of the
+    intermediate space (zero padding) are set to zero.
+
+    Parameters
+    ----------
+    cmap_first : str or niimg
+        Source -> intermediate coordinate mapping.
+    cmap_second : str or niimg
+        Intermediate -> target coordinate mapping.
+    file_out : str, optional
+        Filename of composed coordinate mapping. Output is only written if set.
+        The default is None.
+    interpolation : str, optional
+        Interpolation type (linear or nearest). The default is "linear".
+    padding : str, optional
+        Padding type (zero or closest). The default is "zero".
+    chunk_size : int, optional
+        Number of slices of the second mapping which are processed at once. The
+        default is 8.
+
+    Raises
+    ------
+    ValueError
+        If `interpolation` or `padding` is invalid.
+
+    Returns
+    -------
+    niimg
+        Composed coordinate mapping.
+
+    """
+
+    if interpolation not in ["linear", "nearest"]:
+        raise ValueError("Choose a valid interpolation method!")
+
+    if padding not in ["zero", "closest"]:
+        raise ValueError("Choose a valid padding method!")
+
+    # load coordinate mappings without reading data
+    first = nb.load(cmap_first) if isinstance(cmap_first, str) else cmap_first
+    second = nb.load(cmap_second) if isinstance(cmap_second, str) \
+        else cmap_second
+
+    dims_first = np.array(first.shape[:3])
+    dims_out = second.shape[:3]
+
+    # flattened components of the first mapping
+    is_affine = isinstance(first.dataobj, CoordinateMappingProxy)
+    if not is_affine:
+        arr_first = np.asarray(first.dataobj, dtype=np.float32)[:, :, :, :3]
+        arr_first = arr_first.reshape((-1, 3), order="F")
+
+    arr = np.zeros(dims_out + (3,), dtype=np.float32)
+    for z0 in range(0, dims_out[2], chunk_size):
+        z1 = min(z0 + chunk_size, dims_out[2])
+        coords = np.asarray(second.dataobj[:, :, z0:z1, :3], dtype=np.float64)
+        shape = coords.shape
+        coords = coords.reshape((-1, 3), order="F")
+        background = np.all(coords == 0, axis=1)
+
+        if is_affine:
+            if padding == "zero":
+                background |= np.any((coords < 0) | (coords > dims_first - 1),
+                                     axis=1)
+            else:
+                coords = np.clip(coords, 0, dims_first - 1)
+
+            if interpolation == "nearest":
+                coords = np.floor(coords + 0.5)
+
+            res = first.dataobj.get_coordinates(coords)
+        else:
+            m = get_interpolation_matrix(coords, dims_first, interpolation,
+                                         padding)
+            res = m.dot(arr_first)
+
+        res[background] = 0
+        arr[:, :, z0:z1] = res.reshape(shape, order="F")
+
+    # composed mapping in target space
+    header = second.header.copy()
+    header.set_data_dtype(np.float32)
+    output = nb.Nifti1Image(arr, second.affine, header)
+
+    # write output
+    if file_out:
+        path_output = os.path.dirname(file_out)
+        if path_output and not os.path.exists(path_output):
+            os.makedirs(path_output)
+
+        nb.save(output, file_out)
+
+    return output
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+# external inputs
+import numpy as np
+
+
+class CoordinateMappingProxy:
+    """Coordinate mapping proxy.
+
+    This class represents a coordinate mapping which is an affine function of
+    voxel indices, i.e., the coordinates of voxel (i, j, k) are given by
+    affine * [i, j, k, 1]. Only the affine and the grid shape are stored and
+    coordinates are computed on demand. The object behaves like a nibabel
+    array proxy of shape (x, y, z, 3) and can therefore be used as data object
+    of a nifti image, e.g. nb.Nifti1Image(proxy, affine, header). Basic slicing
+    returns float32 arrays of the requested part only, so that consumers can
+    read the mapping in slabs (see `chunks`). The whole array is only computed
+    if the proxy is converted to an array, e.g. by `get_fdata` or when the
+    image is saved.
+
+    Parameters
+    ----------
+    shape : tuple
+        Grid shape (x, y, z).
+    affine : ndarray, optional
+        4x4 transformation from voxel indices to coordinates. Identity if None.
+        The default is None.
+    dtype : dtype, optional
+        Data type of computed coordinates. The default is np.float32.
+
+    """
+
+    is_proxy = True
+
+    def __init__(self, shape, affine=None, dtype=np.float32):
+        self.grid_shape = tuple(int(n) for n in shape[:3])
+        self.affine = np.eye(4) if affine is None else np.asarray(affine,
+                                                                  float)
+        self.dtype = np.dtype(dtype)
+
+    @property
+    def shape(self):
+        return self.grid_shape + (3,)
+
+    @property
+    def ndim(self):
+        return 4
+
+    def __array__(self, dtype=None, copy=None):
+        arr = self[:, :, :, :]
+        return arr if dtype is None else arr.astype(dtype, copy=False)
+
+    def __getitem__(self, slicer):
+        if not isinstance(slicer, tuple):
+            slicer = (slicer,)
+
+        # expand ellipsis
+        if any(s is Ellipsis for s in slicer):
+            i = [s is Ellipsis for s in slicer].index(True)
+            fill = (slice(None),) * (4 - len(slicer) + 1)
+            slicer = slicer[:i] + fill + slicer[i + 1:]
+        slicer = slicer + (slice(None),) * (4 - len(slicer))
+        if len(slicer) > 4:
+            raise IndexError("Too many indices for coordinate mapping!")
+
+        # voxel indices along each axis
+        ind = [np.atleast_1d(np.arange(n)[s])
+               for n, s in zip(self.grid_shape, slicer[:3])]
+
+        # coordinates of all requested voxels
+        arr = np.zeros(tuple(len(i) for i in ind) + (3,), dtype=np.float64)
+        arr += self.affine[:3, 3]
+        arr += ind[0][:, None, None, None] * self.affine[:3, 0]
+        arr += ind[1][None, :, None, None] * self.affine[:3, 1]
+        arr += ind[2][None, None, :, None] * self.affine[:3, 2]
+
+        # remove integer indexed axes
+        keep = tuple(0 if np.ndim(s) == 0 and not isinstance(s, slice) else
+                     slice(None) for s in slicer[:3])
+
+        return arr[keep + (slicer[3],)].astype(self.dtype)
+
+    def get_coordinates(self, vox):
+        """Coordinates of (possibly non-integer) voxel positions given as array
+        of shape (n, 3). Returns an array of shape (n, 3)."""
+
+        vox = np.asarray(vox, dtype=np.float64)
+
+        return (vox.dot(self.affine[:3, :3].T) +
+                self.affine[:3, 3]).astype(self.dtype)
+
+    def get_voxels(self, ind):
+        """Coordinates of voxels given by flat indices in fortran order (as
+        used by sampling matrices). Returns an array of shape (len(ind), 3)."""
+
+        vox = np.unravel_index(ind, self.grid_shape, order="F")
+
+        return self.get_coordinates(np.column_stack(vox))
+
+    def chunks(self, chunk_size=8):
+        """Generator of slabs (z0, z1, arr) along the third dimension with
+        chunk_size slices."""
+
+        for z0 in range(0, self.grid_shape[2], chunk_size):
+            z1 = min(z0 + chunk_size, self.grid_shape[2])
+            yield z0, z1, self[:, :, z0:z1, :]
+
+    def transform(self, affine):
+        """Coordinate mapping proxy with the affine transformation applied to
+        all coordinates."""
+
+        return CoordinateMappingProxy(self.grid_shape,
+                                      np.asarray(affine).dot(self.affine),
+                                      self.dtype)
@@ -2,7 +2,6 @@
 
 # python standard library inputs
 import os
-import random
 
 # external inputs
 import numpy as np
@@ -10,131 +9,94 @@ import nibabel as nb
 
 # local inputs
 from ..io.get_filename import get_filename
-from ..cmap.generate_coordinate_mapping import generate_coordinate_mapping
-from ..utils.apply_affine_chunked import apply_affine_chunked
+from ..cmap.coordinate_mapping_proxy import CoordinateMappingProxy
 
 
 def expand_coordinate_mapping(cmap_in, path_output=None, name_output=None,
-                              write_output=False):
+                              write_output=False, n_sample=100000,
+                              chunk_size=8):
     """Expand coordinate mapping.
     
     This function removes black background in a coordinate mapping to omit 
     interpolation problems at the edges of a coordinate slab within a larger 
-    volume. Based on the cmap, a transformation matrix is computed from randomly 
-    sampled data points within the slab. The transformation matrix is then 
-    applied to all background voxels. Hence, this method is only really precise 
-    for coordinate mappings representing an affine transformation. However, this 
-    function can also be applied to nonlinear coordinate mappings since the 
-    preliminary goal is to avoid problems at the slab edges. Therefore, the 
-    actual data sampling should not be affected. The code snippet for computing 
-    the transformation matrix is taken from [1].
+    volume. Based on the cmap, an affine transformation is fitted by least 
+    squares to a random subset of voxels within the slab. The transformation 
+    is then applied to all background voxels, which is done in slabs (along the 
+    third dimension). Hence, this method is only really precise for coordinate 
+    mappings representing an affine transformation. However, this function can 
+    also be applied to nonlinear coordinate mappings since the preliminary goal 
+    is to avoid problems at the slab edges. Therefore, the actual data sampling 
+    should not be affected.
 
     Parameters
     ----------
-    cmap_in : str
-        Filename of coordinate mapping.
+    cmap_in : str or niimg
+        Coordinate mapping.
     path_output : str, optional
         Path where output is written. The default is None.
     name_output : str, optional
         Basename of output volume. The default is None.
     write_output : bool, optional
         Write nifti volume. The default is False.
+    n_sample : int, optional
+        Maximum number of randomly selected voxels used for fitting. The 
+        default is 100000.
+    chunk_size : int, optional
+        Number of slices which are expanded at once. The default is 8.
+
+    Raises
+    ------
+    ValueError
+        If the coordinate mapping contains less than four non-background 
+        voxels.
 
     Returns
     -------
     output : niimg
         Corrected coordinate mapping.
-
-    References
-    -------
-    .. [1] https://stackoverflow.com/questions/56220626/how-to-compute-
-    conformal-affine-transformation
     
     """
 
     # get file extension of cmap
-    _, _, ext_cmap = get_filename(cmap_in)
-
-    # load target cmap and generate source cmap 
-    cmap_target = nb.load(cmap_in)
-    cmap_source = generate_coordinate_mapping(cmap_in, pad=0)
-
-    arr_cmap_target = cmap_target.get_fdata()
-    arr_cmap_source = cmap_source.get_fdata()
-
-    # get image dimensions
-    xdim = cmap_source.header["dim"][1]
-    ydim = cmap_source.header["dim"][2]
-    zdim = cmap_source.header["dim"][3]
-
-    # random selection of 4 data points
-    s_coords = []
-    t_coords = []
-
-    pts = np.where(arr_cmap_target[:, :, :, 0] != 0)
-    r = random.sample(np.arange(len(pts[0])).tolist(), len(pts[0]))[:4]
-
-    s_coords.append([pts[0][r[0]], pts[1][r[0]], pts[2][r[0]]])
-    s_coords.append([pts[0][r[1]], pts[1][r[1]], pts[2][r[1]]])
-    s_coords.append([pts[0][r[2]], pts[1][r[2]], pts[2][r[2]]])
-    s_coords.append([pts[0][r[3]], pts[1][r[3]], pts[2][r[3]]])
-
-    t_coords.append(arr_cmap_target[s_coords[0][0], s_coords[0][1], s_coords[0][2], :].tolist())
-    t_coords.append(arr_cmap_target[s_coords[1][0], s_coords[1][1], s_coords[1][2], :].tolist())
-    t_coords.append(arr_cmap_target[s_coords[2][0], s_coords[2][1], s_coords[2][2], :].tolist())
-    t_coords.append(arr_cmap_target[s_coords[3][0], s_coords[3][1], s_coords[3][2], :].tolist())
-
-    # get transformation matrix (target -> source)
-    l = len(t_coords)
-    B = np.vstack([np.transpose(t_coords), np.ones(l)])
-    D = 1.0 / np.linalg.det(B)
-
-    entry = lambda r, d: np.linalg.det(np.delete(np.vstack([r, B]), (d + 1), axis=0))
-    M = [[(-1) ** i * D * entry(R, i) for i in range(l)] for R in np.transpose(s_coords)]
-    A, t = np.hsplit(np.array(M), [l - 1])
-    t = np.transpose(t)[0]
-
-    # unittests
-    print("Test cmap expansion:")
-    for p, P in zip(np.array(t_coords), np.array(s_coords)):
-        image_p = np.dot(A, p) + t
-        result = "[OK]" if np.allclose(image_p, P) else "[ERROR]"
-        print(p, " mapped to: ", image_p, " ; expected: ", P, result)
-
-    # get affine transformation matrix by adding translation vector
-    M = np.zeros((4, 4))
-    M[:3, :3] = A
-    M[:3, -1] = t
-    M[-1, -1] = 1
-
-    # get final transformation matrix (source -> target)
-    M = np.linalg.inv(M)
-
-    # transform source volume
-    x = arr_cmap_source[:, :, :, 0].flatten()
-    y = arr_cmap_source[:, :, :, 1].flatten()
-    z = arr_cmap_source[:, :, :, 2].flatten()
-
-    source_listed = np.array([x, y, z]).T
-    source_transformed = apply_affine_chunked(M, source_listed)
-
-    x_new = np.reshape(source_transformed[:, 0], (xdim, ydim, zdim))
-    y_new = np.reshape(source_transformed[:, 1], (xdim, ydim, zdim))
-    z_new = np.reshape(source_transformed[:, 2], (xdim, ydim, zdim))
-
-    # overwrite new cmap with old coordinate mapping (so that only background remains)    
-    x_new[arr_cmap_target[:, :, :, 0] > 0] = arr_cmap_target[:, :, :, 0][arr_cmap_target[:, :, :, 0] > 0]
-    y_new[arr_cmap_target[:, :, :, 1] > 0] = arr_cmap_target[:, :, :, 1][arr_cmap_target[:, :, :, 1] > 0]
-    z_new[arr_cmap_target[:, :, :, 2] > 0] = arr_cmap_target[:, :, :, 2][arr_cmap_target[:, :, :, 2] > 0]
-
-    # overwrite input cmap array with final cmap array
-    arr_cmap_target[:, :, :, 0] = x_new
-    arr_cmap_target[:, :, :, 1] = y_new
-    arr_cmap_target[:, :, :, 2] = z_new
+    ext_cmap = ".nii"
+    if isinstance(cmap_in, str):
+        _, _, ext_cmap = get_filename(cmap_in)
+
+    # load target cmap
+    cmap_target = nb.load(cmap_in) if isinstance(cmap_in, str) else cmap_in
+    arr_cmap_target = np.array(cmap_target.dataobj, dtype=np.float32)
+
+    # non-background voxels
+    dims = cmap_target.shape[:3]
+    background = np.all(arr_cmap_target[:, :, :, :3] == 0, axis=3)
+    pts = np.flatnonzero(~background)
+    if len(pts) < 4:
+        raise ValueError("Not enough data points for fitting!")
+
+    # random selection of data points
+    rng = np.random.default_rng()
+    if len(pts) > n_sample:
+        pts = rng.choice(pts, n_sample, replace=False)
+
+    vox = np.unravel_index(pts, dims)
+    s_coords = np.ones((len(pts), 4))
+    s_coords[:, :3] = np.column_stack(vox)
+    t_coords = arr_cmap_target[vox][:, :3]
+
+    # get affine transformation matrix (source -> target) by least squares
+    M = np.eye(4)
+    M[:3, :] = np.linalg.lstsq(s_coords, t_coords, rcond=None)[0].T
+
+    # transform background voxels (source cmap as affine coordinate mapping)
+    cmap_source = CoordinateMappingProxy(dims, M)
+    for z0, z1, arr in cmap_source.chunks(chunk_size):
+        arr_slab = arr_cmap_target[:, :, z0:z1, :3]
+        arr_slab[background[:, :, z0:z1]] = arr[background[:, :, z0:z1]]
 
     # nibabel instance of final cmap
-    output = nb.Nifti1Image(arr_cmap_target, cmap_target.affine,
-                            cmap_target.header)
+    header = cmap_target.header.copy()
+    header.set_data_dtype(np.float32)
+    output = nb.Nifti1Image(arr_cmap_target, cmap_target.affine, header)
 
     # write output
     if write_output:
@@ -6,7 +6,10 @@ import os
 # external inputs
 import numpy as np
 import nibabel as nb
-from numpy.matlib import repmat
+
+# local inputs
+from ..io.scratch_workspace import link_file
+from ..cmap.coordinate_mapping_proxy import CoordinateMappingProxy
 
 
 def generate_coordinate_mapping(file_in, pad, path_output=None, suffix=None,
@@ -16,7 +19,11 @@ def generate_coordinate_mapping(file_in, pad, path_output=None, suffix=None,
     Generates coordinate mapping for an input volume. Either one or multiple 
     coordinate maps are saved in the output folder depending on the 
     dimensionality (3d or 4d) of the input image. Image padding can be applied 
-    which expands the image matrix of each axis in both directions.    
+    which expands the image matrix of each axis in both directions. The
+    returned image contains a `CoordinateMappingProxy` as data object, i.e., the
+    coordinates are not computed before they are accessed (e.g. slab-wise by
+    slicing the data object). Written files are float32. Multiple time points
+    are written once and linked to the remaining filenames.
 
     Parameters
     ----------
@@ -58,43 +65,29 @@ def generate_coordinate_mapping(file_in, pad, path_output=None, suffix=None,
     else:
         t_size = data_img.header["dim"][4]
 
-    # define coordinate
-    coordinate_mapping = np.zeros((x_size, y_size, z_size, 3), dtype='float')
-
-    # coordinate mapping in x-direction
-    x = np.array(np.arange(-pad, x_size - pad, 1), dtype='float')
-    x = np.transpose(repmat(x, y_size, 1))
-    x = np.dstack([x] * z_size)
-
-    # coordinate mapping in y-direction
-    y = np.array(np.arange(-pad, y_size - pad), dtype='float')
-    y = repmat(y, x_size, 1)
-    y = np.dstack([y] * z_size)
-
-    # coordinate mapping in z-direction
-    z = np.ones((x_size, y_size, z_size))
-    z = np.arange(-pad, z_size - pad) * z
-
-    # merge directions
-    coordinate_mapping[:, :, :, 0] = x
-    coordinate_mapping[:, :, :, 1] = y
-    coordinate_mapping[:, :, :, 2] = z
+    # coordinate mapping of padded grid (shifted by pad in each direction)
+    affine = np.eye(4)
+    affine[:3, 3] = -pad
+    coordinate_mapping = CoordinateMappingProxy((x_size, y_size, z_size),
+                                                affine)
 
     # write coordinate mapping
-    output = nb.Nifti1Image(coordinate_mapping, data_img.affine,
-                            nb.Nifti1Header())
+    header = nb.Nifti1Header()
+    header.set_data_dtype(coordinate_mapping.dtype)
+    output = nb.Nifti1Image(coordinate_mapping, data_img.affine, header)
 
     # write coordinate mapping for each time point   
-    if t_size == 1:
-        if write_output:
+    if write_output:
+        if t_size == 1:
             file_out = os.path.join(path_output, 'cmap_' + suffix + '.nii')
             nb.save(output, file_out)
-    else:
-        for i in range(t_size):
-            if write_output:
+        else:
+            file_0 = os.path.join(path_output, 'cmap_' + suffix + '_0.nii')
+            nb.save(output, file_0)
+            for i in range(1, t_size):
                 file_out = os.path.join(path_output,
                                         'cmap_' + suffix + '_' + str(i) +
                                         '.nii')
-                nb.save(output, file_out)
+                link_file(file_0, file_out)
 
     return output
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+# python standard library inputs
+import os
+
+# external inputs
+import numpy as np
+import nibabel as nb
+from scipy.spatial import cKDTree
+
+
+def _fit_affine(tree, vox, grid, k, n_jobs=1, rcond=1e-3):
+    """Helper function to fit an affine function to the target voxel
+    coordinates of the k nearest points of each grid point by least squares
+    with inverse distance weights. Returns the fitted values at the grid
+    points, the distance to the nearest point and a mask of well-conditioned
+    fits. Fits whose points (nearly) lie on a plane or a line are
+    ill-conditioned since the intercept is then undetermined."""
+
+    k = min(k, tree.n)
+    dist, i = tree.query(grid, k=k, workers=n_jobs)
+    dist = dist.reshape((len(grid), k))
+    i = i.reshape((len(grid), k))
+
+    # normalized inverse distance weights
+    weights = 1 / np.maximum(dist, 1e-6)
+    weights /= np.sum(weights, axis=1, keepdims=True)
+
+    # weighted normal equations of local linear fits
+    x = np.ones((len(grid), k, 4))
+    x[:, :, :3] = tree.data[i] - grid[:, np.newaxis, :]
+    xw = (x * weights[:, :, np.newaxis]).transpose(0, 2, 1)
+    a = np.matmul(xw, x)
+    b = np.matmul(xw, vox[i])
+
+    # check condition of normal equations
+    s = np.linalg.svd(a, compute_uv=False)
+    is_valid = s[:, -1] > rcond * s[:, 0]
+
+    # the intercept is the interpolated value at the grid point
+    res = np.zeros((len(grid), 3))
+    if np.any(is_valid):
+        res[is_valid] = np.linalg.solve(a[is_valid], b[is_valid])[:, 3, :]
+
+    return res, dist[:, 0], is_valid
+
+
+def invert_coordinate_mapping(cmap_in, file_source, file_out=None, k=8,
+                              max_dist=1.0, chunk_size=8, n_jobs=1):
+    """Invert coordinate mapping.
+
+    This function inverts a coordinate mapping by scattered interpolation. The
+    input mapping is defined in target space and contains source voxel
+    coordinates. The inverse mapping is defined in source space and contains
+    target voxel coordinates. The source coordinates of all non-background
+    target voxels are stored in a KD-tree. For each source voxel, the k nearest
+    points are queried and an affine function is fitted to their target voxel
+    coordinates by least squares with inverse distance weights, which makes the
+    inversion exact for affine mappings. Ill-conditioned fits, i.e., if all
+    neighbors lie in one plane at the border of the point cloud, are repeated
+    with 4k neighbors and set to zero if they remain ill-conditioned. Source
+    voxels are processed in slabs (along the third dimension). Source voxels
+    whose nearest point is farther away than max_dist (in source voxels) are
+    set to zero (background).
+
+    Parameters
+    ----------
+    cmap_in : str or niimg
+        Source -> target coordinate mapping.
+    file_source : str or niimg
+        Volume which defines the source space.
+    file_out : str, optional
+        Filename of inverted coordinate mapping. Output is only written if set.
+        The default is None.
+    k : int, optional
+        Number of nearest neighbors used for interpolation. The default is 8.
+    max_dist : float, optional
+        Maximum distance to the nearest point in source voxels. The default is
+        1.0.
+    chunk_size : int, optional
+        Number of source slices which are processed at once. The default is 8.
+    n_jobs : int, optional
+        Number of parallel workers used for KD-tree queries (-1 uses all
+        processors). The default is 1.
+
+    Returns
+    -------
+    niimg
+        Target -> source coordinate mapping.
+
+    """
+
+    # load coordinate mapping and source volume without reading data
+    cmap = nb.load(cmap_in) if isinstance(cmap_in, str) else cmap_in
+    source = nb.load(file_source) if isinstance(file_source, str) \
+        else file_source
+
+    # scattered points (source coordinates of non-background target voxels)
+    arr_cmap = np.asarray(cmap.dataobj, dtype=np.float64)[:, :, :, :3]
+    arr_cmap = arr_cmap.reshape((-1, 3), order="F")
+    ind = np.flatnonzero(np.any(arr_cmap != 0, axis=1))
+    tree = cKDTree(arr_cmap[ind])
+    vox = np.unravel_index(ind, cmap.shape[:3], order="F")
+    vox = np.column_stack(vox).astype(np.float32)
+    del arr_cmap
+
+    # interpolate target coordinates on the source grid
+    dims = source.shape[:3]
+    arr = np.zeros(dims + (3,), dtype=np.float32)
+    for z0 in range(0, dims[2], chunk_size):
+        z1 = min(z0 + chunk_size, dims[2])
+        grid = np.meshgrid(np.arange(dims[0]), np.arange(dims[1]),
+                           np.arange(z0, z1), indexing="ij")
+        grid = np.stack(grid, axis=-1)
+        shape = grid.shape
+        grid = grid.reshape((-1, 3), order="F")
+
+        res, dist, is_valid = _fit_affine(tree, vox, grid, k, n_jobs)
+
+        # refit ill-conditioned points with a larger neighborhood (e.g. at the
+        # border of the point cloud, where the nearest points often lie in one
+        # face plane) and set points which remain ill-conditioned to
+        # background
+        retry = ~is_valid & (dist <= max_dist)
+        if np.any(retry):
+            res[retry], _, is_valid[retry] = _fit_affine(tree, vox,
+                                                         grid[retry], 4 * k,
+                                                         n_jobs)
+
+        res[~is_valid | (dist > max_dist)] = 0
+        arr[:, :, z0:z1] = res.reshape(shape, order="F")
+
+    # inverted mapping in source space
+    header = source.header.copy()
+    header.set_data_dtype(np.float32)
+    output = nb.Nifti1Image(arr, source.affine, header)
+
+    # write output
+    if file_out:
+        path_output = os.path.dirname(file_out)
+        if path_output and not os.path.exists(path_output):
+            os.makedirs(path_output)
+
+        nb.save(output, file_out)
+
+    return output
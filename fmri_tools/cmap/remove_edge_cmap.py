@@ -2,6 +2,7 @@
 
 # python standard library inputs
 import os
+import itertools
 
 # external inputs
 import numpy as np
@@ -11,7 +12,34 @@ import nibabel as nb
 from ..io.get_filename import get_filename
 
 
-def remove_edge_cmap(input_cmap, edge_threshold=5, min_threshold=5):
+def _shift(n, d):
+    """Helper function to get slices of voxels and their neighbours at offset 
+    d along an axis of length n."""
+
+    return slice(max(-d, 0), n - max(d, 0)), slice(max(d, 0), n - max(-d, 0))
+
+
+def _get_edge(arr, edge_threshold):
+    """Helper function to flag voxels whose difference to at least one 
+    neighbour in the 18-neighbourhood is larger than edge_threshold."""
+
+    edge = np.zeros(arr.shape, dtype=bool)
+    for d in itertools.product([-1, 0, 1], repeat=3):
+        if np.sum(np.abs(d)) not in [1, 2]:
+            continue
+
+        # compare all voxels to their neighbour at offset d
+        sl = [_shift(arr.shape[i], d[i]) for i in range(3)]
+        sl_point = tuple(sl[i][0] for i in range(3))
+        sl_neighbour = tuple(sl[i][1] for i in range(3))
+        diff = np.abs(arr[sl_neighbour] - arr[sl_point])
+        edge[sl_point] |= diff > edge_threshold
+
+    return edge
+
+
+def remove_edge_cmap(input_cmap, edge_threshold=5, min_threshold=5,
+                     chunk_size=None):
     """Remove edge cmap.
     
     This function removes smeared edges from a coordinate mapping. Depending on 
@@ -22,7 +50,9 @@ def remove_edge_cmap(input_cmap, edge_threshold=5, min_threshold=5):
     assumed to be filled by zeroes and identified edge voxels are set to the 
     background value. A voxels is classified as edge outlier if its difference 
     to one local neighbour is larger than edge_threshold or if its cmap value is 
-    below min_threshold in all dimensions.    
+    below min_threshold in all dimensions. The comparison is done with shifted 
+    arrays for all voxels and components at once. Optionally, the volume is 
+    processed in chunks along the z-axis to limit memory usage.
 
     Parameters
     ----------
@@ -33,6 +63,9 @@ def remove_edge_cmap(input_cmap, edge_threshold=5, min_threshold=5):
         is 5.
     min_threshold : float, optional
         Minimum cmap value in all dimensions (in voxel units). The default is 5.
+    chunk_size : int, optional
+        Number of slices along the z-axis which are processed at once. The 
+        whole volume is processed at once if not set. The default is None.
 
     Returns
     -------
@@ -42,135 +75,33 @@ def remove_edge_cmap(input_cmap, edge_threshold=5, min_threshold=5):
 
     # load input
     cmap = nb.load(input_cmap)
-    cmap_array = cmap.get_fdata()
-
-    # get slab coordinates within volume (assumes background filled with zeroes)
-    cmap_slab_coords = np.where(cmap_array != 0)
-
-    # number of voxels
-    n_vox = len(cmap_slab_coords[0])
-    c_vox = 0
-
-    # initialise for printing out loop status
-    c_step = 0
-    n_step = [10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
-
-    # identify edges
-    for n in range(n_vox):
-
-        # current voxel
-        i = cmap_slab_coords[0][n]
-        j = cmap_slab_coords[1][n]
-        k = cmap_slab_coords[2][n]
-        t = cmap_slab_coords[3][n]
-
-        # initialise voxel and its neighbours
-        cmap_point = cmap_array[i, j, k, t]
-        cmap_neighbour = []
-
-        # consider neighour if not at edge of image volume
-        if i > 0:
-            cmap_neighbour.append(cmap_array[i - 1, j, k, t])
-
-        if j > 0:
-            cmap_neighbour.append(cmap_array[i, j - 1, k, t])
-
-        if k > 0:
-            cmap_neighbour.append(cmap_array[i, j, k - 1, t])
-
-        if i < np.shape(cmap_array)[0] - 1:
-            cmap_neighbour.append(cmap_array[i + 1, j, k, t])
-
-        if j < np.shape(cmap_array)[1] - 1:
-            cmap_neighbour.append(cmap_array[i, j + 1, k, t])
-
-        if k < np.shape(cmap_array)[2] - 1:
-            cmap_neighbour.append(cmap_array[i, j, k + 1, t])
-
-        if i > 0 and j > 0:
-            cmap_neighbour.append(cmap_array[i - 1, j - 1, k, t])
-
-        if i > 0 and j < np.shape(cmap_array)[1] - 1:
-            cmap_neighbour.append(cmap_array[i - 1, j + 1, k, t])
-
-        if i > np.shape(cmap_array)[0] - 1 and j > 0:
-            cmap_neighbour.append(cmap_array[i + 1, j - 1, k, t])
-
-        if i > np.shape(cmap_array)[0] - 1 and j < np.shape(cmap_array)[1] - 1:
-            cmap_neighbour.append(cmap_array[i + 1, j + 1, k, t])
-
-        if i > 0 and k > 0:
-            cmap_neighbour.append(cmap_array[i - 1, j, k - 1, t])
-
-        if i > 0 and k < np.shape(cmap_array)[2] - 1:
-            cmap_neighbour.append(cmap_array[i - 1, j, k + 1, t])
-
-        if i > np.shape(cmap_array)[0] - 1 and k > 0:
-            cmap_neighbour.append(cmap_array[i + 1, j, k - 1, t])
-
-        if i > np.shape(cmap_array)[0] - 1 and j < np.shape(cmap_array)[2] - 1:
-            cmap_neighbour.append(cmap_array[i + 1, j, k + 1, t])
-
-        if j > 0 and k > 0:
-            cmap_neighbour.append(cmap_array[i, j - 1, k - 1, t])
-
-        if j > 0 and k < np.shape(cmap_array)[2] - 1:
-            cmap_neighbour.append(cmap_array[i, j - 1, k + 1, t])
-
-        if j > np.shape(cmap_array)[1] - 1 and k > 0:
-            cmap_neighbour.append(cmap_array[i, j + 1, k - 1, t])
-
-        if j > np.shape(cmap_array)[1] - 1 and j < np.shape(cmap_array)[2] - 1:
-            cmap_neighbour.append(cmap_array[i, j + 1, k + 1, t])
-
-        # compare voxel to its neighbours
-        cmap_temp = np.abs(np.array(cmap_neighbour) - cmap_point)
-        cmap_temp = cmap_temp[~np.isnan(cmap_temp)]
-        cmap_temp = np.any(cmap_temp > edge_threshold)
-
-        if cmap_temp:
-            cmap_array[i, j, k, t] = np.nan
-
-        # print status
-        counter = np.floor(c_vox / n_vox * 100).astype(int)
-        if counter == n_step[c_step]:
-            print("cmap edge removal: " + str(counter) + " %")
-            c_step += 1
-
-        # counter loop cycles
-        c_vox += 1
-
-    # remove edges
-    cmap_array[np.isnan(cmap_array)] = 0
-
-    # get binary mask from single dimensions
-    mask_array = cmap_array[:, :, :, 0] * cmap_array[:, :, :, 1] * cmap_array[:, :, :, 2]
-    mask_array[mask_array != 0] = 1
+    n_z = cmap.shape[2]
+    if not chunk_size:
+        chunk_size = n_z
 
-    # get binary mask from min threshold
-    min_array1 = cmap_array[:, :, :, 0].copy()
-    min_array2 = cmap_array[:, :, :, 1].copy()
-    min_array3 = cmap_array[:, :, :, 2].copy()
+    cmap_array = np.zeros(cmap.shape, dtype=np.float32)
+    for z0 in range(0, n_z, chunk_size):
+        z1 = min(z0 + chunk_size, n_z)
 
-    min_array1[min_array1 < min_threshold] = 0
-    min_array2[min_array2 < min_threshold] = 0
-    min_array3[min_array3 < min_threshold] = 0
+        # read chunk with one neighbouring slice on each side
+        h0 = max(z0 - 1, 0)
+        h1 = min(z1 + 1, n_z)
+        arr = np.asarray(cmap.dataobj[:, :, h0:h1, :], dtype=np.float32)
 
-    min_array1[min_array1 != 0] = 1
-    min_array2[min_array2 != 0] = 1
-    min_array3[min_array3 != 0] = 1
+        # identify and remove edges
+        edge = _get_edge(arr, edge_threshold)
+        arr[edge | np.isnan(arr)] = 0
+        arr = arr[:, :, z0 - h0:z1 - h0, :]
 
-    min_array = min_array1 + min_array2 + min_array3
-    min_array[min_array != 0] = 1
+        # get binary mask from single dimensions
+        mask_array = np.all(arr[:, :, :, :3] != 0, axis=3)
 
-    # mask cmap
-    cmap_array[:, :, :, 0] = cmap_array[:, :, :, 0] * mask_array
-    cmap_array[:, :, :, 1] = cmap_array[:, :, :, 1] * mask_array
-    cmap_array[:, :, :, 2] = cmap_array[:, :, :, 2] * mask_array
+        # get binary mask from min threshold
+        min_array = np.any(arr[:, :, :, :3] >= min_threshold, axis=3)
 
-    cmap_array[:, :, :, 0] = cmap_array[:, :, :, 0] * min_array
-    cmap_array[:, :, :, 1] = cmap_array[:, :, :, 1] * min_array
-    cmap_array[:, :, :, 2] = cmap_array[:, :, :, 2] * min_array
+        # mask cmap
+        arr[~(mask_array & min_array)] = 0
+        cmap_array[:, :, z0:z1, :] = arr
 
     # write output
     path_output, basename_output, ext_output = get_filename(input_cmap)
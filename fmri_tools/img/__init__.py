@@ -2,6 +2,12 @@
 """Python package for for analysis of high-resolution fMRI data."""
 
 # local inputs
-from .get_gif import get_gif
-from .get_movie import get_movie
-from .get_retinotopy_images import get_retinotopy_images
+from ..lazy_import import lazy_import
+
+_attrs = {
+    "get_gif": ["get_gif"],
+    "get_movie": ["get_movie"],
+    "get_retinotopy_images": ["get_retinotopy_images"],
+}
+
+__getattr__, __dir__, __all__ = lazy_import(__name__, attrs=_attrs)
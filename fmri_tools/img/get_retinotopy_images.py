@@ -2,15 +2,16 @@
 
 # python standard library inputs
 import os
-import datetime
+import sys
+import subprocess
 
 # external inputs
 import numpy as np
 import nibabel as nb
-import shutil as sh
 import matplotlib.pyplot as plt
 
 # local inputs
+from ..io.scratch_workspace import scratch_subject, link_file
 from ..segmentation.orthographic_projection import orthographic_projection
 
 
@@ -54,12 +55,8 @@ def get_retinotopy_images(input_patch, input_vfs, input_phase, input_snr,
         Gaussian kernel size for weighting towards single phase values.. The 
         default is 50.
     cleanup : bool, optional
-        Delete intermediate files. The default is True.
-
-    Raises
-    ------
-    FileExistsError
-        If the temporary folder already exists.
+        Delete intermediate files. If False, intermediate files are kept in a
+        freesurfer subject within the output folder. The default is True.
 
     Returns
     -------
@@ -77,73 +74,59 @@ def get_retinotopy_images(input_patch, input_vfs, input_phase, input_snr,
     # phase step for single images
     phase_step = np.arange(-180, 181, 1)
 
-    # set freesurfer path environment
-    os.environ["SUBJECTS_DIR"] = path_output
-
-    # freesurfer subject
-    tmp1 = np.random.randint(0, 10, 5)
-    tmp1 = ''.join(str(i) for i in tmp1)
-    tmp2 = datetime.datetime.now().strftime("%S%f")
-    tmp_string = tmp1 + tmp2
-    sub = "tmp_" + tmp_string
-
     # make output folder
-    if not os.path.exists(path_output):
-        os.mkdir(path_output)
-
-    # mimic freesurfer folder structure (with some additional folder for
-    # intermediate files)
-    path_sub = os.path.join(path_output, sub)
     path_img = os.path.join(path_output, "img")
-    path_surf = os.path.join(path_sub, "surf")
-    path_ortho = os.path.join(path_sub, "ortho")
-
-    if not os.path.exists(path_sub):
-        os.makedirs(path_sub)
-    else:
-        raise FileExistsError("Temporary folder already exists!")
-
-    os.makedirs(path_surf)
-    os.makedirs(path_ortho)
-    os.makedirs(path_img)
-
-    # copy surfaces to mimicked freesurfer folders
-    sh.copyfile(input_patch, os.path.join(path_surf, hemi + ".patch"))
-    sh.copyfile(input_white, os.path.join(path_surf, hemi + ".white"))
-    sh.copyfile(input_vfs, os.path.join(path_surf, hemi + ".vfs.mgh"))
-    sh.copyfile(input_phase, os.path.join(path_surf, hemi + ".phase.mgh"))
-    sh.copyfile(input_snr, os.path.join(path_surf, hemi + ".snr.mgh"))
-
-    # get orthographic projection
-    orthographic_projection(os.path.join(path_surf, hemi + ".patch"),
-                            img_res, theta, alpha, buffer, path_ortho)
-
-    os.system("mris_fwhm" +
-              " --s " + sub +
-              " --hemi " + hemi +
-              " --smooth-only " +
-              " --fwhm " + str(phase_fwhm) +
-              " --i " + os.path.join(path_surf, hemi + ".phase.mgh") +
-              " --o " + os.path.join(path_surf, hemi + ".phase_smooth.mgh"))
-
-    os.system("mris_fwhm" +
-              " --s " + sub +
-              " --hemi " + hemi +
-              " --smooth-only " +
-              " --fwhm " + str(phase_fwhm) +
-              " --i " + os.path.join(path_surf, hemi + ".snr.mgh") +
-              " --o " + os.path.join(path_surf, hemi + ".snr_smooth.mgh"))
-
-    # read cmap, mask, vfs, phase
-    cmap = nb.load(
-        os.path.join(path_ortho, hemi + ".patch.cmap.nii")).get_fdata().astype(
-        int)
-    mask = nb.load(
-        os.path.join(path_ortho, hemi + ".patch.mask.nii")).get_fdata()
-    vfs = nb.load(os.path.join(path_surf, hemi + ".vfs.mgh")).get_fdata()
-    phase = nb.load(
-        os.path.join(path_surf, hemi + ".phase_smooth.mgh")).get_fdata()
-    snr = nb.load(os.path.join(path_surf, hemi + ".snr_smooth.mgh")).get_fdata()
+    if not os.path.exists(path_img):
+        os.makedirs(path_img)
+
+    # freesurfer subject (reused within the process or kept in the output
+    # folder if cleanup is False)
+    path_scratch = None if cleanup else path_output
+    with scratch_subject(path_scratch, cleanup) as (path_subjects, sub):
+        path_surf = os.path.join(path_subjects, sub, "surf")
+        path_ortho = os.path.join(path_subjects, sub, "ortho")
+        os.makedirs(path_ortho)
+
+        # set freesurfer path environment
+        os.environ["SUBJECTS_DIR"] = path_subjects
+
+        # link surfaces into mimicked freesurfer folders
+        link_file(input_patch, os.path.join(path_surf, hemi + ".patch"))
+        link_file(input_white, os.path.join(path_surf, hemi + ".white"))
+        link_file(input_vfs, os.path.join(path_surf, hemi + ".vfs.mgh"))
+        link_file(input_phase, os.path.join(path_surf, hemi + ".phase.mgh"))
+        link_file(input_snr, os.path.join(path_surf, hemi + ".snr.mgh"))
+
+        # get orthographic projection
+        orthographic_projection(os.path.join(path_surf, hemi + ".patch"),
+                                img_res, theta, alpha, buffer, path_ortho)
+
+        for name in ["phase", "snr"]:
+            try:
+                subprocess.run(["mris_fwhm",
+                                "--s", sub,
+                                "--hemi", hemi,
+                                "--smooth-only",
+                                "--fwhm", str(phase_fwhm),
+                                "--i", os.path.join(path_surf,
+                                                    hemi + "." + name + ".mgh"),
+                                "--o", os.path.join(path_surf, hemi + "." +
+                                                    name + "_smooth.mgh")],
+                               check=True)
+            except subprocess.CalledProcessError:
+                sys.exit("Surface smoothing failed!")
+
+        # read cmap, mask, vfs, phase
+        cmap = nb.load(
+            os.path.join(path_ortho, hemi + ".patch.cmap.nii")).get_fdata().astype(
+            int)
+        mask = nb.load(
+            os.path.join(path_ortho, hemi + ".patch.mask.nii")).get_fdata()
+        vfs = nb.load(os.path.join(path_surf, hemi + ".vfs.mgh")).get_fdata()
+        phase = nb.load(
+            os.path.join(path_surf, hemi + ".phase_smooth.mgh")).get_fdata()
+        snr = nb.load(
+            os.path.join(path_surf, hemi + ".snr_smooth.mgh")).get_fdata()
 
     # sample onto regular grid
     vfs_grid = np.zeros_like(cmap)
@@ -199,7 +182,3 @@ def get_retinotopy_images(input_patch, input_vfs, input_phase, input_snr,
         ax.imshow(img2, aspect='auto')
         fig.savefig(os.path.join(path_img, "img_" + str(k) + ".png"), dpi=400)
         plt.close('all')
-
-    # delete intermediate files
-    if cleanup:
-        sh.rmtree(path_sub, ignore_errors=True)
@@ -2,15 +2,24 @@
 """Python package for for analysis of high-resolution fMRI data."""
 
 # local inputs
-from .copy_header import copy_header
-from .get_filename import get_filename
-from .mgh2nii import mgh2nii
-from .read_patch import read_patch
-from .read_vox2vox import read_vox2vox
-from .write_label import write_label
-from .read_mgh import read_mgh
-from .write_mgh import write_mgh
-from .read_hdf5 import read_hdf5
-from .write_hdf5 import write_hdf5
-from .extract_mgh_from_hdf5 import extract_mgh_from_hdf5
-from .write_vector_field import write_vector_field
+from ..lazy_import import lazy_import
+
+_attrs = {
+    "copy_header": ["copy_header"],
+    "get_filename": ["get_filename"],
+    "mgh2nii": ["mgh2nii"],
+    "read_patch": ["read_patch"],
+    "read_vox2vox": ["read_vox2vox"],
+    "write_label": ["write_label"],
+    "read_mgh": ["read_mgh"],
+    "write_mgh": ["write_mgh"],
+    "read_hdf5": ["read_hdf5"],
+    "write_hdf5": ["write_hdf5"],
+    "extract_mgh_from_hdf5": ["extract_mgh_from_hdf5"],
+    "write_vector_field": ["write_vector_field"],
+    "scratch_workspace": ["scratch_workspace", "link_file",
+                          "scratch_subject"],
+    "result_cache": ["result_cache", "set_result_cache"],
+}
+
+__getattr__, __dir__, __all__ = lazy_import(__name__, attrs=_attrs)
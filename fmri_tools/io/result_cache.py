@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+
+# python standard library inputs
+import os
+import json
+import hashlib
+import inspect
+import tempfile
+import functools
+import shutil as sh
+
+# local inputs
+from ..io.get_filename import get_filename
+
+# environment variables which enable the cache and set its size (in GB)
+CACHE_ENV = "FMRI_TOOLS_CACHE"
+CACHE_SIZE_ENV = "FMRI_TOOLS_CACHE_SIZE"
+
+# cache settings set by `set_result_cache` (overrides environment variables)
+_SETTINGS = {}
+
+# file hashes computed within the current process
+_HASHES = {}
+
+
+def _get_settings():
+    """Helper function to get the cache directory and the maximum cache size in
+    bytes. The cache directory is None if caching is disabled."""
+
+    path = _SETTINGS.get("path", os.environ.get(CACHE_ENV) or None)
+    max_size = _SETTINGS.get("max_size",
+                             float(os.environ.get(CACHE_SIZE_ENV, 10)))
+
+    return path, int(max_size * 1024 ** 3)
+
+
+def _hash_file(file_in, chunk_size=2 ** 24):
+    """Helper function to compute the sha1 hash of the file content. Hashes are
+    reused as long as size and modification time of the file are unchanged."""
+
+    stat = os.stat(file_in)
+    key = (os.path.realpath(file_in), stat.st_size, stat.st_mtime_ns)
+    if key not in _HASHES:
+        sha1 = hashlib.sha1()
+        with open(file_in, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                sha1.update(chunk)
+        _HASHES[key] = sha1.hexdigest()
+
+    return _HASHES[key]
+
+
+def _evict(path_cache, max_size):
+    """Helper function to remove least recently used entries until the cache
+    size is below the maximum size."""
+
+    entries = []
+    for entry in os.scandir(path_cache):
+        if entry.is_file() and not entry.name.startswith("tmp_"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    size = sum(e[1] for e in entries)
+    for _, entry_size, entry_path in sorted(entries):
+        if size <= max_size:
+            break
+        try:
+            os.remove(entry_path)
+        except FileNotFoundError:
+            pass
+        size -= entry_size
+
+
+def set_result_cache(path=None, max_size=10):
+    """Set result cache.
+
+    This function enables or disables the result cache (see `result_cache`)
+    for the current process. Settings made here override the environment
+    variables FMRI_TOOLS_CACHE and FMRI_TOOLS_CACHE_SIZE.
+
+    Parameters
+    ----------
+    path : str, optional
+        Cache directory. Caching is disabled if None. The default is None.
+    max_size : float, optional
+        Maximum size of the cache directory in GB. The default is 10.
+
+    Returns
+    -------
+    None.
+
+    """
+
+    _SETTINGS["path"] = path
+    _SETTINGS["max_size"] = max_size
+
+
+def result_cache(func=None, load=None):
+    """Result cache.
+
+    This decorator adds an opt-in content-addressed on-disk cache to functions
+    of the form func(file_in, file_out, ...) which write one output file. The
+    cache key is computed from the function name, the content hash of the input
+    file, the file extension of the output file and all other arguments
+    (including defaults). If an entry exists, it is copied to the output file
+    and the function is not called. Otherwise, the function is called and its
+    output is stored in the cache. Calls without output filename or with an
+    input which is not a filename (e.g. an in-memory image) are not cached.
+    Entries are evicted in least recently used order if the cache exceeds its
+    maximum size. The cache is disabled by default and is enabled by setting
+    the environment variable FMRI_TOOLS_CACHE to a cache directory or by
+    calling `set_result_cache`. The maximum size in GB is set by
+    FMRI_TOOLS_CACHE_SIZE (default: 10). The decorator can be used with or
+    without arguments, i.e., @result_cache or @result_cache(load=nb.load).
+
+    Parameters
+    ----------
+    func : function, optional
+        Function with input and output filename as first two arguments. The
+        default is None.
+    load : function, optional
+        Function which loads the output file. If set, results taken from the
+        cache are returned as load(file_out). Otherwise, None is returned for
+        cached results. The default is None.
+
+    Returns
+    -------
+    function
+        Wrapped function.
+
+    """
+
+    if func is None:
+        return functools.partial(result_cache, load=load)
+
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        path_cache, max_size = _get_settings()
+        if not path_cache:
+            return func(*args, **kwargs)
+
+        # cache key
+        params = signature.bind(*args, **kwargs)
+        params.apply_defaults()
+        params = list(params.arguments.items())
+        (_, file_in), (_, file_out) = params[:2]
+        if not isinstance(file_in, str) or not file_out:
+            return func(*args, **kwargs)
+
+        _, _, ext_out = get_filename(file_out)
+        key = json.dumps([func.__module__, func.__name__, _hash_file(file_in),
+                          ext_out, [(k, repr(v)) for k, v in params[2:]]])
+        key = hashlib.sha1(key.encode()).hexdigest()
+        file_cache = os.path.join(path_cache, key + ext_out)
+
+        # use cached result
+        if os.path.exists(file_cache):
+            path_output = os.path.dirname(file_out)
+            if path_output and not os.path.exists(path_output):
+                os.makedirs(path_output)
+            sh.copyfile(file_cache, file_out)
+            os.utime(file_cache)
+            return load(file_out) if load is not None else None
+
+        res = func(*args, **kwargs)
+
+        # store result
+        if os.path.isfile(file_out):
+            if not os.path.exists(path_cache):
+                os.makedirs(path_cache, exist_ok=True)
+            fd, file_tmp = tempfile.mkstemp(prefix="tmp_", dir=path_cache)
+            os.close(fd)
+            sh.copyfile(file_out, file_tmp)
+            os.replace(file_tmp, file_cache)
+            _evict(path_cache, max_size)
+
+        return res
+
+    return wrapper
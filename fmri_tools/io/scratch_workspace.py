@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+# python standard library inputs
+import os
+import atexit
+import tempfile
+import threading
+import shutil as sh
+from contextlib import contextmanager
+
+# environment variable which sets the base directory of scratch workspaces
+SCRATCH_ENV = "FMRI_TOOLS_SCRATCH"
+
+# freesurfer subjects which are reused within the current process
+_SUBJECTS = {}
+
+
+def _get_scratch_base(path=None):
+    """Helper function to get the base directory of scratch workspaces. If not
+    set, the environment variable FMRI_TOOLS_SCRATCH (e.g. pointing to a local
+    disk or to /dev/shm) or the default temporary directory is used."""
+
+    if path is None:
+        path = os.environ.get(SCRATCH_ENV) or tempfile.gettempdir()
+
+    if not os.path.exists(path):
+        os.makedirs(path, exist_ok=True)
+
+    return path
+
+
+def _make_subject(path_subjects):
+    """Helper function to create a uniquely named freesurfer subject in the
+    given subjects directory."""
+
+    path_sub = tempfile.mkdtemp(prefix="tmp_", dir=path_subjects)
+    for folder in ["mri", "surf", "label"]:
+        os.makedirs(os.path.join(path_sub, folder))
+
+    return path_subjects, os.path.basename(path_sub)
+
+
+def _clear_subject(path_subjects, sub):
+    """Helper function to remove all files and folders of previous calls from
+    a freesurfer subject. Only the empty folders mri, surf and label remain."""
+
+    path_sub = os.path.join(path_subjects, sub)
+    for name in os.listdir(path_sub):
+        path = os.path.join(path_sub, name)
+        if os.path.isdir(path) and not os.path.islink(path):
+            sh.rmtree(path, ignore_errors=True)
+        else:
+            os.remove(path)
+
+    for folder in ["mri", "surf", "label"]:
+        os.makedirs(os.path.join(path_sub, folder))
+
+
+def _remove_subjects():
+    """Helper function to remove all freesurfer subjects of the current process
+    at interpreter exit."""
+
+    for key, (path_subjects, _) in list(_SUBJECTS.items()):
+        if key[0] == os.getpid():
+            sh.rmtree(path_subjects, ignore_errors=True)
+            _SUBJECTS.pop(key, None)
+
+
+atexit.register(_remove_subjects)
+
+
+@contextmanager
+def scratch_workspace(path=None, cleanup=True):
+    """Scratch workspace.
+
+    This context manager creates a temporary folder for intermediate files and
+    yields its path. The folder name is generated by the tempfile module and is
+    therefore unique even if many processes (e.g. parallel joblib jobs) create
+    workspaces in the same directory at the same time. By default, workspaces
+    are placed in the directory given by the environment variable
+    FMRI_TOOLS_SCRATCH which should point to a fast local disk or to a tmpfs
+    like /dev/shm. If not set, the default temporary directory of the system is
+    used. Inputs should be placed into the workspace with `link_file` instead
+    of copying them.
+
+    Parameters
+    ----------
+    path : str, optional
+        Directory in which the workspace is created. The default is None.
+    cleanup : bool, optional
+        Delete the workspace when leaving the context. The default is True.
+
+    Yields
+    ------
+    path_tmp : str
+        Path of the workspace.
+
+    """
+
+    path_tmp = tempfile.mkdtemp(prefix="tmp_", dir=_get_scratch_base(path))
+    try:
+        yield path_tmp
+    finally:
+        if cleanup:
+            sh.rmtree(path_tmp, ignore_errors=True)
+
+
+def link_file(file_in, file_out):
+    """Link file.
+
+    This function places a file at a new location without copying its content.
+    A hard link is tried first. If this is not possible (e.g. if both locations
+    are on different file systems), a symbolic link is created. The file is only
+    copied as last resort. An already existing output file is replaced. Note
+    that linked files share their content with the input file and must
+    therefore not be modified in-place.
+
+    Parameters
+    ----------
+    file_in : str
+        Filename of input file.
+    file_out : str
+        Filename of output file.
+
+    Returns
+    -------
+    str
+        Filename of output file.
+
+    """
+
+    if os.path.lexists(file_out):
+        os.remove(file_out)
+
+    try:
+        os.link(file_in, file_out)
+    except OSError:
+        try:
+            os.symlink(os.path.abspath(file_in), file_out)
+        except OSError:
+            sh.copyfile(file_in, file_out)
+
+    return file_out
+
+
+@contextmanager
+def scratch_subject(path=None, cleanup=True):
+    """Scratch subject.
+
+    This context manager provides a mimicked freesurfer subject (with folders
+    mri, surf and label) which can be used by freesurfer programs that expect
+    their inputs in SUBJECTS_DIR, and yields the subjects directory and the
+    subject name. If no path is given, the subject is created once in the
+    scratch directory (see `scratch_workspace`) and reused by all following
+    calls of the same thread within the process. It is removed at interpreter
+    exit. Files of previous calls are removed from the reused subject when
+    entering the context, so that no stale outputs are picked up, and when
+    leaving the context if cleanup is set. If a path is given, a new subject is
+    created in that directory which is deleted when leaving the context if
+    cleanup is set. Inputs should be placed into the subject folders with
+    `link_file`.
+
+    Parameters
+    ----------
+    path : str, optional
+        Directory in which a new subject is created. The default is None.
+    cleanup : bool, optional
+        Delete the files of the subject when leaving the context. The default
+        is True.
+
+    Yields
+    ------
+    path_subjects : str
+        Freesurfer subjects directory.
+    sub : str
+        Name of freesurfer subject.
+
+    """
+
+    # new subject in the given directory
+    if path is not None:
+        path_subjects, sub = _make_subject(_get_scratch_base(path))
+        try:
+            yield path_subjects, sub
+        finally:
+            if cleanup:
+                sh.rmtree(os.path.join(path_subjects, sub), ignore_errors=True)
+        return
+
+    # subject which is reused within the process (one per thread so that
+    # concurrent calls do not share files)
+    key = (os.getpid(), threading.get_ident(), _get_scratch_base())
+    if key not in _SUBJECTS or \
+            not os.path.isdir(os.path.join(*_SUBJECTS[key])):
+        path_subjects = tempfile.mkdtemp(prefix="tmp_", dir=key[2])
+        _SUBJECTS[key] = _make_subject(path_subjects)
+
+    path_subjects, sub = _SUBJECTS[key]
+    _clear_subject(path_subjects, sub)
+    try:
+        yield path_subjects, sub
+    finally:
+        if cleanup:
+            _clear_subject(path_subjects, sub)
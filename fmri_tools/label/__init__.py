@@ -2,6 +2,12 @@
 """Python package for for analysis of high-resolution fMRI data."""
 
 # local inputs
-from .label_border import label_border
-from .label_dilation import label_dilation
-from .label_erosion import label_erosion
+from ..lazy_import import lazy_import
+
+_attrs = {
+    "label_border": ["label_border"],
+    "label_dilation": ["label_dilation"],
+    "label_erosion": ["label_erosion"],
+}
+
+__getattr__, __dir__, __all__ = lazy_import(__name__, attrs=_attrs)
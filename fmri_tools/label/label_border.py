@@ -2,40 +2,75 @@
 
 # external inputs
 import numpy as np
-from gbb.neighbor import nn_2d
+from scipy.sparse import csr_matrix
+
+
+def _get_adjacency(adjm):
+    """Helper function to convert an adjacency matrix into a sparse matrix in
+    csr format with unit weights."""
+
+    adjm = csr_matrix(adjm)
+
+    return csr_matrix((np.ones_like(adjm.data, dtype=np.float32),
+                       adjm.indices, adjm.indptr), shape=adjm.shape)
+
+
+def _get_indicator(arr_label, n_vertex):
+    """Helper function which converts a 1D array of label indices into a boolean
+    indicator array of shape (nvertex, 1). 2D arrays are expected to be
+    indicator arrays of shape (nvertex, nlabel) already."""
+
+    if np.ndim(arr_label) == 2:
+        return np.asarray(arr_label, dtype=bool)
+
+    arr_label = np.asarray(arr_label, dtype=np.int64)
+    indicator = np.zeros((n_vertex, 1), dtype=bool)
+    indicator[arr_label, 0] = True
+
+    return indicator
+
+
+def _get_border(indicator, adjm):
+    """Helper function to compute border vertices of all label columns in an
+    indicator array. Label vertices are border vertices if at least one
+    neighbor is outside of the label."""
+
+    n_outside = adjm.dot((~indicator).astype(np.float32))
+
+    return indicator & (n_outside > 0)
 
 
 def label_border(arr_label, adjm):
     """Label border.
     
     This function returns border vertex indices from an input array containing 
-    vertex indices of a freesurfer label.
+    vertex indices of a freesurfer label. Border vertices are label vertices
+    with at least one neighbor outside of the label. They are found by one
+    sparse matrix product of the adjacency matrix with the inverted label
+    indicator. Several labels can be processed at once by passing a boolean
+    indicator array with one column per label.
 
     Parameters
     ----------
     arr_label : ndarray
-        1D array of label indices.
+        1D array of label indices or boolean array of shape (nvertex, nlabel).
     adjm : ndarray
         Adjacency matrix.
 
     Returns
     -------
     border : ndarray
-        1D array of border indices.
+        1D array of border indices or boolean array of shape (nvertex, nlabel)
+        if a 2D array was passed.
 
     """
-    
-    # label array as set
-    arr_label_set = set(arr_label)
-    
-    border = []
-    for i in arr_label:
-        
-        # get nearest neighbors
-        nn = nn_2d(i, adjm, 0)
-        
-        # check if all neighbors are within the label
-        if not set(nn).issubset(arr_label_set):
-            border.append(i)
-    
-    return np.array(border)
+
+    adjm = _get_adjacency(adjm)
+    border = _get_border(_get_indicator(arr_label, adjm.shape[0]), adjm)
+
+    if np.ndim(arr_label) == 2:
+        return border
+
+    arr_label = np.asarray(arr_label, dtype=np.int64)
+
+    return arr_label[border[arr_label, 0]]
@@ -2,10 +2,9 @@
 
 # external inputs
 import numpy as np
-from gbb.neighbor import nn_2d
 
 # local inputs
-from .label_border import label_border
+from .label_border import _get_adjacency, _get_indicator
 
 
 def label_dilation(arr_label, adjm, n):
@@ -14,12 +13,14 @@ def label_dilation(arr_label, adjm, n):
     This function dilates a labeled region of interest which is defined as a 1D
     array of triangular mesh indices. Dilation is done by adding the one-ring
     neighborhood of all border vertices to the label array. This can be done
-    iteratively.
+    iteratively. Each iteration is computed as one sparse matrix product of the
+    adjacency matrix with the label indicator. Several labels can be processed
+    at once by passing a boolean indicator array with one column per label.
 
     Parameters
     ----------
     arr_label : ndarray
-        1D array of label indices.
+        1D array of label indices or boolean array of shape (nvertex, nlabel).
     adjm : ndarray
         Adjacency matrix.
     n : int
@@ -28,24 +29,17 @@ def label_dilation(arr_label, adjm, n):
     Returns
     -------
     arr_label : ndarray
-        1D array of dilated label indices.
+        1D array of dilated label indices or boolean array of shape
+        (nvertex, nlabel) if a 2D array was passed.
 
     """
-    
-    arr_dilate = []
+
+    adjm = _get_adjacency(adjm)
+    indicator = _get_indicator(arr_label, adjm.shape[0])
     for i in range(n):
-        
-        # get label border
-        border = label_border(arr_label, adjm)
-    
-        # dilate
-        for j in border:
-            nn = nn_2d(j, adjm, 0)
-            arr_dilate.extend(nn)
-    
-        # update label indices
-        arr_label = np.append(arr_label, arr_dilate)
-        arr_label = np.unique(arr_label)
-        arr_label = np.sort(arr_label)
+        indicator = indicator | (adjm.dot(indicator.astype(np.float32)) > 0)
+
+    if np.ndim(arr_label) == 2:
+        return indicator
 
-    return arr_label
+    return np.flatnonzero(indicator[:, 0])
@@ -4,7 +4,7 @@
 import numpy as np
 
 # local inputs
-from .label_border import label_border
+from .label_border import _get_adjacency, _get_indicator, _get_border
 
 
 def label_erosion(arr_label, adjm, n):
@@ -12,12 +12,15 @@ def label_erosion(arr_label, adjm, n):
     
     This function erodes a labeled region of interest which is defined as a 1D
     array of triangular mesh indices. Erosion is done by removing all border 
-    indices from the label array. This can be done iteratively.
+    indices from the label array. This can be done iteratively. Each iteration
+    is computed as one sparse matrix product of the adjacency matrix with the
+    inverted label indicator. Several labels can be processed at once by
+    passing a boolean indicator array with one column per label.
 
     Parameters
     ----------
     arr_label : ndarray
-        1D array of label indices.
+        1D array of label indices or boolean array of shape (nvertex, nlabel).
     adjm : ndarray
         Adjacency matrix.
     n : int
@@ -26,16 +29,19 @@ def label_erosion(arr_label, adjm, n):
     Returns
     -------
     arr_label : ndarray
-        1D array of eroded label indices.
+        1D array of eroded label indices or boolean array of shape
+        (nvertex, nlabel) if a 2D array was passed.
 
     """
 
+    adjm = _get_adjacency(adjm)
+    indicator = _get_indicator(arr_label, adjm.shape[0])
     for i in range(n):
-        # get label border
-        border = label_border(arr_label, adjm)
+        indicator = indicator & ~_get_border(indicator, adjm)
 
-        # update label indices
-        tmp = np.in1d(arr_label, border)
-        arr_label = arr_label[tmp == False]
+    if np.ndim(arr_label) == 2:
+        return indicator
 
-    return arr_label
+    arr_label = np.asarray(arr_label, dtype=np.int64)
+
+    return arr_label[indicator[arr_label, 0]]
@@ -2,10 +2,16 @@
 """Python package for for analysis of high-resolution fMRI data."""
 
 # local inputs
-from .calc_equidist import calc_equidist
-from .calc_equivol import calc_equivol
-from .calc_equivol2 import calc_equivol2
-from .calc_equivol3 import calc_equivol3
-from .calc_equidist_surf import calc_equidist_surf
-from .calc_equivol_surf import calc_equivol_surf
-from .get_meshlines import get_meshlines
+from ..lazy_import import lazy_import
+
+_attrs = {
+    "calc_equidist": ["calc_equidist"],
+    "calc_equivol": ["calc_equivol"],
+    "calc_equivol2": ["calc_equivol2"],
+    "calc_equivol3": ["calc_equivol3"],
+    "calc_equidist_surf": ["calc_equidist_surf"],
+    "calc_equivol_surf": ["calc_equivol_surf"],
+    "get_meshlines": ["get_meshlines"],
+}
+
+__getattr__, __dir__, __all__ = lazy_import(__name__, attrs=_attrs)
@@ -3,10 +3,8 @@
 # python standard library inputs
 import os
 import sys
-import datetime
 
 # external inputs
-import numpy as np
 import nibabel as nb
 from nibabel.freesurfer.io import read_geometry, write_geometry
 from nighres.laminar import profile_meshing
@@ -14,6 +12,7 @@ from gbb.utils import vox2ras
 from gbb.io import get_filename
 
 # local inputs
+from ..io.scratch_workspace import scratch_workspace
 from ..surface.smooth_surface import smooth_surface
 from ..layer.get_meshlines import get_meshlines
 from ..utils.apply_affine_chunked import apply_affine_chunked
@@ -106,28 +105,20 @@ def calc_equidist_surf(input_mesh, input_boundaries, path_output, n_layer,
     vtx_white = apply_affine_chunked(vox2ras_tkr, vtx_white)
     vtx_pial = apply_affine_chunked(vox2ras_tkr, vtx_pial)
 
-    # write temporary output
-    tmp1 = np.random.randint(0, 10, 5)
-    tmp1 = ''.join(str(i) for i in tmp1)
-    tmp2 = datetime.datetime.now().strftime("%S%f")
-    tmp_string = tmp1 + tmp2
-
-    tmp_white = os.path.join(path_output, "tmp_white_" + tmp_string)
-    tmp_pial = os.path.join(path_output, "tmp_pial_" + tmp_string)
-
-    if os.path.exists(tmp_white) or os.path.exists(tmp_pial):
-        raise FileExistsError("Temporary file already exists!")
-
-    write_geometry(tmp_white, vtx_white, fac)
-    write_geometry(tmp_pial, vtx_pial, fac)
-
     # smooth output
     if n_smooth:
-        smooth_surface(tmp_white, tmp_white, n_smooth)
-        smooth_surface(tmp_pial, tmp_pial, n_smooth)
+        with scratch_workspace() as path_tmp:
+            tmp_white = os.path.join(path_tmp, "white")
+            tmp_pial = os.path.join(path_tmp, "pial")
+
+            write_geometry(tmp_white, vtx_white, fac)
+            write_geometry(tmp_pial, vtx_pial, fac)
+
+            smooth_surface(tmp_white, tmp_white, n_smooth)
+            smooth_surface(tmp_pial, tmp_pial, n_smooth)
 
-        vtx_white, fac_white = read_geometry(tmp_white)
-        vtx_pial, fac_pial = read_geometry(tmp_pial)
+            vtx_white, fac_white = read_geometry(tmp_white)
+            vtx_pial, fac_pial = read_geometry(tmp_pial)
 
     # mesh lines
     vtx_lines, fac_lines = get_meshlines(vtx_pial, vtx_white)
@@ -140,6 +131,3 @@ def calc_equidist_surf(input_mesh, input_boundaries, path_output, n_layer,
                                     hemi + "." + name + "_layer_" + str(i))
         write_geometry(filename_out, vtx_layer, fac)
 
-        # clean
-    os.remove(tmp_white)
-    os.remove(tmp_pial)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+# python standard library inputs
+import os
+import sys
+import importlib
+from types import ModuleType
+
+# environment variable which disables lazy loading (e.g. for debugging)
+EAGER_ENV = "FMRI_TOOLS_EAGER_IMPORT"
+
+# exported attributes and their submodules for each lazily loaded package
+_ATTRS = {}
+
+
+class _LazyModule(ModuleType):
+    """Module type of lazily loaded packages. The import system sets a package
+    attribute to the submodule after the submodule was loaded. If an exported
+    function has the same name as its submodule, the function is set instead
+    to keep the same package namespace as with eager imports."""
+
+    def __setattr__(self, attr, value):
+        submodule = _ATTRS.get(self.__name__, {}).get(attr)
+        if isinstance(value, ModuleType) and submodule == attr:
+            value = getattr(value, attr)
+
+        super().__setattr__(attr, value)
+
+
+def lazy_import(name, submodules=None, attrs=None):
+    """Lazy import.
+
+    This function enables lazy loading of subpackages and exported attributes
+    of a package by using module level __getattr__ and __dir__ functions (PEP
+    562). Submodules are therefore only imported if one of their attributes is
+    accessed for the first time and not when the package is imported. This
+    keeps heavy dependencies (e.g. nipype, nighres, gbb or matplotlib) out of
+    processes which do not need them. Lazy loading can be disabled by setting
+    the environment variable FMRI_TOOLS_EAGER_IMPORT to 1. The function is
+    called in the __init__ file of a package as follows:
+
+    __getattr__, __dir__, __all__ = lazy_import(__name__, submodules, attrs)
+
+    Parameters
+    ----------
+    name : str
+        Package name (__name__).
+    submodules : list, optional
+        List of submodule names which are exported as modules. The default is
+        None.
+    attrs : dict, optional
+        Dictionary with submodule names as keys and lists of exported attribute
+        names of each submodule as values. The default is None.
+
+    Returns
+    -------
+    __getattr__ : function
+        Module level __getattr__ function.
+    __dir__ : function
+        Module level __dir__ function.
+    __all__ : list
+        List of exported names.
+
+    """
+
+    submodules = set(submodules or [])
+    attr_to_mod = {a: mod for mod, names in (attrs or {}).items() for a in names}
+    _ATTRS[name] = attr_to_mod
+
+    package = sys.modules[name]
+    package.__class__ = _LazyModule
+
+    def __getattr__(attr):
+        if attr in submodules:
+            return importlib.import_module(name + "." + attr)
+        elif attr in attr_to_mod:
+            submodule = importlib.import_module(name + "." + attr_to_mod[attr])
+            value = getattr(submodule, attr)
+            setattr(package, attr, value)
+            return value
+        else:
+            raise AttributeError("module " + repr(name) + " has no attribute " +
+                                 repr(attr))
+
+    def __dir__():
+        return __all__
+
+    __all__ = sorted(submodules | set(attr_to_mod))
+
+    # load everything at import time
+    if os.environ.get(EAGER_ENV, "0") == "1":
+        for attr in __all__:
+            __getattr__(attr)
+
+    return __getattr__, __dir__, __all__
@@ -2,9 +2,19 @@
 """Python package for for analysis of high-resolution fMRI data."""
 
 # local inputs
-from .get_vfs import get_vfs
-from .get_weighted_vfs import get_weighted_vfs
-from .map2grid import map2grid
-from .map2stack import map2stack
-from .map2surface import map2surface
-from .morph2dense import morph2dense
+from ..lazy_import import lazy_import
+
+_attrs = {
+    "get_vfs": ["get_vfs"],
+    "get_weighted_vfs": ["get_weighted_vfs"],
+    "map2grid": ["map2grid"],
+    "map2stack": ["map2stack"],
+    "map2surface": ["map2surface"],
+    "morph2dense": ["morph2dense"],
+    "get_sampling_matrix": ["get_sampling_matrix"],
+    "get_interpolation_matrix": ["get_interpolation_matrix"],
+    "map_timeseries": ["map_timeseries"],
+    "sample_vertices": ["sample_vertices"],
+}
+
+__getattr__, __dir__, __all__ = lazy_import(__name__, attrs=_attrs)
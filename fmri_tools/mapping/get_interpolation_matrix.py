@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+# external inputs
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+def get_interpolation_matrix(coords, dims, interpolation="linear",
+                             padding="zero"):
+    """Get interpolation matrix.
+
+    This function computes a sparse matrix which interpolates volume data at
+    the given voxel coordinates. Nearest neighbor interpolation uses the
+    rounded voxel index. Linear interpolation weights the eight surrounding
+    voxels where neighbor indices are clamped at the volume border. With zero
+    padding, rows of coordinates outside of the volume are empty. With closest
+    padding, coordinates are clipped to the volume. Columns correspond to
+    voxels in flattened fortran order, i.e., the matrix can be directly applied
+    to `arr.reshape((-1, n), order="F")`, which is a view for nifti arrays.
+
+    Parameters
+    ----------
+    coords : ndarray
+        Array of voxel coordinates of shape (n, 3).
+    dims : list
+        Number of voxels along the first three dimensions.
+    interpolation : str, optional
+        Interpolation type (linear or nearest). The default is "linear".
+    padding : str, optional
+        Padding type (zero or closest). The default is "zero".
+
+    Raises
+    ------
+    ValueError
+        If `interpolation` or `padding` is invalid.
+
+    Returns
+    -------
+    csr_matrix
+        Sparse interpolation matrix of shape (points, voxels).
+
+    """
+
+    dims = np.asarray(dims[:3], dtype=np.int64)
+    coords = np.asarray(coords, dtype=np.float64)
+
+    if padding == "closest":
+        coords = np.clip(coords, 0, dims - 1)
+        inside = np.ones(len(coords), dtype=bool)
+    elif padding == "zero":
+        inside = np.all((coords >= 0) & (coords <= dims - 1), axis=1)
+    else:
+        raise ValueError("Choose a valid padding method!")
+
+    rows = np.flatnonzero(inside)
+    coords = coords[inside]
+
+    if interpolation == "nearest":
+        ind = np.floor(coords + 0.5).astype(np.int64)
+        ind = np.minimum(ind, dims - 1)[:, np.newaxis, :]
+        weights = np.ones((len(rows), 1))
+    elif interpolation == "linear":
+        ind0 = np.floor(coords).astype(np.int64)
+        ind1 = np.minimum(ind0 + 1, dims - 1)
+        d = coords - ind0
+
+        # corner indices and weights
+        corner = np.array([[cx, cy, cz] for cx in (0, 1)
+                           for cy in (0, 1)
+                           for cz in (0, 1)], dtype=bool)
+        ind = np.where(corner, ind1[:, np.newaxis, :], ind0[:, np.newaxis, :])
+        weights = np.where(corner, d[:, np.newaxis, :],
+                           1 - d[:, np.newaxis, :])
+        weights = np.prod(weights, axis=2)
+    else:
+        raise ValueError("Choose a valid interpolation method!")
+
+    # flattened voxel indices in fortran order
+    cols = ind[:, :, 0] + dims[0] * (ind[:, :, 1] + dims[1] * ind[:, :, 2])
+    rows = np.repeat(rows, weights.shape[1])
+
+    return csr_matrix((weights.ravel(), (rows, cols.ravel())),
+                      shape=(len(inside), np.prod(dims)))
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+# external inputs
+import numpy as np
+
+# local inputs
+from ..mapping.get_interpolation_matrix import get_interpolation_matrix
+
+
+def get_sampling_matrix(vtx, dims, vox2ras_tkr, interp_method="nearest"):
+    """Get sampling matrix.
+
+    This function computes a sparse matrix which samples volume data at vertex
+    positions. It mimics the point sampling of freesurfer's `mri_vol2surf` with
+    registration from header (--regheader) and zero projection distance. Vertex
+    coordinates are expected in freesurfer tkr space of the volume. Nearest
+    neighbor sampling uses the rounded voxel index. Trilinear sampling
+    interpolates between the eight surrounding voxels where neighbor indices
+    are clamped at the volume border. Rows of vertices whose rounded voxel index
+    lies outside of the volume are empty. Columns correspond to voxels in
+    flattened fortran order, i.e., the matrix can be directly applied to
+    `arr.reshape((-1, n), order="F")`, which is a view for nifti arrays.
+
+    Parameters
+    ----------
+    vtx : ndarray
+        Array of vertices (in tkr space).
+    dims : list
+        Number of voxels along the first three dimensions.
+    vox2ras_tkr : ndarray
+        Transformation matrix from voxel to tkr ras space.
+    interp_method : str, optional
+        Interpolation method (nearest or trilinear). The default is "nearest".
+
+    Raises
+    ------
+    ValueError
+        If `interp_method` is invalid.
+
+    Returns
+    -------
+    csr_matrix
+        Sparse sampling matrix of shape (vertices, voxels).
+
+    """
+
+    if interp_method == "nearest":
+        interpolation = "nearest"
+    elif interp_method == "trilinear":
+        interpolation = "linear"
+    else:
+        raise ValueError("Choose a valid interpolation method!")
+
+    # transform vertices to voxel space
+    ras2vox_tkr = np.linalg.inv(vox2ras_tkr)
+    vox = np.dot(vtx, ras2vox_tkr[:3, :3].T) + ras2vox_tkr[:3, 3]
+
+    # check bounds on rounded voxel indices. Vertices outside of the volume are
+    # moved out of range to get empty rows and the remaining ones are clamped
+    # to the volume, which does not change their rounded voxel index.
+    dims = np.asarray(dims[:3], dtype=np.int64)
+    ind = np.floor(vox + 0.5).astype(np.int64)
+    inside = np.all((ind >= 0) & (ind < dims), axis=1)
+    vox = np.where(inside[:, np.newaxis], np.clip(vox, 0, dims - 1), -1)
+
+    return get_interpolation_matrix(vox, dims, interpolation, "zero")
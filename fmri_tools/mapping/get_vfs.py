@@ -2,11 +2,11 @@
 
 # python standard library inputs
 import os
-import datetime
+import sys
+import subprocess
 
-# external inputs
-import numpy as np
-import shutil as sh
+# local inputs
+from ..io.scratch_workspace import scratch_subject, link_file
 
 
 def get_vfs(input_sphere, input_white, input_patch, input_aparc, hemi, ecc_real,
@@ -52,7 +52,8 @@ def get_vfs(input_sphere, input_white, input_patch, input_aparc, hemi, ecc_real,
     fwhm_vfs : float, optional
         Smoothing kernel for vfs calculation input in mm. The default is 8.0.
     cleanup : bool, optional
-        Delete intermediate files.  The default is True.
+        Delete intermediate files. If False, intermediate files are kept in a
+        freesurfer subject within the output folder. The default is True.
 
     Returns
     -------
@@ -60,75 +61,68 @@ def get_vfs(input_sphere, input_white, input_patch, input_aparc, hemi, ecc_real,
 
     """
 
-    # set freesurfer path environment
-    os.environ["SUBJECTS_DIR"] = path_output
-
-    # freesurfer subject
-    tmp1 = np.random.randint(0, 10, 5)
-    tmp1 = ''.join(str(i) for i in tmp1)
-    tmp2 = datetime.datetime.now().strftime("%S%f")
-    tmp_string = tmp1 + tmp2
-    sub = "tmp_" + tmp_string
-
     # make output folder
     if not os.path.exists(path_output):
         os.mkdir(path_output)
 
-    # mimic freesurfer folder structure (with some additional folder for intermediate files)
-    path_sub = os.path.join(path_output, sub)
-    path_surf = os.path.join(path_sub, "surf")
-    path_label = os.path.join(path_sub, "label")
-
-    if not os.path.exists(path_sub):
-        os.makedirs(path_sub)
-    else:
-        raise FileExistsError("Temporary folder already exists!")
-
-    os.makedirs(path_surf)
-    os.makedirs(path_label)
-
-    # copy surfaces to mimicked freesurfer folders
-    sh.copyfile(input_white, os.path.join(path_surf, hemi + ".white"))
-    sh.copyfile(input_sphere, os.path.join(path_surf, hemi + ".sphere"))
-    sh.copyfile(input_patch,
-                os.path.join(path_surf, hemi + ".occip.patch.flat"))
-    sh.copyfile(ecc_real, os.path.join(path_surf, hemi + ".ecc_real.mgh"))
-    sh.copyfile(ecc_imag, os.path.join(path_surf, hemi + ".ecc_imag.mgh"))
-    sh.copyfile(pol_real, os.path.join(path_surf, hemi + ".pol_real.mgh"))
-    sh.copyfile(pol_imag, os.path.join(path_surf, hemi + ".pol_imag.mgh"))
-    sh.copyfile(input_aparc, os.path.join(path_label, hemi + ".aparc.annot"))
-
-    # smooth surface
-    input_data = ["ecc_real", "ecc_imag", "pol_real", "pol_imag"]
-    input_fwhm = [fwhm_ecc, fwhm_ecc, fwhm_pol, fwhm_pol]
-    for i in range(len(input_data)):
-        os.system("mris_fwhm" +
-                  " --s " + sub +
-                  " --hemi " + hemi +
-                  " --smooth-only " +
-                  " --fwhm " + str(input_fwhm[i]) +
-                  " --i " + os.path.join(path_surf,
-                                         hemi + "." + input_data[i] + ".mgh") +
-                  " --o " + os.path.join(path_surf, hemi + "." + input_data[i] +
-                                         "_smooth.mgh"))
-
-    # file names of smoothed eccentricity and polar angle files
-    ecc_real = os.path.join(path_surf, hemi + "." + input_data[0] + "_smooth.mgh")
-    ecc_imag = os.path.join(path_surf, hemi + "." + input_data[1] + "_smooth.mgh")
-    pol_real = os.path.join(path_surf, hemi + "." + input_data[2] + "_smooth.mgh")
-    pol_imag = os.path.join(path_surf, hemi + "." + input_data[3] + "_smooth.mgh")
-
-    # create fiedsign map
-    os.system("mri_fieldsign" +
-              " --s " + sub +
-              " --hemi " + hemi +
-              " --patch occip.patch.flat" +
-              " --new " +
-              " --eccen " + ecc_real + " " + ecc_imag +
-              " --polar " + pol_real + " " + pol_imag +
-              " --fs " + os.path.join(path_output, hemi + ".fieldsign.mgh") +
-              " --fwhm " + str(fwhm_vfs))
-
-    # delete intermediate files
-    if cleanup:
-        sh.rmtree(path_sub, ignore_errors=True)
+    # freesurfer subject (reused within the process or kept in the output
+    # folder if cleanup is False)
+    path_scratch = None if cleanup else path_output
+    with scratch_subject(path_scratch, cleanup) as (path_subjects, sub):
+        path_surf = os.path.join(path_subjects, sub, "surf")
+        path_label = os.path.join(path_subjects, sub, "label")
+
+        # set freesurfer path environment
+        os.environ["SUBJECTS_DIR"] = path_subjects
+
+        # link surfaces into mimicked freesurfer folders
+        link_file(input_white, os.path.join(path_surf, hemi + ".white"))
+        link_file(input_sphere, os.path.join(path_surf, hemi + ".sphere"))
+        link_file(input_patch,
+                  os.path.join(path_surf, hemi + ".occip.patch.flat"))
+        link_file(ecc_real, os.path.join(path_surf, hemi + ".ecc_real.mgh"))
+        link_file(ecc_imag, os.path.join(path_surf, hemi + ".ecc_imag.mgh"))
+        link_file(pol_real, os.path.join(path_surf, hemi + ".pol_real.mgh"))
+        link_file(pol_imag, os.path.join(path_surf, hemi + ".pol_imag.mgh"))
+        link_file(input_aparc, os.path.join(path_label, hemi + ".aparc.annot"))
+
+        # smooth surface
+        input_data = ["ecc_real", "ecc_imag", "pol_real", "pol_imag"]
+        input_fwhm = [fwhm_ecc, fwhm_ecc, fwhm_pol, fwhm_pol]
+        for i in range(len(input_data)):
+            try:
+                subprocess.run(["mris_fwhm",
+                                "--s", sub,
+                                "--hemi", hemi,
+                                "--smooth-only",
+                                "--fwhm", str(input_fwhm[i]),
+                                "--i", os.path.join(path_surf, hemi + "." +
+                                                    input_data[i] + ".mgh"),
+                                "--o", os.path.join(path_surf, hemi + "." +
+                                                    input_data[i] +
+                                                    "_smooth.mgh")],
+                               check=True)
+            except subprocess.CalledProcessError:
+                sys.exit("Surface smoothing failed!")
+
+        # file names of smoothed eccentricity and polar angle files
+        ecc_real = os.path.join(path_surf, hemi + "." + input_data[0] + "_smooth.mgh")
+        ecc_imag = os.path.join(path_surf, hemi + "." + input_data[1] + "_smooth.mgh")
+        pol_real = os.path.join(path_surf, hemi + "." + input_data[2] + "_smooth.mgh")
+        pol_imag = os.path.join(path_surf, hemi + "." + input_data[3] + "_smooth.mgh")
+
+        # create fiedsign map
+        try:
+            subprocess.run(["mri_fieldsign",
+                            "--s", sub,
+                            "--hemi", hemi,
+                            "--patch", "occip.patch.flat",
+                            "--new",
+                            "--eccen", ecc_real, ecc_imag,
+                            "--polar", pol_real, pol_imag,
+                            "--fs", os.path.join(path_output,
+                                                 hemi + ".fieldsign.mgh"),
+                            "--fwhm", str(fwhm_vfs)],
+                           check=True)
+        except subprocess.CalledProcessError:
+            sys.exit("Field sign computation failed!")
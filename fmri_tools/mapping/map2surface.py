@@ -3,19 +3,17 @@
 # python standard library inputs
 import os
 import sys
-import datetime
-import shutil as sh
 
 # external inputs
 import numpy as np
+import nibabel as nb
 from nibabel.freesurfer.io import read_geometry
-from nipype.interfaces.freesurfer import SampleToSurface
 
 # local inputs
 from ..io.get_filename import get_filename
-from ..io.read_mgh import read_mgh
 from ..io.write_mgh import write_mgh
-from ..io.mgh2nii import mgh2nii
+from ..mapping.sample_vertices import sample_vertices
+from ..utils.get_vox2ras_tkr import get_vox2ras_tkr
 
 
 def map2surface(input_surf, input_vol, write_output=False, path_output="",
@@ -24,7 +22,10 @@ def map2surface(input_surf, input_vol, write_output=False, path_output="",
     """Map to surface.
 
     This function samples data from the input volume to the input surface and 
-    optionally maps those values to a target surface if an index file is given.    
+    optionally maps those values to a target surface if an index file is given. 
+    Sampling is done in-process and gives the same values as freesurfer's 
+    `mri_vol2surf` with registration from header, i.e., vertex coordinates are 
+    expected in tkr space of the input volume.
 
     Parameters
     ----------
@@ -45,12 +46,8 @@ def map2surface(input_surf, input_vol, write_output=False, path_output="",
         Textfile with mapping of vertex indices to target space. The default is 
         None.
     cleanup : bool, optional
-        Remove intermediate files. The default is True.
-
-    Raises
-    ------
-    FileExistsError
-        If the temporary folder already exists.
+        Not used anymore since no intermediate files are written. The default 
+        is True.
 
     Returns
     -------
@@ -63,41 +60,8 @@ def map2surface(input_surf, input_vol, write_output=False, path_output="",
 
     """
 
-    # clean everything if no output is written
-    if not write_output:
-        path_output, _, _ = get_filename(input_vol)
-        cleanup = True
-
-    # set freesurfer path environment
-    os.environ["SUBJECTS_DIR"] = path_output
-
-    # freesurfer subject
-    tmp1 = np.random.randint(0, 10, 5)
-    tmp1 = ''.join(str(i) for i in tmp1)
-    tmp2 = datetime.datetime.now().strftime("%S%f")
-    tmp_string = tmp1 + tmp2
-    sub = "tmp_" + tmp_string
-
-    # make output folder
-    if not os.path.exists(path_output):
-        os.makedirs(path_output)
-
-    # mimic freesurfer folder structure (with some additional folder for 
-    # intermediate files)
-    path_sub = os.path.join(path_output, sub)
-    path_mri = os.path.join(path_sub, "mri")
-    path_surf = os.path.join(path_sub, "surf")
-
-    if not os.path.exists(path_sub):
-        os.makedirs(path_sub)
-    else:
-        raise FileExistsError("Temporary folder already exists!")
-
-    os.makedirs(path_mri)
-    os.makedirs(path_surf)
-
     # get filenames
-    _, name_vol, ext_vol = get_filename(input_vol)
+    _, name_vol, _ = get_filename(input_vol)
     _, hemi, name_surf = get_filename(input_surf)
     name_surf = name_surf.replace(".", "")
 
@@ -105,38 +69,21 @@ def map2surface(input_surf, input_vol, write_output=False, path_output="",
     if not hemi == "lh" and not hemi == "rh":
         sys.exit("Could not identify hemi from filename!")
 
-    # copy input volume as orig.mgz to mimic freesurfer folder
-    if ext_vol != ".mgz":
-        mgh2nii(input_vol, path_mri, "mgz")
-        os.rename(os.path.join(path_mri, name_vol + ".mgz"),
-                  os.path.join(path_mri, "orig.mgz"))
-    else:
-        sh.copyfile(input_vol,
-                    os.path.join(path_mri, "orig.mgz"))
-
-    # copy input surface to mimic freesurfer folder
-    sh.copyfile(input_surf, os.path.join(path_surf, hemi + ".source"))
-
-    # filename of sampled data
-    file_sampled = os.path.join(path_surf, hemi + "." + "sampled.mgh")
-
-    # mri_vol2surf
-    sampler = SampleToSurface()
-    sampler.inputs.subject_id = sub
-    sampler.inputs.reg_header = True
-    sampler.inputs.hemi = hemi
-    sampler.inputs.source_file = input_vol
-    sampler.inputs.surface = "source"
-    sampler.inputs.sampling_method = "point"
-    sampler.inputs.sampling_range = 0
-    sampler.inputs.sampling_units = "mm"
-    sampler.inputs.interp_method = interp_method  # nearest or trilinear
-    sampler.inputs.out_type = "mgh"
-    sampler.inputs.out_file = file_sampled
-    sampler.run()
-
-    # load data
-    arr_sampled, affine_sampled, header_sampled = read_mgh(file_sampled)
+    # load volume and surface
+    vol = nb.load(input_vol)
+    vtx, _ = read_geometry(input_surf)
+
+    # sample data
+    vox2ras_tkr, _ = get_vox2ras_tkr(vol.affine, vol.shape)
+    arr_sampled = sample_vertices(vtx, vol.get_fdata(), vox2ras_tkr,
+                                  interp_method)
+
+    # surface header with geometry information of the input volume
+    n_frame = vol.shape[3] if vol.ndim > 3 else 1
+    header_sampled = nb.MGHImage(np.zeros((1, 1, 1), dtype=np.float32),
+                                 vol.affine).header
+    header_sampled["dims"][:] = [len(vtx), 1, 1, n_frame]
+    affine_sampled = header_sampled.get_affine()
 
     # map on separate mesh
     if input_ind:
@@ -152,10 +99,13 @@ def map2surface(input_surf, input_vol, write_output=False, path_output="",
         header_sampled["Mdc"] = np.eye(3)
 
         # sample array in target space
-        arr_sampled = np.zeros(len(vtx_target))
+        arr_sampled = np.zeros((len(vtx_target),) + arr_tmp.shape[1:])
         arr_sampled[ind_target] = arr_tmp
 
     if write_output:
+        if not os.path.exists(path_output):
+            os.makedirs(path_output)
+
         file_out = os.path.join(path_output,
                                 hemi + "." + name_vol + "_" + name_surf)
 
@@ -169,10 +119,4 @@ def map2surface(input_surf, input_vol, write_output=False, path_output="",
                   affine_sampled,
                   header_sampled)
 
-        # delete intermediate files
-    if cleanup:
-        sh.rmtree(path_sub, ignore_errors=True)
-        if not len(os.listdir(path_output)):
-            sh.rmtree(path_output)
-
     return arr_sampled, affine_sampled, header_sampled
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+# python standard library inputs
+import os
+import sys
+
+# external inputs
+import numpy as np
+import nibabel as nb
+from nibabel.freesurfer.io import read_geometry
+from scipy.sparse import vstack
+
+# local inputs
+from ..io.get_filename import get_filename
+from ..io.write_hdf5 import write_hdf5
+from ..mapping.get_sampling_matrix import get_sampling_matrix
+from ..utils.get_vox2ras_tkr import get_vox2ras_tkr
+
+
+def map_timeseries(file_surf, file_vol, write_output=False, path_output="",
+                   interp_method="nearest", chunk_size=50):
+    """Map time series.
+
+    This function samples a 4D time series onto a list of surface meshes
+    (e.g. cortical layers) with the same number of vertices. Interpolation
+    weights are computed once per mesh as sparse sampling matrix and applied
+    to all time points at once as sparse matrix product. Volumes are read in
+    chunks of time points from the memory-mapped nifti file. Surfaces are
+    expected in tkr space of the time series (see `map2surface`). The
+    resulting array vertex x time point x surface is optionally saved as hdf5
+    file.
+
+    Parameters
+    ----------
+    file_surf : list
+        List of surface meshes onto which data is sampled.
+    file_vol : str
+        4D time series from which data is sampled.
+    write_output : bool, optional
+        Write sampled data as hdf5 file. The default is False.
+    path_output : str, optional
+        Path where to save output. The default is "".
+    interp_method : str, optional
+        Interpolation method (nearest or trilinear). The default is "nearest".
+    chunk_size : int, optional
+        Number of time points which are read at once. The default is 50.
+
+    Raises
+    ------
+    ValueError
+        If surfaces have a different number of vertices.
+
+    Returns
+    -------
+    arr_sampled : ndarray
+        Image array of shape vertex x time point x surface.
+    affine_sampled : ndarray
+        Affine transformation matrix.
+    header_sampled : MGHHeader
+        Image header.
+
+    """
+
+    # get filenames
+    _, name_vol, _ = get_filename(file_vol)
+    _, hemi, _ = get_filename(file_surf[0])
+
+    # check filename
+    if not hemi == "lh" and not hemi == "rh":
+        sys.exit("Could not identify hemi from filename!")
+
+    # load time series without reading data
+    vol = nb.load(file_vol)
+    vox2ras_tkr, _ = get_vox2ras_tkr(vol.affine, vol.shape)
+    n_time = vol.shape[3] if vol.ndim > 3 else 1
+    n_layer = len(file_surf)
+
+    # stack sampling matrices of all surfaces
+    m = []
+    for i in range(n_layer):
+        vtx, _ = read_geometry(file_surf[i])
+        if i and len(vtx) != m[0].shape[0]:
+            raise ValueError("Surfaces have different number of vertices!")
+        m.append(get_sampling_matrix(vtx, vol.shape, vox2ras_tkr,
+                                     interp_method))
+
+    n_vtx = m[0].shape[0]
+    n_voxel = m[0].shape[1]
+    m = vstack(m, format="csr")
+
+    # sample time series in chunks
+    arr_sampled = np.zeros((n_vtx, n_time, n_layer), dtype=np.float32)
+    for t0 in range(0, n_time, chunk_size):
+        t1 = min(t0 + chunk_size, n_time)
+        if vol.ndim > 3:
+            data = np.asarray(vol.dataobj[:, :, :, t0:t1], dtype=np.float32)
+        else:
+            data = np.asarray(vol.dataobj, dtype=np.float32)
+
+        data = m.dot(data.reshape((n_voxel, t1 - t0), order="F"))
+        arr_sampled[:, t0:t1, :] = np.moveaxis(
+            data.reshape((n_layer, n_vtx, t1 - t0)), 0, 2)
+
+    # surface header with geometry information of the time series
+    header_sampled = nb.MGHImage(np.zeros((1, 1, 1), dtype=np.float32),
+                                 vol.affine).header
+    header_sampled["dims"][:] = [n_vtx, 1, 1, n_time]
+    affine_sampled = header_sampled.get_affine()
+
+    if write_output:
+        file_out = os.path.join(path_output,
+                                hemi + "." + name_vol + "_nlayer" +
+                                str(n_layer) + ".hdf5")
+        write_hdf5(file_out, arr_sampled, affine_sampled, header_sampled)
+
+    return arr_sampled, affine_sampled, header_sampled
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+# local inputs
+from ..mapping.get_sampling_matrix import get_sampling_matrix
+
+
+def sample_vertices(vtx, arr, vox2ras_tkr, interp_method="nearest"):
+    """Sample vertices.
+
+    This function samples volume data at vertex positions in-process. It
+    mimics the point sampling of freesurfer's `mri_vol2surf` with registration
+    from header (--regheader) and zero projection distance. Vertex coordinates
+    are expected in freesurfer tkr space of the volume. Nearest neighbor
+    sampling uses the rounded voxel index. Trilinear sampling interpolates
+    between the eight surrounding voxels where neighbor indices are clamped at
+    the volume border. Vertices whose rounded voxel index lies outside of the
+    volume get the value 0. If the volume array has more than three dimensions,
+    all frames (or components) are sampled at once. See `get_sampling_matrix`
+    for details.
+
+    Parameters
+    ----------
+    vtx : ndarray
+        Array of vertices (in tkr space).
+    arr : ndarray
+        Volume array of shape (x, y, z) or (x, y, z, n).
+    vox2ras_tkr : ndarray
+        Transformation matrix from voxel to tkr ras space.
+    interp_method : str, optional
+        Interpolation method (nearest or trilinear). The default is "nearest".
+
+    Raises
+    ------
+    ValueError
+        If `interp_method` is invalid.
+
+    Returns
+    -------
+    arr_sampled : ndarray
+        Sampled data of shape (vertices,) or (vertices, n).
+
+    """
+
+    # sampling matrix
+    m = get_sampling_matrix(vtx, arr.shape[:3], vox2ras_tkr, interp_method)
+
+    # flatten spatial dimensions in the same (fortran) order
+    arr_sampled = m.dot(arr.reshape((m.shape[1], -1), order="F"))
+
+    return arr_sampled.reshape((len(vtx),) + arr.shape[3:])
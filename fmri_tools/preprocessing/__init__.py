@@ -2,8 +2,15 @@
 """Python package for for analysis of high-resolution fMRI data."""
 
 # local inputs
-from .get_nuisance_mask import get_nuisance_mask
-from .get_nuisance_regressor import get_nuisance_regressor
-from .gnl_correction import gnl_correction
-from .slice_timing_correction import slice_timing_correction
-from .deweight_mask import deweight_mask
+from ..lazy_import import lazy_import
+
+_attrs = {
+    "get_nuisance_mask": ["get_nuisance_mask"],
+    "get_nuisance_regressor": ["get_nuisance_regressor"],
+    "gnl_correction": ["gnl_correction"],
+    "slice_timing_correction": ["slice_timing_correction"],
+    "deweight_mask": ["deweight_mask"],
+    "check_preprocessing": ["check_preprocessing"],
+}
+
+__getattr__, __dir__, __all__ = lazy_import(__name__, attrs=_attrs)
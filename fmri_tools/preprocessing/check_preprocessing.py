@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+
+# python standard library inputs
+import os
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+# external inputs
+import numpy as np
+import nibabel as nb
+from scipy.stats import beta, shapiro
+
+# local inputs
+from ..io.get_filename import get_filename
+
+
+def _pearson_p(r, n):
+    """Helper function to compute two-sided p-values of pearson correlation
+    coefficients from n samples (same as in `scipy.stats.pearsonr`)."""
+
+    dist = beta(n / 2 - 1, n / 2 - 1, loc=-1, scale=2)
+
+    return 2 * dist.cdf(-np.abs(r))
+
+
+def _get_correlation(sum_xy, sum_x, sum_xx, sum_y, sum_yy, n):
+    """Helper function to compute pearson correlation coefficients from sums
+    of samples, squared samples and products."""
+
+    cov = sum_xy - sum_x * sum_y / n
+    var_x = sum_xx - sum_x ** 2 / n
+    var_y = sum_yy - sum_y ** 2 / n
+
+    return np.clip(cov / np.sqrt(var_x * var_y), -1, 1)
+
+
+def _check_run(file_in, file_next, file_ref, file_mask, ind_shapiro,
+               chunk_size):
+    """Helper function which computes correlation statistics of one run in a
+    single pass over slabs. Volumes are correlated with the reference volume
+    and with their successor (the last volume with the first volume of the
+    next run). Shapiro-Wilk tests are computed from the voxel subset given by
+    `ind_shapiro` (all voxels if None)."""
+
+    data = nb.load(file_in)
+    ref = nb.load(file_ref)
+    mask = nb.load(file_mask) if file_mask else None
+    data_next = nb.load(file_next) if file_next else None
+    nx, ny, nz, nt = data.shape
+
+    # sums of samples, squared samples and products
+    n = 0
+    sum_ref = 0
+    sum_ref2 = 0
+    sum_x = np.zeros(nt + 1)
+    sum_xx = np.zeros(nt + 1)
+    sum_x_ref = np.zeros(nt)
+    sum_x_lag = np.zeros(nt)
+    data_shapiro = []
+    for z0 in range(0, nz, chunk_size):
+        z1 = min(z0 + chunk_size, nz)
+        arr = np.asarray(data.dataobj[:, :, z0:z1, :], dtype=np.float64)
+        arr = arr.reshape((-1, nt), order="F")
+        arr_ref = np.asarray(ref.dataobj[:, :, z0:z1], dtype=np.float64)
+        arr_ref = arr_ref.ravel(order="F")
+
+        # first volume of next run
+        if data_next is not None:
+            arr_next = np.asarray(data_next.dataobj[:, :, z0:z1, 0],
+                                  dtype=np.float64).ravel(order="F")
+            arr = np.column_stack((arr, arr_next))
+
+        # mask voxels
+        if mask is not None:
+            ind = np.asarray(mask.dataobj[:, :, z0:z1]).ravel(order="F") == 1
+            arr = arr[ind]
+            arr_ref = arr_ref[ind]
+
+        # shapiro-wilk subset
+        if ind_shapiro is None:
+            data_shapiro.append(arr[:, :nt].astype(np.float32))
+        else:
+            i0, i1 = np.searchsorted(ind_shapiro, [n, n + len(arr)])
+            data_shapiro.append(arr[ind_shapiro[i0:i1] - n, :nt])
+
+        n += len(arr)
+        sum_ref += np.sum(arr_ref)
+        sum_ref2 += np.sum(arr_ref ** 2)
+        sum_x[:arr.shape[1]] += np.sum(arr, axis=0)
+        sum_xx[:arr.shape[1]] += np.sum(arr ** 2, axis=0)
+        sum_x_ref += np.dot(arr_ref, arr[:, :nt])
+        sum_x_lag[:arr.shape[1] - 1] += np.sum(arr[:, :-1] * arr[:, 1:],
+                                               axis=0)
+
+    # pearson correlation to reference
+    r_pearson_0 = _get_correlation(sum_x_ref, sum_x[:nt], sum_xx[:nt], sum_ref,
+                                   sum_ref2, n)
+
+    # pearson correlation to successor
+    n_lag = nt if data_next is not None else nt - 1
+    r_pearson = _get_correlation(sum_x_lag[:n_lag], sum_x[:n_lag],
+                                 sum_xx[:n_lag], sum_x[1:n_lag + 1],
+                                 sum_xx[1:n_lag + 1], n)
+
+    # shapiro-wilk test
+    data_shapiro = np.concatenate(data_shapiro)
+    res_shapiro = np.array([shapiro(data_shapiro[:, i]) for i in range(nt)])
+
+    return {"r_pearson_0": r_pearson_0,
+            "p_pearson_0": _pearson_p(r_pearson_0, n),
+            "r_pearson": r_pearson,
+            "p_pearson": _pearson_p(r_pearson, n),
+            "r_shapiro": res_shapiro[:, 0],
+            "p_shapiro": res_shapiro[:, 1],
+            }
+
+
+def check_preprocessing(file_in, file_ref, path_output, file_mask=None,
+                        r_threshold=0.95, n_shapiro=5000, n_jobs=1,
+                        chunk_size=8):
+    """Check preprocessing.
+
+    This function computes the spatial correlation of all volumes in a set of
+    functional time series to a reference volume (e.g. the session mean) to
+    identify corrupted volumes and runs (cf. Marquardt et al. 2017; Bergmann et
+    al. 2019). Additionally, the correlation of each volume to its successor
+    and the Shapiro-Wilk test for normality of each volume are computed. Each
+    run is read in a single pass over slabs (along the third dimension) of the
+    memory-mapped image proxy and pearson correlations of all volumes are
+    computed at once from accumulated sums. Runs are processed in parallel. A
+    regressor of no interest which denotes volumes with a correlation to the
+    reference below threshold is written to <run folder>/outlier and a summary
+    with the outlier percentage of each run is written to the output folder.
+
+    Parameters
+    ----------
+    file_in : list
+        List of 4d nifti files.
+    file_ref : str
+        Reference volume.
+    path_output : str
+        Path where summary and correlation values are written.
+    file_mask : str, optional
+        Binary mask in reference space. If not set, all voxels are used. The
+        default is None.
+    r_threshold : float, optional
+        Correlation threshold for outlier volumes. The default is 0.95.
+    n_shapiro : int, optional
+        Number of randomly selected voxels used for the Shapiro-Wilk test. All
+        voxels are used if None. The default is 5000.
+    n_jobs : int, optional
+        Number of parallel processes. The default is 1.
+    chunk_size : int, optional
+        Number of slices which are read at once. The default is 8.
+
+    Returns
+    -------
+    res : dict
+        Concatenated correlation coefficients and p-values of all runs
+        (r_pearson_0, p_pearson_0, r_pearson, p_pearson, r_shapiro, p_shapiro).
+
+    """
+
+    # make output folder
+    if not os.path.exists(path_output):
+        os.makedirs(path_output)
+
+    # get filename from first input entry
+    _, name_file, _ = get_filename(file_in[0])
+
+    # voxel subset for shapiro-wilk test
+    if file_mask:
+        n_voxel = np.sum(np.asarray(nb.load(file_mask).dataobj) == 1)
+    else:
+        n_voxel = np.prod(nb.load(file_ref).shape[:3])
+
+    ind_shapiro = None
+    if n_shapiro is not None and n_shapiro < n_voxel:
+        rng = np.random.default_rng(0)
+        ind_shapiro = np.sort(rng.choice(n_voxel, n_shapiro, replace=False))
+
+    # compute statistics of all runs
+    file_next = list(file_in[1:]) + [None]
+    args = (file_in, file_next, [file_ref] * len(file_in),
+            [file_mask] * len(file_in), [ind_shapiro] * len(file_in),
+            [chunk_size] * len(file_in))
+    if n_jobs > 1:
+        # forked workers do not re-import the calling script
+        ctx = None
+        if "fork" in mp.get_all_start_methods():
+            ctx = mp.get_context("fork")
+        with ProcessPoolExecutor(n_jobs, mp_context=ctx) as executor:
+            res_run = list(executor.map(_check_run, *args))
+    else:
+        res_run = list(map(_check_run, *args))
+
+    # write regressor of no interest and summary
+    file = open(os.path.join(path_output, "correlation_" + name_file + ".txt"),
+                "w")
+    file.write("Percentage of volumes below threshold\n")
+    file.write("Correlation threshold: " + str(r_threshold) + "\n\n")
+
+    for i, res in enumerate(res_run):
+        path_logfile = os.path.join(os.path.dirname(file_in[i]), "outlier")
+        if not os.path.exists(path_logfile):
+            os.makedirs(path_logfile)
+
+        outlier = (res["r_pearson_0"] < r_threshold).astype(int)
+        np.savetxt(os.path.join(path_logfile,
+                                "correlation_regressor_" + name_file + ".txt"),
+                   outlier, fmt="%d")
+
+        # percentage below threshold
+        nt = len(outlier)
+        res_pearson_0 = np.sum(outlier) / nt * 100
+        res_shapiro = np.sum(res["r_shapiro"] < r_threshold) / nt * 100
+
+        # average within-run correlation
+        pearson_run = np.sum(res["r_pearson_0"]) / nt
+
+        file.write("Run: " + str(i + 1) + "\n")
+        file.write("----------\n")
+        file.write("Pearson (average within run): " + str(pearson_run) + "\n")
+        file.write(
+            "Outlier percentage (pearson to ref): " + str(res_pearson_0) + "\n")
+        file.write(
+            "Outlier percentage (shapiro): " + str(res_shapiro) + "\n\n\n")
+
+    file.close()
+
+    # save variables
+    res = {k: np.concatenate([r[k] for r in res_run]) for k in res_run[0]}
+    np.savez(os.path.join(path_output, "correlation_" + name_file), **res)
+
+    return res
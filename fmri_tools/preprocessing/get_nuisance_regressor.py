@@ -6,14 +6,37 @@ import os
 # external inputs
 import numpy as np
 import nibabel as nb
-import matplotlib.pyplot as plt
 
 
-def get_nuisance_regressor(file_in, wm_mask, csf_mask, path_output):
+def _plot_regressor(regressor, title, file_out):
+    """Helper function to plot a regressor. Matplotlib is only imported if
+    plots are requested."""
+
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(12, 6))
+    plt.plot(regressor)
+    plt.title(title)
+    plt.ylabel('Intensity in a.u.')
+    plt.xlabel('Volume')
+    plt.xticks(np.arange(0, len(regressor)))
+    plt.savefig(file_out)
+    plt.close(fig)
+
+
+def get_nuisance_regressor(file_in, wm_mask, csf_mask, path_output,
+                           n_components=0, plot=True, chunk_size=8):
     """Get nuisance regressor.
-    
-    This function creates nuisance regressors from a functional time series 
-    using wm and csf masks.    
+
+    This function creates nuisance regressors from a functional time series
+    using wm and csf masks. Flattened voxel indices of both masks are computed
+    once and the time series of all mask voxels are gathered slab-wise (along
+    the third dimension) from the memory-mapped image proxy. The mean signal
+    in both masks is written as tab-separated text file. Optionally, the first
+    principal components of the time series in the union of both masks are
+    computed in the same pass (aCompCor). For this, the time series are
+    centered and variance normalized before the components are computed from
+    the temporal covariance matrix.
 
     Parameters
     ----------
@@ -25,48 +48,80 @@ def get_nuisance_regressor(file_in, wm_mask, csf_mask, path_output):
         CSF mask registered to the time series.
     path_output : str
         Path where output is saved.
+    n_components : int, optional
+        Number of aCompCor components (computed if > 0). The default is 0.
+    plot : bool, optional
+        Save plots of the mean signal regressors. The default is True.
+    chunk_size : int, optional
+        Number of slices which are read at once. The default is 8.
 
     Returns
     -------
-    None.
-    
+    nuisance_regressor : ndarray
+        Mean wm and csf signal of shape (time point, 2).
+    compcor_regressor : ndarray
+        aCompCor components of shape (time point, n_components). None if no
+        components are computed.
+
     """
 
     # make output folder
     if not os.path.exists(path_output):
         os.mkdir(path_output)
 
-    # get mean signal in mask
-    wm_array = nb.load(wm_mask).get_fdata()
-    csf_array = nb.load(csf_mask).get_fdata()
+    # flattened mask indices (fortran order)
+    func = nb.load(file_in)
+    nx, ny, nz, nt = func.shape
+    wm = np.asarray(nb.load(wm_mask).dataobj).ravel(order="F") == 1
+    csf = np.asarray(nb.load(csf_mask).dataobj).ravel(order="F") == 1
+    ind = np.flatnonzero(wm | csf)
+    is_wm = wm[ind]
+    is_csf = csf[ind]
 
-    # make regressor
-    func_array = nb.load(file_in).get_fdata()
-    nt = np.shape(func_array)[3]
+    # gather mask voxels slab-wise
+    roi_sum = np.zeros((nt, 2))
+    roi_data = None
+    if n_components > 0:
+        roi_data = np.zeros((len(ind), nt), dtype=np.float32)
+    for z0 in range(0, nz, chunk_size):
+        z1 = min(z0 + chunk_size, nz)
+        i0, i1 = np.searchsorted(ind, [nx * ny * z0, nx * ny * z1])
+        if i0 == i1:
+            continue
+
+        data = np.asarray(func.dataobj[:, :, z0:z1, :], dtype=np.float64)
+        data = data.reshape((-1, nt), order="F")[ind[i0:i1] - nx * ny * z0]
+        roi_sum[:, 0] += np.sum(data[is_wm[i0:i1]], axis=0)
+        roi_sum[:, 1] += np.sum(data[is_csf[i0:i1]], axis=0)
+        if roi_data is not None:
+            roi_data[i0:i1] = data
 
     # get ROI mean signal
-    nuisance_regressor = np.zeros((nt, 2))
-    for i in range(nt):
-        nuisance_regressor[i, 0] = np.mean(func_array[:, :, :, i][wm_array == 1])
-        nuisance_regressor[i, 1] = np.mean(func_array[:, :, :, i][csf_array == 1])
+    nuisance_regressor = roi_sum / [np.sum(wm), np.sum(csf)]
 
     # save regressor
     np.savetxt(os.path.join(path_output, "nuisance_regressor.txt"),
                nuisance_regressor, fmt='%.7e', delimiter='\t')
 
+    # acompcor components
+    compcor_regressor = None
+    if roi_data is not None:
+        roi_data -= np.mean(roi_data, axis=1, keepdims=True)
+        roi_std = np.std(roi_data, axis=1, keepdims=True)
+        roi_data = np.divide(roi_data, roi_std, out=roi_data,
+                             where=roi_std != 0)
+        cov = np.dot(roi_data.T, roi_data).astype(np.float64)
+        eig_val, eig_vec = np.linalg.eigh(cov)
+        compcor_regressor = eig_vec[:, np.argsort(eig_val)[::-1][:n_components]]
+
+        np.savetxt(os.path.join(path_output, "compcor_regressor.txt"),
+                   compcor_regressor, fmt='%.7e', delimiter='\t')
+
     # plot regressor
-    plt.figure(1, figsize=(12, 6))
-    plt.plot(nuisance_regressor[:, 0])
-    plt.title('White matter variation')
-    plt.ylabel('Intensity in a.u.')
-    plt.xlabel('Volume')
-    plt.xticks(np.arange(0, len(nuisance_regressor[:, 0])))
-    plt.savefig(os.path.join(path_output, 'wm_regressor.png'))
+    if plot:
+        _plot_regressor(nuisance_regressor[:, 0], 'White matter variation',
+                        os.path.join(path_output, 'wm_regressor.png'))
+        _plot_regressor(nuisance_regressor[:, 1], 'CSF variation',
+                        os.path.join(path_output, 'csf_regressor.png'))
 
-    plt.figure(2, figsize=(12, 6))
-    plt.plot(nuisance_regressor[:, 1])
-    plt.title('CSF variation')
-    plt.ylabel('Intensity in a.u.')
-    plt.xlabel('Volume')
-    plt.xticks(np.arange(0, len(nuisance_regressor[:, 1])))
-    plt.savefig(os.path.join(path_output, 'csf_regressor.png'))
+    return nuisance_regressor, compcor_regressor
@@ -7,25 +7,28 @@ import sys
 # external inputs
 import numpy as np
 import nibabel as nb
-from scipy.interpolate import InterpolatedUnivariateSpline as Interp
 
 # local inputs
 from ..io.get_filename import get_filename
+from ..utils.get_spline_matrix import get_spline_matrix
 
 
 def slice_timing_correction(file_in, TR_old, TR_new, order, prefix="a"):
     """Slice timing correction.
 
-    This function performs slice timing correction of a nifti time series. For 
-    interleaved slice ordering, interleaved ascending is assumed. The correction 
-    is done by temporal interpolation of single voxel time series using cubic 
-    interpolation. To omit extrapolation errors at the edges, the first and last 
-    volumes of the time series are appended at the beginning and at the end, 
-    respectively. These time points are removed again after the interpolation 
-    step. The interpolated time series is sampled onto a regular grid with a 
-    defined new TR. Therefore, the reference slice is always the first slice 
-    acquired at t = 0. Only for writing the new TR in the header of the output 
-    time series, AFNI has to be included in the search path.    
+    This function performs slice timing correction of a nifti time series. For
+    interleaved slice ordering, interleaved ascending is assumed. The
+    correction is done by temporal interpolation of single voxel time series
+    using cubic interpolation. All voxels of one slice share the same time grid
+    and are interpolated at once by one matrix product. Slices are read one at
+    a time from the memory-mapped time series. To omit extrapolation errors at
+    the edges, the first and last volumes of the time series are appended at
+    the beginning and at the end, respectively. These time points are removed
+    again after the interpolation step. The interpolated time series is sampled
+    onto a regular grid with a defined new TR. Therefore, the reference slice
+    is always the first slice acquired at t = 0. Only for writing the new TR in
+    the header of the output time series, AFNI has to be included in the search
+    path.
 
     Parameters
     ----------
@@ -56,12 +59,6 @@ def slice_timing_correction(file_in, TR_old, TR_new, order, prefix="a"):
     nz = data.header["dim"][3]
     nt = data.header["dim"][4]
 
-    # load array with appended volumes
-    data_array = np.zeros((nx, ny, nz, nt + 2))
-    data_array[:, :, :, 0] = data.get_fdata()[:, :, :, 0]
-    data_array[:, :, :, -1] = data.get_fdata()[:, :, :, -1]
-    data_array[:, :, :, 1:-1] = data.get_fdata()
-
     # get slice order
     if order == "ascending":
         slice_order = np.arange(0, nz)
@@ -83,28 +80,33 @@ def slice_timing_correction(file_in, TR_old, TR_new, order, prefix="a"):
         int) * TR_new  # number of appended TRs in output array
     t_new = np.arange(-TR_append, TT + TR_append, TR_new)  # grid points of output array
 
+    # output volumes without appended volumes
+    t_new = t_new[(t_new >= 0) & (t_new < TT)]
+
     # temporal interpolation
-    data_array_corrected = np.zeros((nx, ny, nz, len(t_new)))
+    data_array_corrected = np.zeros((nx, ny, nz, len(t_new)), dtype=np.float32)
+    data_min = np.inf
+    data_max = -np.inf
     for z in range(nz):
         print("Slice timing correction for slice: " + str(z + 1) + "/" + str(nz))
-        for x in range(nx):
-            for y in range(ny):
-                t = np.arange(z * TA - TR_old, z * TA + (nt + 1) * TR_old, TR_old)
-                cubic_interper = Interp(t, data_array[x, y, slice_order[z], :], k=3)
-                data_array_corrected[x, y, slice_order[z], :] = cubic_interper(t_new)
-
-    # delete appended volumes
-    vols_keep1 = t_new >= 0
-    vols_keep2 = t_new < TT
-    vols_keep = vols_keep1 * vols_keep2
-    data_array_corrected = data_array_corrected[:, :, :, vols_keep]
+
+        # load slice with appended volumes
+        arr = np.asarray(data.dataobj[:, :, slice_order[z], :])
+        arr = np.concatenate((arr[:, :, :1], arr, arr[:, :, -1:]), axis=2)
+        data_min = np.minimum(data_min, np.nanmin(arr))
+        data_max = np.maximum(data_max, np.nanmax(arr))
+
+        # interpolate all voxels of the slice
+        t = np.arange(z * TA - TR_old, z * TA + (nt + 1) * TR_old, TR_old)
+        spline_matrix = get_spline_matrix(t, t_new)
+        arr = np.dot(arr.reshape((nx * ny, nt + 2)), spline_matrix.T)
+        data_array_corrected[:, :, slice_order[z], :] = arr.reshape(
+            (nx, ny, len(t_new)))
 
     # clean corrected array
-    data_min = np.min(data.get_fdata())
-    data_max = np.max(data.get_fdata())
     data_array_corrected[np.isnan(data_array_corrected)] = 0
-    data_array_corrected[data_array_corrected < data_min] = data_min
-    data_array_corrected[data_array_corrected > data_max] = data_max
+    np.clip(data_array_corrected, data_min, data_max,
+            out=data_array_corrected)
 
     # update data header
     data.header["dim"][4] = np.shape(data_array_corrected)[3]
@@ -2,8 +2,15 @@
 """Python package for for analysis of high-resolution fMRI data."""
 
 # local inputs
-from .get_alff import get_alff
-from .estimate_pv import estimate_pv
-from .average_time_series import average_time_series
-from .get_onset_vols import get_onset_vols
-from .demean_time_series import demean_time_series
+from ..lazy_import import lazy_import
+
+_attrs = {
+    "get_alff": ["get_alff"],
+    "estimate_pv": ["estimate_pv"],
+    "average_time_series": ["average_time_series"],
+    "get_onset_vols": ["get_onset_vols"],
+    "demean_time_series": ["demean_time_series"],
+    "get_temporal_statistics": ["get_temporal_statistics"],
+}
+
+__getattr__, __dir__, __all__ = lazy_import(__name__, attrs=_attrs)
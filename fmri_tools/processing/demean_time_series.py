@@ -9,11 +9,13 @@ import nibabel as nb
 
 
 def demean_time_series(img_input, path_output="", name_output="",
-                       write_output=False):
+                       write_output=False, chunk_size=8):
     """Demean time series.
 
     This function demeans each voxel time series. Input is either a 4d nifti or 
-    compressed nifti file.    
+    compressed nifti file. The time series is read slab-wise (along the third
+    dimension) from the memory-mapped image proxy and the output is stored in
+    single precision.
 
     Parameters
     ----------
@@ -25,6 +27,8 @@ def demean_time_series(img_input, path_output="", name_output="",
         Basename of output. The default is "".
     write_output : bool, optional
         Write nifti volume. The default is False.
+    chunk_size : int, optional
+        Number of slices which are read at once. The default is 8.
 
     Returns
     -------
@@ -34,24 +38,25 @@ def demean_time_series(img_input, path_output="", name_output="",
     """
 
     # load data
-    if isinstance(img_input, nb.Nifti1Image):
-        data_array = img_input.get_fdata()
-    elif isinstance(img_input, str):
+    if isinstance(img_input, str):
         img_input = nb.load(img_input)
-        data_array = img_input.get_fdata()
-    else:
+    elif not isinstance(img_input, nb.Nifti1Image):
         print("Input must be either string or instance of nibabel class")
         return
 
-    # get mean of each voxel time series
-    data_mean = np.mean(data_array, axis=3)
-
-    # demean time series
-    for i in range(np.shape(data_array)[3]):
-        data_array[:, :, :, i] = (data_array[:, :, :, i] - data_mean) / data_mean * 100
+    # demean time series slab-wise
+    dims = img_input.shape
+    data_array = np.zeros(dims, dtype=np.float32)
+    for z0 in range(0, dims[2], chunk_size):
+        z1 = min(z0 + chunk_size, dims[2])
+        data = np.asarray(img_input.dataobj[:, :, z0:z1, :], dtype=np.float64)
+        data_mean = np.mean(data, axis=3, keepdims=True)
+        data_array[:, :, z0:z1, :] = (data - data_mean) / data_mean * 100
 
     # write output    
-    output = nb.Nifti1Image(data_array, img_input.affine, img_input.header)
+    header = img_input.header.copy()
+    header.set_data_dtype(np.float32)
+    output = nb.Nifti1Image(data_array, img_input.affine, header)
     if write_output:
         nb.save(output,
                 os.path.join(path_output, "demean_" + name_output + ".nii"))
@@ -8,6 +8,63 @@ import numpy as np
 import nibabel as nb
 
 
+def _get_overlap(n_up, n_down):
+    """Helper function to compute the 1D overlap matrices between target voxels 
+    (rows) and upsampled voxels (columns) along one axis. The first matrix 
+    contains the moving-average weights with fractional weights at both ends of 
+    each target voxel and the second matrix only indicates which upsampled 
+    voxels fall into each target voxel."""
+
+    # sampling steps
+    magn_factor = n_up / n_down
+    p = np.arange(0, n_down * magn_factor, magn_factor)
+
+    weight = np.zeros((len(p), n_up))
+    overlap = np.zeros((len(p), n_up))
+    for i in range(len(p)):
+
+        # weightings (start_weight)
+        if np.mod(p[i], 1) != 0:
+            start_weight = 1 - np.mod(p[i], 1)
+        else:
+            start_weight = 1
+
+        # weightings (end_weight)
+        if i == len(p) - 1:
+            end_weight = 1
+        else:
+            if np.mod(p[i + 1], 1) != 0:
+                end_weight = np.mod(p[i + 1], 1)
+            else:
+                end_weight = 1
+
+        # p-coordinates
+        if i == len(p) - 1:
+            x = np.arange(np.round(p[-1] - 0.5), n_up, 1).astype(int)
+        else:
+            x = np.arange(np.round(p[i] - 0.5),
+                          np.round(p[i + 1] - 0.5), 1).astype(int)
+
+        # apply weightings
+        w = np.ones(len(x))
+        w[0] *= start_weight
+        w[-1] *= end_weight
+
+        weight[i, x] = w
+        overlap[i, x] = 1
+
+    return weight, overlap
+
+
+def _contract(arr, mat):
+    """Helper function to apply one matrix along each axis of a 3D array."""
+
+    for i in range(3):
+        arr = np.moveaxis(np.tensordot(mat[i], arr, axes=(1, i)), 0, i)
+
+    return arr
+
+
 def estimate_pv(input_target, input_border, path_output, name_output):
     """Estimate PV.
 
@@ -15,7 +72,10 @@ def estimate_pv(input_target, input_border, path_output, name_output):
     of a target image from an upsampled binary image depicting the GM/WM or 
     GM/CSF border. Partial voluming is estimated by downsampling the binary 
     image using a moving-average like algorithm and calculating the ratio of 
-    both binary elements within each target voxel.    
+    both binary elements within each target voxel. The moving-average weights 
+    are separable and are computed as 1D overlap matrices for each axis. The 
+    partial volume is then given by tensor contractions of the border image 
+    with these matrices. NaNs in the border image are ignored.
 
     Parameters
     ----------
@@ -42,112 +102,20 @@ def estimate_pv(input_target, input_border, path_output, name_output):
     # downsampling parameters
     matrix_up = border.header["dim"][1:4]
     matrix_down = target.header["dim"][1:4]
-    magn_factor = matrix_up / matrix_down
-
-    # sampling steps
-    p = np.arange(0, matrix_down[0] * magn_factor[0], magn_factor[0])
-    q = np.arange(0, matrix_down[1] * magn_factor[1], magn_factor[1])
-    r = np.arange(0, matrix_down[2] * magn_factor[2], magn_factor[2])
-
-    # initialise matrices
-    M = np.zeros(target.header["dim"][1:4])
-    start_weight = np.zeros(3)
-    end_weight = np.zeros(3)
-
-    # downsampling using a moving-average like algorithm
-    for i in range(len(p)):
-
-        # weightings (start_weight)
-        if np.mod(p[i], 1) != 0:
-            start_weight[0] = 1 - np.mod(p[i], 1)
-        else:
-            start_weight[0] = 1
 
-        # weightings (end_weight)
-        if i == len(p) - 1:
-            end_weight[0] = 1
-        else:
-            if np.mod(p[i + 1], 1) != 0:
-                end_weight[0] = np.mod(p[i + 1], 1)
-            else:
-                end_weight[0] = 1
-
-        for j in range(len(q)):
-
-            # weightings (start_weight)
-            if np.mod(q[j], 1) != 0:
-                start_weight[1] = 1 - np.mod(q[j], 1)
-            else:
-                start_weight[1] = 1
-
-            # weightings (end_weight)
-            if j == len(q) - 1:
-                end_weight[1] = 1
-            else:
-                if np.mod(q[j + 1], 1) != 0:
-                    end_weight[1] = np.mod(q[j + 1], 1)
-                else:
-                    end_weight[1] = 1
-
-            for k in range(len(r)):
-
-                # weightings (start_weight)
-                if np.mod(r[k], 1) != 0:
-                    start_weight[2] = 1 - np.mod(r[k], 1)
-                else:
-                    start_weight[2] = 1
-
-                # weightings (end_weight)
-                if k == len(r) - 1:
-                    end_weight[2] = 1
-                else:
-                    if np.mod(r[k + 1], 1) != 0:
-                        end_weight[2] = np.mod(r[k + 1], 1)
-                    else:
-                        end_weight[2] = 1
-
-                # p-coordinates
-                if i == len(p) - 1:
-                    x = np.arange(np.round(p[-1] - 0.5), matrix_up[0],
-                                  1).astype(int)
-                else:
-                    x = np.arange(np.round(p[i] - 0.5),
-                                  np.round(p[i + 1] - 0.5), 1).astype(int)
-
-                # q-coordinates
-                if j == len(q) - 1:
-                    y = np.arange(np.round(q[-1] - 0.5), matrix_up[1],
-                                  1).astype(int)
-                else:
-                    y = np.arange(np.round(q[j] - 0.5),
-                                  np.round(q[j + 1] - 0.5), 1).astype(int)
-
-                # r-coordinates
-                if k == len(r) - 1:
-                    z = np.arange(np.round(r[-1] - 0.5), matrix_up[2],
-                                  1).astype(int)
-                else:
-                    z = np.arange(np.round(r[k] - 0.5),
-                                  np.round(r[k + 1] - 0.5), 1).astype(int)
-
-                # define submatrix
-                X = border_array[x, :, :]
-                X = X[:, y, :]
-                X = X[:, :, z]
-
-                # apply weightings
-                X[0, :, :] = start_weight[0] * X[0, :, :]
-                X[:, 0, :] = start_weight[1] * X[:, 0, :]
-                X[:, :, 0] = start_weight[2] * X[:, :, 0]
-                X[-1, :, :] = end_weight[0] * X[-1, :, :]
-                X[:, -1, :] = end_weight[1] * X[:, -1, :]
-                X[:, :, -1] = end_weight[2] * X[:, :, -1]
-
-                X = np.reshape(X, np.size(X))
-                X = X[~np.isnan(X)]
-
-                # voxel value in target space
-                M[i, j, k] = np.sum(X) / len(X)
+    # overlap matrices for each axis
+    weight = []
+    overlap = []
+    for i in range(3):
+        w, o = _get_overlap(matrix_up[i], matrix_down[i])
+        weight.append(w)
+        overlap.append(o)
+
+    # weighted sum and number of (non-NaN) voxels within each target voxel
+    mask_array = ~np.isnan(border_array)
+    border_array[~mask_array] = 0
+    M = _contract(border_array, weight)
+    M /= _contract(mask_array.astype(np.float64), overlap)
 
     # save data
     output = nb.Nifti1Image(M, target.affine, target.header)
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+# external inputs
+import numpy as np
+import nibabel as nb
+
+
+def _divide(a, b):
+    """Helper function for element-wise division which returns zero where the
+    denominator is zero."""
+
+    return np.divide(a, b, out=np.zeros_like(a), where=b != 0)
+
+
+def get_temporal_statistics(img_input, onsets=None, baseline=None,
+                            chunk_size=8):
+    """Get temporal statistics.
+
+    This function computes voxel-wise temporal statistics of a 4D time series
+    in one pass. The time series is read slab-wise (along the third dimension)
+    from the memory-mapped image proxy and all statistics are computed from the
+    same slab before the next one is read. Mean, standard deviation and tSNR
+    are computed across all time points. If condition onsets are given, mean
+    and standard deviation are additionally computed for the volumes of each
+    condition. If a baseline condition is given, the percent signal change of
+    each condition relative to the baseline mean is computed. Divisions by zero
+    are set to zero. All outputs are returned as float32 arrays.
+
+    Parameters
+    ----------
+    img_input : niimg
+        4d nifti volume or string to filename.
+    onsets : dict, optional
+        Dictionary with condition names as keys and arrays of volume indices
+        (e.g. from `get_onset_vols`) as values. The default is None.
+    baseline : str, optional
+        Name of the baseline condition in `onsets` used for percent signal
+        change. The default is None.
+    chunk_size : int, optional
+        Number of slices which are read at once. The default is 8.
+
+    Raises
+    ------
+    ValueError
+        If `baseline` is not a condition in `onsets`.
+
+    Returns
+    -------
+    res : dict
+        Dictionary with the arrays mean, std and tsnr. For each condition <c>,
+        the arrays mean_<c> and std_<c> are added. If a baseline condition is
+        set, the arrays psc_<c> are added for all other conditions.
+
+    """
+
+    # load time series without reading data
+    if isinstance(img_input, str):
+        img_input = nb.load(img_input)
+
+    onsets = onsets if onsets is not None else {}
+    if baseline is not None and baseline not in onsets:
+        raise ValueError("Baseline condition not found in onsets!")
+
+    # output arrays
+    dims = img_input.shape[:3]
+    names = ["mean", "std", "tsnr"]
+    for c in onsets:
+        names += ["mean_" + c, "std_" + c]
+        if baseline is not None and c != baseline:
+            names.append("psc_" + c)
+    res = {n: np.zeros(dims, dtype=np.float32) for n in names}
+
+    for z0 in range(0, dims[2], chunk_size):
+        z1 = min(z0 + chunk_size, dims[2])
+        data = np.asarray(img_input.dataobj[:, :, z0:z1, :], dtype=np.float64)
+
+        # statistics across all time points
+        data_mean = np.mean(data, axis=3)
+        data_std = np.std(data, axis=3)
+        res["mean"][:, :, z0:z1] = data_mean
+        res["std"][:, :, z0:z1] = data_std
+        res["tsnr"][:, :, z0:z1] = _divide(data_mean, data_std)
+
+        # condition specific statistics
+        cond_mean = {}
+        for c, ind in onsets.items():
+            cond_mean[c] = np.mean(data[:, :, :, ind], axis=3)
+            res["mean_" + c][:, :, z0:z1] = cond_mean[c]
+            res["std_" + c][:, :, z0:z1] = np.std(data[:, :, :, ind], axis=3)
+
+        # percent signal change
+        if baseline is not None:
+            for c in onsets:
+                if c != baseline:
+                    res["psc_" + c][:, :, z0:z1] = _divide(
+                        cond_mean[c] - cond_mean[baseline],
+                        cond_mean[baseline]) * 100
+
+    return res
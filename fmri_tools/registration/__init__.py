@@ -2,9 +2,16 @@
 """Python package for for analysis of high-resolution fMRI data."""
 
 # local inputs
-from .get_flash2orig import get_flash2orig
-from .get_scanner_transform import get_scanner_transform
-from .mask_ana import mask_ana
-from .mask_epi import mask_epi
-from .clean_ana import clean_ana
-from .apply_registration import apply_registration
+from ..lazy_import import lazy_import
+
+_attrs = {
+    "get_flash2orig": ["get_flash2orig"],
+    "get_scanner_transform": ["get_scanner_transform"],
+    "mask_ana": ["mask_ana"],
+    "mask_epi": ["mask_epi"],
+    "clean_ana": ["clean_ana"],
+    "apply_registration": ["apply_registration"],
+    "apply_coordinate_mapping": ["apply_coordinate_mapping"],
+}
+
+__getattr__, __dir__, __all__ = lazy_import(__name__, attrs=_attrs)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+# python standard library inputs
+import os
+
+# external inputs
+import numpy as np
+import nibabel as nb
+
+# local inputs
+from ..mapping.get_interpolation_matrix import get_interpolation_matrix
+
+
+def apply_coordinate_mapping(file_in, cmap_in, file_out=None,
+                             interpolation="linear", padding="zero",
+                             chunk_size=50):
+    """Apply coordinate mapping.
+
+    This function applies a coordinate mapping to a 3D volume or a 4D time
+    series in-process. The coordinate mapping is defined in target space and
+    contains the source voxel coordinates of each target voxel. Interpolation
+    weights are computed once from the coordinate mapping and stored as sparse
+    matrix which is then applied to chunks of time points read from the
+    memory-mapped input image. Nearest neighbor and linear interpolation are
+    supported. Coordinates outside of the source volume are either set to zero
+    or to the value of the closest voxel.
+
+    Parameters
+    ----------
+    file_in : str
+        Filename of input volume or time series.
+    cmap_in : str or niimg
+        Coordinate mapping.
+    file_out : str, optional
+        Filename of output volume. Output is only written if set. The default
+        is None.
+    interpolation : str, optional
+        Interpolation type (linear or nearest). The default is "linear".
+    padding : str, optional
+        Padding type (zero or closest). The default is "zero".
+    chunk_size : int, optional
+        Number of time points which are transformed at once. The default is 50.
+
+    Raises
+    ------
+    ValueError
+        If `interpolation` or `padding` is invalid.
+
+    Returns
+    -------
+    niimg
+        Transformed volume.
+
+    """
+
+    # load input without reading data
+    data = nb.load(file_in)
+    cmap = nb.load(cmap_in) if isinstance(cmap_in, str) else cmap_in
+
+    # interpolation weights
+    dims_in = np.array(data.shape[:3])
+    dims_out = cmap.shape[:3]
+    coords = np.asarray(cmap.dataobj, dtype=np.float64)[:, :, :, :3]
+    coords = coords.reshape((-1, 3), order="F")
+    m = get_interpolation_matrix(coords, dims_in, interpolation, padding)
+    del coords
+
+    # apply weights to chunks of time points
+    n_time = data.shape[3] if data.ndim > 3 else 1
+    arr = np.zeros((np.prod(dims_out), n_time), dtype=np.float32)
+    for t0 in range(0, n_time, chunk_size):
+        t1 = min(t0 + chunk_size, n_time)
+        if data.ndim > 3:
+            arr_in = np.asarray(data.dataobj[:, :, :, t0:t1], dtype=np.float32)
+        else:
+            arr_in = np.asarray(data.dataobj, dtype=np.float32)
+
+        arr_in = arr_in.reshape((m.shape[1], t1 - t0), order="F")
+        arr[:, t0:t1] = m.dot(arr_in)
+
+    arr = arr.reshape(dims_out + data.shape[3:], order="F")
+
+    # output image in target space
+    header = data.header.copy()
+    header.set_data_dtype(np.float32)
+    output = nb.Nifti1Image(arr, cmap.affine, header)
+
+    # write output
+    if file_out:
+        path_output = os.path.dirname(file_out)
+        if path_output and not os.path.exists(path_output):
+            os.makedirs(path_output)
+
+        nb.save(output, file_out)
+
+    return output
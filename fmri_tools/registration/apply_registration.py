@@ -2,15 +2,13 @@
 
 # python standard library inputs
 import os
-import datetime
 
 # external inputs
 import numpy as np
 import nibabel as nb
-from nighres.registration import apply_coordinate_mappings
 
 # local inputs
-from ..io.get_filename import get_filename
+from ..registration.apply_coordinate_mapping import apply_coordinate_mapping
 from ..utils.resample_volume import resample_volume
 
 
@@ -48,29 +46,13 @@ def apply_registration(file_in, cmap_in, file_out, interpolation="linear",
     if not os.path.exists(path_output):
         os.makedirs(path_output)
 
-    # filename for temporary cmap copy
-    _, _, ext_cmap = get_filename(cmap_in)
-    tmp1 = np.random.randint(0, 10, 5)
-    tmp1 = ''.join(str(i) for i in tmp1)
-    tmp2 = datetime.datetime.now().strftime("%S%f")
-    tmp_string = tmp1 + tmp2
-    file_tmp = os.path.join(path_output, "tmp_" + tmp_string + ext_cmap)
-    file_tmp2 = os.path.join(path_output, "tmp2_" + tmp_string + ext_cmap)
-
-    if os.path.exists(file_tmp) or os.path.exists(file_tmp2):
-        raise FileExistsError("Temporary file already exists!")
-
     # adjust coordinate mapping
     if r:
-
-        # resample cmap
-        resample_volume(cmap_in, file_tmp, dxyz=r, rmode="Linear")
-        resample_volume(cmap_in, file_tmp2, dxyz=r, rmode="NN")
+        # resample cmap in memory
+        cmap = resample_volume(cmap_in, dxyz=r, rmode="Linear")
+        mask = resample_volume(cmap_in, dxyz=r, rmode="NN")
 
         # mask resampled cmap
-        cmap = nb.load(file_tmp)
-        mask = nb.load(file_tmp2)
-
         cmap_array = cmap.get_fdata()
         mask_array = mask.get_fdata()
 
@@ -87,23 +69,11 @@ def apply_registration(file_in, cmap_in, file_out, interpolation="linear",
 
         cmap = nb.load(cmap_in)
 
-    # apply coordinate mapping
-    res = apply_coordinate_mappings(image=file_in,  # input
-                                    mapping1=cmap,  # cmap
-                                    interpolation=interpolation,  # nearest or linear
-                                    padding="zero",  # closest, zero or max
-                                    save_data=False,  # save output data to file (boolean)
-                                    overwrite=False,  # overwrite existing results (boolean)
-                                    output_dir=None,  # output directory
-                                    file_name=None,  # base name with file extension for output
-                                    )
-
-    # write output
-    nb.save(res["result"], file_out)
-
-    # remove temporary files
-    if r:
-        os.remove(file_tmp)
-        os.remove(file_tmp2)
+    # apply coordinate mapping and write output
+    res = apply_coordinate_mapping(file_in,
+                                   cmap,
+                                   file_out,
+                                   interpolation=interpolation,
+                                   padding="zero")
 
-    return res["result"]
+    return res
@@ -8,11 +8,12 @@ import shutil as sh
 from nipype.interfaces.fsl import FLIRT
 from nipype.interfaces.fsl.preprocess import ApplyXFM
 from nipype.interfaces.freesurfer.preprocess import MRIConvert
-from nighres.registration import apply_coordinate_mappings
 
 # local inputs
 from ..cmap.generate_coordinate_mapping import generate_coordinate_mapping
+from ..cmap.compose_coordinate_mapping import compose_coordinate_mapping
 from ..registration.get_scanner_transform import get_scanner_transform
+from ..registration.apply_coordinate_mapping import apply_coordinate_mapping
 
 
 def get_flash2orig(file_flash, file_inv2, file_orig, path_output,
@@ -25,7 +26,9 @@ def get_flash2orig(file_flash, file_inv2, file_orig, path_output,
     GRE <-> inv2 and inv2 -> orig, (3) generate flash cmap, (4) apply scanner 
     transform inv2 -> GRE, (5) get flirt registration GRE -> inv2, (6) apply 
     flirt to GRE cmap, (7) apply scanner transform to GRE cmap, (8) apply final 
-    deformation to GRE. The function needs the FSL environment set.    
+    deformation to GRE. Both scanner transforms are composed exactly and merged 
+    with the GRE cmap in-process so that the GRE image is only resampled once. 
+    The function needs the FSL environment set.    
 
     Parameters
     ----------
@@ -68,28 +71,27 @@ def get_flash2orig(file_flash, file_inv2, file_orig, path_output,
     mc.run()
 
     # scanner transformation
-    get_scanner_transform(os.path.join(path_temp, "inv2.nii"),
-                          os.path.join(path_temp, "flash.nii"), path_temp,
-                          False)
-    get_scanner_transform(os.path.join(path_temp, "flash.nii"),
-                          os.path.join(path_temp, "inv2.nii"), path_temp, False)
-    get_scanner_transform(os.path.join(path_temp, "inv2.nii"),
-                          os.path.join(path_temp, "orig.nii"), path_temp, False)
+    inv22flash = get_scanner_transform(os.path.join(path_temp, "inv2.nii"),
+                                       os.path.join(path_temp, "flash.nii"),
+                                       path_temp, False)
+    flash2inv2 = get_scanner_transform(os.path.join(path_temp, "flash.nii"),
+                                       os.path.join(path_temp, "inv2.nii"),
+                                       path_temp, False)
+    inv22orig = get_scanner_transform(os.path.join(path_temp, "inv2.nii"),
+                                      os.path.join(path_temp, "orig.nii"),
+                                      path_temp, False)
 
     # generate coordinate mapping
     generate_coordinate_mapping(os.path.join(path_temp, "flash.nii"), 0,
                                 path_temp, "flash", False, True)
 
     # scanner transform inv2 to flash
-    apply_coordinate_mappings(os.path.join(path_temp, "inv2.nii"),  # input
-                              os.path.join(path_temp, "inv2_2_flash_scanner.nii"),  # cmap
-                              interpolation="linear",  # nearest or linear
-                              padding="zero",  # closest, zero or max
-                              save_data=True,  # save output data to file (boolean)
-                              overwrite=True,  # overwrite existing results (boolean)
-                              output_dir=path_temp,  # output directory
-                              file_name="inv2_apply_scanner"  # base name with file extension for output
-                              )
+    apply_coordinate_mapping(os.path.join(path_temp, "inv2.nii"),
+                             inv22flash,
+                             os.path.join(path_temp,
+                                          "inv2_apply_scanner.nii.gz"),
+                             interpolation="linear",
+                             padding="zero")
 
     # flirt flash to inv2
     os.chdir(path_temp)
@@ -99,7 +101,7 @@ def get_flash2orig(file_flash, file_inv2, file_orig, path_output,
     flirt.inputs.interp = "trilinear"  # trilinear, nearestneighbour, sinc or spline
     flirt.inputs.in_file = os.path.join(path_temp, "flash.nii")
     flirt.inputs.reference = os.path.join(path_temp,
-                                          "inv2_apply_scanner_def-img.nii.gz")
+                                          "inv2_apply_scanner.nii.gz")
     flirt.inputs.output_type = "NIFTI_GZ"
     flirt.inputs.out_file = os.path.join(path_temp,
                                          "flash_apply_flirt_def-img.nii.gz")
@@ -119,36 +121,21 @@ def get_flash2orig(file_flash, file_inv2, file_orig, path_output,
     applyxfm.inputs.apply_xfm = True
     applyxfm.run()
 
-    # apply scanner transform to flash cmap
-    apply_coordinate_mappings(
+    # merge scanner transforms flash -> inv2 -> orig (exact since both are
+    # affine) and apply them to the flirt-transformed flash cmap
+    cmap_scanner = compose_coordinate_mapping(flash2inv2, inv22orig)
+    cmap = compose_coordinate_mapping(
         os.path.join(path_temp, "cmap_apply_flirt_def-img.nii.gz"),
-        os.path.join(path_temp, "flash_2_inv2_scanner.nii"),  # cmap 1
-        os.path.join(path_temp, "inv2_2_orig_scanner.nii"),  # cmap 2
-        interpolation="linear",  # nearest or linear
-        padding="zero",  # closest, zero or max
-        save_data=True,  # save output data to file (boolean)
-        overwrite=True,  # overwrite existing results (boolean)
-        output_dir=path_temp,  # output directory
-        file_name="cmap_apply_scanner"  # base name with file extension for output
-        )
+        cmap_scanner,
+        os.path.join(path_output, "flash2orig.nii.gz"))
 
     # apply deformation to source image
-    apply_coordinate_mappings(os.path.join(path_temp, "flash.nii"),  # input
-                              os.path.join(path_temp,
-                                           "cmap_apply_scanner_def-img.nii.gz"),
-                              interpolation="linear",  # nearest or linear
-                              padding="zero",  # closest, zero or max
-                              save_data=True,  # save output data to file (boolean)
-                              overwrite=True,  # overwrite existing results (boolean)
-                              output_dir=path_temp,  # output directory
-                              file_name="flash_apply_deformation"  # base name with file extension for output
-                              )
-
-    # rename final deformation examples
-    os.rename(os.path.join(path_temp, "cmap_apply_scanner_def-img.nii.gz"),
-              os.path.join(path_output, "flash2orig.nii.gz"))
-    os.rename(os.path.join(path_temp, "flash_apply_deformation_def-img.nii.gz"),
-              os.path.join(path_output, "flash2orig_example.nii.gz"))
+    apply_coordinate_mapping(os.path.join(path_temp, "flash.nii"),
+                             cmap,
+                             os.path.join(path_output,
+                                          "flash2orig_example.nii.gz"),
+                             interpolation="linear",
+                             padding="zero")
 
     # clean intermediate files
     if cleanup:
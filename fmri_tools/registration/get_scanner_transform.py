@@ -4,13 +4,11 @@
 import os
 
 # external inputs
-import numpy as np
 import nibabel as nb
 import numpy.linalg as npl
-from numpy.matlib import repmat
 
 # local inputs
-from ..utils.apply_affine_chunked import apply_affine_chunked
+from ..cmap.coordinate_mapping_proxy import CoordinateMappingProxy
 
 
 def get_scanner_transform(input_source, input_target, path_output,
@@ -21,8 +19,10 @@ def get_scanner_transform(input_source, input_target, path_output,
     between two images in the same scanner coordinate system. The orientation 
     matrices written in the header of both files are taken to get the 
     trasformation between both images. The output contains a 4d coordinate map 
-    describing the transformation from source to target image. Input files 
-    should be in nifti format.    
+    describing the transformation from source to target image. Since the
+    transformation is affine, the coordinate map is not computed in memory but
+    represented by a `CoordinateMappingProxy` and written as float32 file.
+    Input files should be in nifti format.
 
     Parameters
     ----------
@@ -37,7 +37,8 @@ def get_scanner_transform(input_source, input_target, path_output,
 
     Returns
     -------
-    None.
+    output : niimg
+        Coordinate mapping.
     
     """
 
@@ -52,39 +53,15 @@ def get_scanner_transform(input_source, input_target, path_output,
     # get affine transformation
     target2source = npl.inv(source_img.affine).dot(target_img.affine)
 
-    # initialise target coordinate map
-    x_size = target_img.header["dim"][1]
-    y_size = target_img.header["dim"][2]
-    z_size = target_img.header["dim"][3]
-
-    coordinate_mapping = np.zeros((x_size, y_size, z_size, 3), dtype='float')
-
-    # coordinate mapping in x-direction
-    X = np.array(np.arange(0, x_size, 1), dtype='float')
-    X = np.transpose(repmat(X, y_size, 1))
-    X = np.dstack([X] * z_size)
-
-    # coordinate mapping in y-direction
-    Y = np.array(np.arange(0, y_size), dtype='float')
-    Y = repmat(Y, x_size, 1)
-    Y = np.dstack([Y] * z_size)
-
-    # coordinate mapping in z-direction
-    Z = np.ones((x_size, y_size, z_size))
-    Z = np.arange(0, z_size) * Z
-
-    # merge directions
-    coordinate_mapping[:, :, :, 0] = X
-    coordinate_mapping[:, :, :, 1] = Y
-    coordinate_mapping[:, :, :, 2] = Z
-
-    # apply transformation to coordinates
-    coordinate_mapping = apply_affine_chunked(target2source, coordinate_mapping)
+    # coordinate map of target grid in source voxel coordinates (only computed
+    # when the file is written)
+    coordinate_mapping = CoordinateMappingProxy(target_img.shape[:3],
+                                                target2source)
 
     # write coordinate map
     target_img.header["dim"][0] = 4
     target_img.header["dim"][4] = 3
-    target_img.set_data_dtype(np.float)
+    target_img.set_data_dtype(coordinate_mapping.dtype)
 
     # get filenames
     if os.path.splitext(os.path.basename(input_source))[1] == '.gz':
@@ -105,3 +82,5 @@ def get_scanner_transform(input_source, input_target, path_output,
     else:
         nb.save(output, os.path.join(path_output,
                                      name_source + "_2_" + name_target + "_scanner.nii"))
+
+    return output
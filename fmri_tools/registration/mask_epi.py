@@ -15,6 +15,7 @@ from nighres.registration import embedded_antsreg, apply_coordinate_mappings
 from ..io.get_filename import get_filename
 from ..registration.get_scanner_transform import get_scanner_transform
 from ..cmap.expand_coordinate_mapping import expand_coordinate_mapping
+from ..cmap.compose_coordinate_mapping import compose_coordinate_mapping
 
 
 def mask_epi(file_epi, file_t1, file_mask, niter, sigma, file_reg=""):
@@ -69,8 +70,9 @@ def mask_epi(file_epi, file_t1, file_mask, niter, sigma, file_reg=""):
     # get initial ana -> epi transformation from existing cmap or header
     if file_reg:
         sh.copyfile(file_reg, file_cmap_reg)
+        cmap_reg = nb.load(file_cmap_reg)
     else:
-        get_scanner_transform(file_t1, file_epi, path_t1, True)
+        cmap_reg = get_scanner_transform(file_t1, file_epi, path_t1, True)
         os.rename(os.path.join(path_t1, name_t1 + "_2_" + name_epi + "_scanner.nii.gz"),
                   file_cmap_reg)
 
@@ -136,20 +138,12 @@ def mask_epi(file_epi, file_t1, file_mask, niter, sigma, file_reg=""):
                               name_output="cmap_ants",
                               write_output=True)
 
-    # apply ants cmap to header transformation
-    cmap_def = apply_coordinate_mappings(file_cmap_reg,  # input
-                                         file_cmap_ants,
-                                         interpolation="linear",  # nearest or linear
-                                         padding="zero",  # closest, zero or max
-                                         save_data=False,
-                                         overwrite=False,
-                                         output_dir=None,
-                                         file_name=None
-                                         )
-    nb.save(cmap_def["result"], file_cmap_def)
+    # merge initial transformation and ants cmap (a scanner transform from the
+    # header is an affine coordinate mapping and composed exactly)
+    cmap_def = compose_coordinate_mapping(cmap_reg, file_cmap_ants)
 
     # remove outliers and expand
-    arr_cmap = cmap_def["result"].get_fdata()
+    arr_cmap = cmap_def.get_fdata()
 
     pts_cmap0 = arr_cmap[0, 0, 0, 0]
     pts_cmap1 = arr_cmap[0, 0, 0, 1]
@@ -160,8 +154,7 @@ def mask_epi(file_epi, file_t1, file_mask, niter, sigma, file_reg=""):
     arr_cmap[arr_cmap == pts_cmap1] = 0
     arr_cmap[arr_cmap == pts_cmap2] = 0
 
-    output = nb.Nifti1Image(arr_cmap, cmap_def["result"].affine,
-                            cmap_def["result"].header)
+    output = nb.Nifti1Image(arr_cmap, cmap_def.affine, cmap_def.header)
     nb.save(output, file_cmap_def)
 
     expand_coordinate_mapping(cmap_in=file_cmap_def,
@@ -2,12 +2,18 @@
 """Python package for for analysis of high-resolution fMRI data."""
 
 # local inputs
-from .alpha_shape import alpha_shape
-from .calculate_area import calculate_area
-from .calculate_distortion import calculate_distortion
-from .get_ribbon_fsurf import get_ribbon_fsurf
-from .get_thickness_fsurf import get_thickness_fsurf
-from .orthographic_projection import orthographic_projection
-from .robust_combination import robust_combination
-from .shift_white import shift_white
-from .include_pial_correction import include_pial_correction
+from ..lazy_import import lazy_import
+
+_attrs = {
+    "alpha_shape": ["alpha_shape"],
+    "calculate_area": ["calculate_area"],
+    "calculate_distortion": ["calculate_distortion"],
+    "get_ribbon_fsurf": ["get_ribbon_fsurf"],
+    "get_thickness_fsurf": ["get_thickness_fsurf"],
+    "orthographic_projection": ["orthographic_projection"],
+    "robust_combination": ["robust_combination"],
+    "shift_white": ["shift_white"],
+    "include_pial_correction": ["include_pial_correction"],
+}
+
+__getattr__, __dir__, __all__ = lazy_import(__name__, attrs=_attrs)
@@ -5,6 +5,9 @@ import numpy as np
 from numpy.linalg import norm
 from nibabel.freesurfer.io import write_morph_data, read_geometry
 
+# local inputs
+from ..surface.get_incidence_matrix import get_incidence_matrix
+
 
 def calculate_area(filename_surf, filename_area=""):
     """Calculate area.
@@ -45,7 +48,6 @@ def calculate_area(filename_surf, filename_area=""):
     # Read the surface file
     vtx, fac = read_geometry(filename_surf)
     nV = len(vtx)
-    nF = len(fac)
 
     # compute area per face (DPF)
     facvtx = np.concatenate([vtx[fac[:, 0]], vtx[fac[:, 1]], vtx[fac[:, 2]]], axis=1)
@@ -55,14 +57,11 @@ def calculate_area(filename_surf, filename_area=""):
     print("Total area (facewise): " + str(np.sum(dpf)))
 
     # compute area per vertex (DPV)
-    dpv = np.zeros(nV)
-
     # for speed, divide the dpf by 3
     dpf = dpf / 3
 
     # redistribute
-    for f in range(nF):
-        dpv[fac[f, :]] = dpv[fac[f, :]] + dpf[f]
+    dpv = get_incidence_matrix(fac, nV).dot(dpf)
 
     print("Total area (vertexwise): " + str(np.sum(dpv)))
 
@@ -11,6 +11,7 @@ from nibabel.freesurfer.io import read_geometry, write_morph_data
 
 # local inputs
 from ..io.read_patch import read_patch
+from ..surface.get_incidence_matrix import get_incidence_matrix
 
 
 def calculate_distortion(file_patch, file_white, path_output, hemi):
@@ -70,18 +71,11 @@ def calculate_distortion(file_patch, file_white, path_output, hemi):
 
     # load data
     vtx_white, fac_white = read_geometry(file_white)
-    _, _, _, ind_patch = read_patch(file_patch)
-    vtx_patch = np.zeros((len(ind_patch), 3))
-    vtx_patch[:, 0], vtx_patch[:, 1], vtx_patch[:, 2], _ = read_patch(file_patch)
+    x, y, z, ind_patch = read_patch(file_patch)
+    vtx_patch = np.column_stack((x, y, z)).astype(float)
 
     # look for faces which exist in the patch
-    fac_patch = []
-    for i in range(len(fac_white)):
-        if np.any(fac_white[i, 0] == ind_patch) and np.any(
-                fac_white[i, 1] == ind_patch) and np.any(
-                fac_white[i, 2] == ind_patch):
-            fac_patch.append(fac_white[i, :])
-    fac_patch = np.array(fac_patch)
+    fac_patch = fac_white[np.all(np.isin(fac_white, ind_patch), axis=1)]
 
     # Areal distortion
 
@@ -99,8 +93,7 @@ def calculate_distortion(file_patch, file_white, path_output, hemi):
 
     # calculate face-wise areal distortion (after flattening)
     vtx_patch_all = np.zeros_like(vtx_white).astype(float)
-    for i in range(len(ind_patch)):
-        vtx_patch_all[ind_patch[i], :] = vtx_patch[i, :]
+    vtx_patch_all[ind_patch, :] = vtx_patch
 
     facvtx_patch = np.concatenate(
         [vtx_patch_all[fac_patch[:, 0]],
@@ -116,15 +109,12 @@ def calculate_distortion(file_patch, file_white, path_output, hemi):
     # calculate face-wise distortion
     A_dist = A_patch / A_white
 
-    # convert to vertex-wise representation
+    # convert to vertex-wise representation (average over neighbouring faces)
+    incidence = get_incidence_matrix(fac_patch, len(vtx_white))
+    n_fac = np.asarray(incidence.sum(axis=1)).ravel()
     VAD = np.zeros(len(vtx_white)).astype(float)
-    VAD_miss = 0
-    for i in range(len(ind_patch)):
-        temp = np.where(fac_patch == ind_patch[i])
-        if np.any(temp[0]):
-            VAD[ind_patch[i]] = np.sum(A_dist[temp[0]]) / len(temp[0])
-        else:
-            VAD_miss += 1
+    np.divide(incidence.dot(A_dist), n_fac, out=VAD, where=n_fac > 0)
+    VAD_miss = int(np.sum(n_fac[ind_patch] == 0))
 
     VAD_params = [np.mean(VAD[ind_patch]),
                   np.std(VAD[ind_patch]),
@@ -139,27 +129,25 @@ def calculate_distortion(file_patch, file_white, path_output, hemi):
 
     # Linear distortion
 
+    # unique edges of all patch faces
+    edges = np.concatenate([fac_patch[:, [0, 1]],
+                            fac_patch[:, [1, 2]],
+                            fac_patch[:, [2, 0]]], axis=0)
+    edges = np.unique(np.sort(edges, axis=1), axis=0)
+
+    # edge lengths before and after flattening
+    len_white = norm(vtx_white[edges[:, 0]] - vtx_white[edges[:, 1]], axis=1)
+    len_patch = norm(vtx_patch_all[edges[:, 0]] - vtx_patch_all[edges[:, 1]],
+                     axis=1)
+
+    # sum over neighbouring nodes
+    incidence = get_incidence_matrix(edges, len(vtx_white))
+    VLD_white = incidence.dot(len_white)
+    VLD_patch = incidence.dot(len_patch)
+    n_edge = np.asarray(incidence.sum(axis=1)).ravel()
     VLD = np.zeros(len(vtx_white)).astype(float)
-    VLD_miss = 0
-    for i in range(len(ind_patch)):
-        node_patch = vtx_patch_all[ind_patch[i]]
-        node_white = vtx_white[ind_patch[i]]
-
-        ind_temp = fac_patch[np.where(fac_patch == ind_patch[i])[0], :]
-        ind_temp = np.reshape(ind_temp, len(ind_temp) * 3)
-        ind_temp = np.unique(ind_temp)
-        ind_temp = np.delete(ind_temp, np.where(ind_temp == ind_patch[i]))
-
-        if np.any(ind_temp):
-            VLD_patch = 0
-            VLD_white = 0
-            for j in range(len(ind_temp)):
-                VLD_patch += norm(node_patch - vtx_patch_all[ind_temp[j]])
-                VLD_white += norm(node_white - vtx_white[ind_temp[j]])
-
-            VLD[ind_patch[i]] = VLD_patch / VLD_white
-        else:
-            VLD_miss += 1
+    np.divide(VLD_patch, VLD_white, out=VLD, where=n_edge > 0)
+    VLD_miss = int(np.sum(n_edge[ind_patch] == 0))
 
     VLD_params = [np.mean(VLD[ind_patch]),
                   np.std(VLD[ind_patch]),
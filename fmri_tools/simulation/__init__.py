@@ -2,13 +2,19 @@
 """Python package for for analysis of high-resolution fMRI data."""
 
 # local inputs
-from .mask_pattern import *
-from .filter_bold import *
-from .filter_odc import *
-from .filter_sigmoid import filter_sigmoid
-from .get_white import *
-from .odc import *
-from .pattern import *
-from .pattern_corr import pattern_corr
-from .regrid import *
-from .regrid_zero import *
+from ..lazy_import import lazy_import
+
+_attrs = {
+    "mask_pattern": ["mask_pattern_2d", "mask_pattern_1d"],
+    "filter_bold": ["filter_bold_2d", "filter_bold_1d"],
+    "filter_odc": ["filter_odc_2d", "filter_odc_1d"],
+    "filter_sigmoid": ["filter_sigmoid"],
+    "get_white": ["get_white_2d", "get_white_1d"],
+    "odc": ["odc_2d", "odc_1d"],
+    "pattern": ["pattern_2d", "pattern_1d"],
+    "pattern_corr": ["pattern_corr"],
+    "regrid": ["regrid_2d", "regrid_1d"],
+    "regrid_zero": ["regrid_zero_2d", "regrid_zero_1d"],
+}
+
+__getattr__, __dir__, __all__ = lazy_import(__name__, attrs=_attrs)
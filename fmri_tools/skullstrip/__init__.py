@@ -2,6 +2,12 @@
 """Python package for for analysis of high-resolution fMRI data."""
 
 # local inputs
-from .skullstrip_epi import skullstrip_epi
-from .skullstrip_flash import skullstrip_flash
-from .skullstrip_refined import skullstrip_refined
+from ..lazy_import import lazy_import
+
+_attrs = {
+    "skullstrip_epi": ["skullstrip_epi"],
+    "skullstrip_flash": ["skullstrip_flash"],
+    "skullstrip_refined": ["skullstrip_refined"],
+}
+
+__getattr__, __dir__, __all__ = lazy_import(__name__, attrs=_attrs)
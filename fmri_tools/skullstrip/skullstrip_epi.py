@@ -6,8 +6,34 @@ import os
 # external inputs
 import numpy as np
 import nibabel as nb
-from nipype.interfaces.fsl import ErodeImage, DilateImage
-from scipy.ndimage.morphology import binary_fill_holes
+from scipy.ndimage import (binary_fill_holes, binary_erosion, binary_dilation,
+                           generate_binary_structure, label)
+
+
+def _grow_mask(mask_threshold, seed):
+    """Helper function for region growing from a seed point in one pass. The
+    region contains all voxels above threshold which are 6-connected to the
+    seed point. The seed point is always part of the region. Voxels on the
+    volume border are added to the region but do not grow it further."""
+
+    dims = np.array(mask_threshold.shape)
+    mask_array = np.zeros_like(mask_threshold)
+    mask_array[seed] = True
+    if np.any(np.array(seed) == 0) or np.any(np.array(seed) == dims - 1):
+        return mask_array
+
+    # connected component of growing voxels (inside the volume border)
+    interior = np.zeros_like(mask_threshold)
+    interior[1:-1, 1:-1, 1:-1] = True
+    mask_grow = (mask_threshold | mask_array) & interior
+    structure = generate_binary_structure(3, 1)
+    labels, _ = label(mask_grow, structure)
+    mask_array = labels == labels[seed]
+
+    # add neighbors of the component above threshold
+    mask_array |= binary_dilation(mask_array, structure) & mask_threshold
+
+    return mask_array
 
 
 def skullstrip_epi(file_in, roi_size=5, scale=0.75, nerode=2, ndilate=1,
@@ -17,7 +43,8 @@ def skullstrip_epi(file_in, roi_size=5, scale=0.75, nerode=2, ndilate=1,
     Skullstrip input volume by defining an intensity threshold from the inner of 
     the brain volume. From a defined mid-point, a brain mask is grown inside the 
     brain. A binary filling holes algorithm is applied. To reduce remaining 
-    skull within the brain mask, the mask is eroded and dilated several times.        
+    skull within the brain mask, the mask is eroded and dilated several times
+    with a 3x3x3 box kernel (same as fslmaths -ero and -dilM).
 
     Parameters
     ----------
@@ -34,7 +61,7 @@ def skullstrip_epi(file_in, roi_size=5, scale=0.75, nerode=2, ndilate=1,
     savemask : bool, optional
         Save mask time series. The default is False.
     cleanup : bool, optional
-        Delete intermediate files after running. The default is True.
+        Not used since the mask is computed in memory. The default is True.
 
     Returns
     -------
@@ -48,90 +75,38 @@ def skullstrip_epi(file_in, roi_size=5, scale=0.75, nerode=2, ndilate=1,
 
     # load data
     data_img = nb.load(os.path.join(path, file))
-    data_array = data_img.get_data()
-    
+    data_array = np.asarray(data_img.dataobj)
+
     # calculate mean intensity
     data_mean = data_array.mean()
 
     # get point within the brain
-    inds = np.transpose(np.nonzero(data_array > data_mean))    
-    x_mean = np.uint8(np.round((np.max(inds[:, 0])+np.min(inds[:, 0]))/2))
-    y_mean = np.uint8(np.round((np.max(inds[:, 1])+np.min(inds[:, 1]))/2))
-    z_mean = np.uint8(np.round((np.max(inds[:, 2])+np.min(inds[:, 2]))/2))
-    
-    # initialise mask
-    mask_array = np.zeros_like(data_array)
-    mask_temp_array = np.zeros_like(data_array)
-    mask_array[x_mean, y_mean, z_mean] = 1
-    mask_temp_array[x_mean, y_mean, z_mean] = 1
-        
+    inds = np.transpose(np.nonzero(data_array > data_mean))
+    x_mean = int(np.round((np.max(inds[:, 0])+np.min(inds[:, 0]))/2))
+    y_mean = int(np.round((np.max(inds[:, 1])+np.min(inds[:, 1]))/2))
+    z_mean = int(np.round((np.max(inds[:, 2])+np.min(inds[:, 2]))/2))
+
     # compute threshold
-    roi = data_array[np.uint8(np.round(x_mean-roi_size/2)):np.uint8(np.round(x_mean+roi_size-1/2)),
-                     np.uint8(np.round(y_mean-roi_size/2)):np.uint8(np.round(y_mean+roi_size-1/2)),
-                     np.uint8(np.round(z_mean-roi_size/2)):np.uint8(np.round(z_mean+roi_size-1/2))]
+    roi = data_array[max(0, int(np.round(x_mean-roi_size/2))):int(np.round(x_mean+roi_size-1/2)),
+                     max(0, int(np.round(y_mean-roi_size/2))):int(np.round(y_mean+roi_size-1/2)),
+                     max(0, int(np.round(z_mean-roi_size/2))):int(np.round(z_mean+roi_size-1/2))]
     roi_mean = roi.mean()
 
     # grow mask
-    while True:
-            
-        coords = np.transpose(np.nonzero(mask_array > 0))
-    
-        coords = coords[coords[:, 0] > 0, :]
-        coords = coords[coords[:, 1] > 0, :]
-        coords = coords[coords[:, 2] > 0, :]
-        coords = coords[coords[:, 0] < np.size(data_array, 0)-1]
-        coords = coords[coords[:, 1] < np.size(data_array, 1)-1]
-        coords = coords[coords[:, 2] < np.size(data_array, 2)-1]
-   
-        # calculate neighbour coordinate
-        mask_temp_array[coords[:, 0]-1, coords[:, 1], coords[:, 2]] = 1
-        mask_temp_array[coords[:, 0], coords[:, 1]-1, coords[:, 2]] = 1
-        mask_temp_array[coords[:, 0], coords[:, 1], coords[:, 2]-1] = 1
-        mask_temp_array[coords[:, 0]+1, coords[:, 1], coords[:, 2]] = 1
-        mask_temp_array[coords[:, 0], coords[:, 1]+1, coords[:, 2]] = 1
-        mask_temp_array[coords[:, 0], coords[:, 1], coords[:, 2]+1] = 1
-   
-        # delete all old mask elements
-        mask_temp_array = mask_temp_array - mask_array      
-        mask_temp_array[data_array < scale*roi_mean] = 0
-    
-        # reinitialise mask_temp
-        mask_array = mask_array + mask_temp_array
-
-        # check break condition
-        coords = np.transpose(np.nonzero(mask_temp_array == True))
-        if len(coords) == 0:
-            break
+    mask_array = _grow_mask(data_array >= scale*roi_mean, (x_mean, y_mean, z_mean))
 
     # flood filling on brain mask
     mask_array = binary_fill_holes(mask_array, structure=np.ones((2, 2, 2)))
 
-    # write mask (intermediate)
-    newimg = nb.Nifti1Image(mask_array, data_img.affine, data_img.header)
-    newimg.header['dim'][0] = 3
-    nb.save(newimg, os.path.join(path, 'temp.nii'))
-
-    # erode mask
-    for i in range(nerode):
-        erode = ErodeImage()
-        erode.inputs.in_file = os.path.join(path, 'temp.nii')
-        erode.inputs.output_type = 'NIFTI'
-        erode.inputs.out_file = os.path.join(path, 'temp.nii')
-        erode.run()
-
-    # dilate mask
-    for i in range(ndilate):
-        dilate = DilateImage()
-        dilate.inputs.in_file = os.path.join(path, 'temp.nii')
-        dilate.inputs.operation = 'mean'
-        dilate.inputs.output_type = 'NIFTI'
-        dilate.inputs.out_file = os.path.join(path, 'temp.nii')
-        dilate.run()
-        
-    # load final mask
-    temp_img = nb.load(os.path.join(path, 'temp.nii'))
-    mask_array = temp_img.get_data()
-    
+    # erode and dilate mask
+    kernel = np.ones((3, 3, 3), dtype=bool)
+    if nerode:
+        mask_array = binary_erosion(mask_array, kernel, iterations=nerode,
+                                    border_value=1)
+    if ndilate:
+        mask_array = binary_dilation(mask_array, kernel, iterations=ndilate)
+    mask_array = mask_array.astype(np.float32)
+
     # write masked image
     data_masked_array = data_array * mask_array
     output = nb.Nifti1Image(data_masked_array, data_img.affine, data_img.header)
@@ -141,7 +116,3 @@ def skullstrip_epi(file_in, roi_size=5, scale=0.75, nerode=2, ndilate=1,
     if savemask is True:
         newimg = nb.Nifti1Image(mask_array, data_img.affine, data_img.header)
         nb.save(newimg, os.path.join(path, 'mask_'+file))
-    
-    # clear output
-    if cleanup is True:
-        os.remove(os.path.join(path, 'temp.nii'))
@@ -2,21 +2,29 @@
 """Python package for for analysis of high-resolution fMRI data."""
 
 # local inputs
-from .apply_fieldmap import apply_fieldmap
-from .deform_surface import deform_surface
-from .get_b0_orientation import get_b0_orientation
-from .get_curvature import get_curvature
-from .get_thickness import get_thickness
-from .heat_kernel_smoothing import heat_kernel_smoothing
-from .inflate_surf_mesh import inflate_surf_mesh
-from .make_mesh import make_mesh
-from .make_sphere import make_sphere
-from .match_vertex_number import match_vertex_number
-from .mesh_sampling import mesh_sampling
-from .remove_vertex_outliers import remove_vertex_outliers
-from .smooth_surface import smooth_surface
-from .surface_flattening import surface_flattening
-from .upsample_surf_mesh import upsample_surf_mesh
-from .extract_main_component import extract_main_component
-from .gradient import gradient
-from .intracortical_smoothing import intracortical_smoothing
+from ..lazy_import import lazy_import
+
+_attrs = {
+    "apply_fieldmap": ["apply_fieldmap"],
+    "deform_surface": ["deform_surface"],
+    "get_b0_orientation": ["get_b0_orientation"],
+    "get_curvature": ["get_curvature"],
+    "get_thickness": ["get_thickness"],
+    "heat_kernel_smoothing": ["heat_kernel_smoothing"],
+    "inflate_surf_mesh": ["inflate_surf_mesh"],
+    "make_mesh": ["make_mesh"],
+    "make_sphere": ["make_sphere"],
+    "match_vertex_number": ["match_vertex_number"],
+    "mesh_sampling": ["mesh_sampling"],
+    "remove_vertex_outliers": ["remove_vertex_outliers",
+                               "remove_vertex_outliers_mesh"],
+    "smooth_surface": ["smooth_surface"],
+    "surface_flattening": ["surface_flattening"],
+    "upsample_surf_mesh": ["upsample_surf_mesh"],
+    "extract_main_component": ["extract_main_component"],
+    "gradient": ["gradient"],
+    "intracortical_smoothing": ["intracortical_smoothing"],
+    "get_incidence_matrix": ["get_incidence_matrix"],
+}
+
+__getattr__, __dir__, __all__ = lazy_import(__name__, attrs=_attrs)
@@ -3,22 +3,50 @@
 # python standard library inputs
 import os
 import sys
-import datetime
-import shutil as sh
 
 # external inputs
 import numpy as np
 import nibabel as nb
 from nibabel.freesurfer.io import write_geometry, read_geometry
-from nipype.interfaces.freesurfer import SampleToSurface
 from nipype.interfaces.freesurfer import SmoothTessellation
-from gbb.utils import vox2ras
 from gbb.utils import remove_vertex
 
 # local inputs
 from ..io.get_filename import get_filename
-from ..io.mgh2nii import mgh2nii
-from ..utils.apply_affine_chunked import apply_affine_chunked
+from ..cmap.coordinate_mapping_proxy import CoordinateMappingProxy
+from ..mapping.get_sampling_matrix import get_sampling_matrix
+from ..mapping.sample_vertices import sample_vertices
+from ..utils.get_vox2ras_tkr import get_vox2ras_tkr
+
+
+def _get_regheader(img_source, img_orig):
+    """Returns the vox2ras transformation which maps voxel coordinates of the 
+    source volume to tkr space of the orig volume (mri_vol2surf --regheader)."""
+
+    vox2ras_tkr, _ = get_vox2ras_tkr(img_orig.affine, img_orig.shape)
+    vox2ras_tkr = np.dot(vox2ras_tkr, np.linalg.inv(img_orig.affine))
+
+    return np.dot(vox2ras_tkr, img_source.affine)
+
+
+def _load(img):
+    """Returns the image of a filename or the image itself if an image is
+    given."""
+
+    return nb.load(img) if isinstance(img, str) else img
+
+
+def _get_voxels(cmap_img, ind):
+    """Returns the first three components of a coordinate mapping at voxels
+    given by flat indices in fortran order. Coordinate mapping proxies compute
+    only the requested voxels."""
+
+    if isinstance(cmap_img.dataobj, CoordinateMappingProxy):
+        return cmap_img.dataobj.get_voxels(ind)
+
+    arr = np.asarray(cmap_img.dataobj)[:, :, :, :3]
+
+    return arr.reshape((-1, 3), order="F")[ind]
 
 
 def deform_surface(input_surf, input_orig, input_deform, input_target,
@@ -27,23 +55,27 @@ def deform_surface(input_surf, input_orig, input_deform, input_target,
     """Deform surface.
 
     This function deforms a surface mesh in freesurfer convention using a 
-    coordinate map containing voxel coordinates. The computation takes quite a 
-    while because in the case of removed vertices, i.e. if a mask is given as 
-    input, the remaining faces are reindexed.    
+    coordinate map containing voxel coordinates. All components of the 
+    coordinate mapping and the optional mask are sampled in-process at the 
+    vertex positions without writing intermediate files. Sampling follows 
+    freesurfer's `mri_vol2surf` with registration from header. The computation 
+    takes quite a while because in the case of removed vertices, i.e. if a mask 
+    is given as input, the remaining faces are reindexed.    
 
     Parameters
     ----------
     input_surf : str
         Surface mesh to be transformed.
-    input_orig : str
+    input_orig : str or niimg
         Freesurfer orig.mgz.
-    input_deform : str
-        Deformation (coordinate mapping).
-    input_target : str
+    input_deform : str or niimg
+        Deformation (coordinate mapping). Images with a
+        `CoordinateMappingProxy` as data object are not computed in full.
+    input_target : str or niimg
         Target volume.
     path_output : str
         Path where to save output.
-    input_mask : str, optional
+    input_mask : str or niimg, optional
         Mask volume. The default is None.
     interp_method : str, optional
         Interpolation method (nearest or trilinear). The default is "nearest".
@@ -53,7 +85,8 @@ def deform_surface(input_surf, input_orig, input_deform, input_target,
     flip_faces : bool, optional
         Reverse normal direction of mesh. The default is False.
     cleanup : bool, optional
-        Remove intermediate files. The default is True.
+        Not used anymore since no intermediate files are written. The default 
+        is True.
 
     Returns
     -------
@@ -61,36 +94,11 @@ def deform_surface(input_surf, input_orig, input_deform, input_target,
     
     """
 
-    # set freesurfer path environment
-    os.environ["SUBJECTS_DIR"] = path_output
-
-    # freesurfer subject
-    tmp1 = np.random.randint(0, 10, 5)
-    tmp1 = ''.join(str(i) for i in tmp1)
-    tmp2 = datetime.datetime.now().strftime("%S%f")
-    tmp_string = tmp1 + tmp2
-    sub = "tmp_" + tmp_string
-
     # make output folder
     if not os.path.exists(path_output):
         os.makedirs(path_output)
 
-    # mimic freesurfer folder structure (with some additional folder for 
-    # intermediate files)
-    path_sub = os.path.join(path_output, sub)
-    path_mri = os.path.join(path_sub, "mri")
-    path_surf = os.path.join(path_sub, "surf")
-
-    if not os.path.exists(path_sub):
-        os.makedirs(path_sub)
-    else:
-        raise FileExistsError("Temporary folder already exists!")
-
-    os.makedirs(path_mri)
-    os.makedirs(path_surf)
-
     # get filenames
-    _, name_orig, ext_orig = get_filename(input_orig)
     _, hemi, name_surf = get_filename(input_surf)
     name_surf = name_surf.replace(".", "")
 
@@ -98,80 +106,38 @@ def deform_surface(input_surf, input_orig, input_deform, input_target,
     if not hemi == "lh" and not hemi == "rh":
         sys.exit("Could not identify hemi from filename!")
 
-    # copy orig, cmap and input surface to mimicked freesurfer folders
-    sh.copyfile(input_surf, os.path.join(path_surf, hemi + ".source"))
-    if ext_orig != ".mgz":
-        mgh2nii(input_orig, path_mri, "mgz")
-        os.rename(os.path.join(path_mri, name_orig + ".mgz"),
-                  os.path.join(path_mri, "orig.mgz"))
-    else:
-        sh.copyfile(input_orig, os.path.join(path_mri, "orig.mgz"))
-
     # read surface geometry
     vtx, fac = read_geometry(input_surf)
 
     # get affine vox2ras-tkr transformation to target volume
-    vox2ras_tkr, _ = vox2ras(input_target)
-
-    # divide coordinate mapping into its x, y and z components
-    cmap_img = nb.load(input_deform)
-    cmap_img.header["dim"][0] = 3
-    cmap_img.header["dim"][4] = 1
-
-    # apply vox2ras transformation to coordinate mappings
-    cmap_array = cmap_img.get_fdata()
-    cmap_array = apply_affine_chunked(vox2ras_tkr, cmap_array)
-
-    components = ["x", "y", "z"]
-    vtx_new = np.zeros([len(vtx), 3])
-    for i in range(len(components)):
-        file_temp = os.path.join(path_mri, components[i] + "_deform.nii")
-        file_sampled = os.path.join(path_surf,
-                                    hemi + "." + components[i] + "_sampled.mgh")
-
-        # get target volume
-        temp_array = cmap_array[:, :, :, i]
-        temp_img = nb.Nifti1Image(temp_array, cmap_img.affine, cmap_img.header)
-        nb.save(temp_img, file_temp)
-
-        # mri_vol2surf
-        sampler = SampleToSurface()
-        sampler.inputs.subject_id = sub
-        sampler.inputs.reg_header = True
-        sampler.inputs.hemi = hemi
-        sampler.inputs.source_file = file_temp
-        sampler.inputs.surface = "source"
-        sampler.inputs.sampling_method = "point"
-        sampler.inputs.sampling_range = 0
-        sampler.inputs.sampling_units = "mm"
-        sampler.inputs.interp_method = interp_method
-        sampler.inputs.out_type = "mgh"
-        sampler.inputs.out_file = file_sampled
-        sampler.run()
-
-        data_img = nb.load(file_sampled)
-        vtx_new[:, i] = np.squeeze(data_img.get_fdata())
+    target_img = _load(input_target)
+    vox2ras_tkr, _ = get_vox2ras_tkr(target_img.affine, target_img.shape)
+
+    # sample all components of the coordinate mapping at once. Only voxels
+    # which contribute to the sampled vertices are read.
+    orig_img = _load(input_orig)
+    cmap_img = _load(input_deform)
+    vox2ras_cmap = _get_regheader(cmap_img, orig_img)
+    m = get_sampling_matrix(vtx, cmap_img.shape[:3], vox2ras_cmap,
+                            interp_method)
+    ind = np.unique(m.indices)
+    vtx_new = m[:, ind].dot(_get_voxels(cmap_img, ind))
+
+    # apply vox2ras transformation to sampled coordinates. The translation is 
+    # weighted by the row sums of the sampling matrix, which are 1 for vertices 
+    # within the volume and 0 otherwise, to keep a value of 0 for vertices 
+    # outside.
+    inside = np.asarray(m.sum(axis=1)).ravel()
+    vtx_new = np.dot(vtx_new, vox2ras_tkr[:3, :3].T)
+    vtx_new += inside[:, np.newaxis] * vox2ras_tkr[:3, 3]
 
     if input_mask:
-        file_background = os.path.join(path_surf, hemi + ".background.mgh")
-
-        # mri_vol2surf (background)
-        sampler = SampleToSurface()
-        sampler.inputs.subject_id = sub
-        sampler.inputs.reg_header = True
-        sampler.inputs.hemi = hemi
-        sampler.inputs.source_file = input_mask
-        sampler.inputs.surface = "source"
-        sampler.inputs.sampling_method = "point"
-        sampler.inputs.sampling_range = 0
-        sampler.inputs.sampling_units = "mm"
-        sampler.inputs.interp_method = "nearest"
-        sampler.inputs.out_type = "mgh"
-        sampler.inputs.out_file = file_background
-        sampler.run()
+        mask_img = _load(input_mask)
+        vox2ras_mask = _get_regheader(mask_img, orig_img)
 
         # get new indices
-        background_list = nb.load(file_background).get_fdata()
+        background_list = sample_vertices(vtx, np.asarray(mask_img.dataobj),
+                                          vox2ras_mask, "nearest")
         background_list = np.squeeze(background_list).astype(int)
 
         # only keep vertex indices within the slab
@@ -203,7 +169,3 @@ def deform_surface(input_surf, input_orig, input_deform, input_target,
         smooth.inputs.smoothing_iterations = smooth_iter
         smooth.inputs.disable_estimates = True
         smooth.run()
-
-    # delete intermediate files
-    if cleanup:
-        sh.rmtree(path_sub, ignore_errors=True)
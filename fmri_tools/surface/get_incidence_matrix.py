@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+# python standard library inputs
+import hashlib
+from collections import OrderedDict
+
+# external inputs
+import numpy as np
+from scipy.sparse import csr_matrix
+
+# cache of recently used incidence matrices
+_CACHE = OrderedDict()
+_CACHE_SIZE = 8
+
+
+def get_incidence_matrix(fac, n_vtx=None):
+    """Get incidence matrix.
+
+    This function computes the sparse face to vertex incidence matrix of a
+    triangular surface mesh. The matrix has the size (nvertex,nface) and each
+    entry with value 1 connects a vertex with one of its faces. Face-wise
+    quantities can then be scattered to vertices by a sparse matrix product.
+    Matrices of recently used meshes are cached by a hash of the face array.
+    Therefore, the returned matrix should not be modified in-place.
+
+    Parameters
+    ----------
+    fac : ndarray
+        Array of faces.
+    n_vtx : int, optional
+        Number of vertices. If not set, it is inferred from the largest vertex
+        index in the face array. The default is None.
+
+    Returns
+    -------
+    csr_matrix
+        Sparse incidence matrix.
+
+    """
+
+    fac = np.ascontiguousarray(fac)
+    if n_vtx is None:
+        n_vtx = np.max(fac) + 1
+
+    # look up cached matrix
+    key = hashlib.sha1(fac.view(np.uint8)).hexdigest()
+    key = (key, fac.shape, fac.dtype.str, int(n_vtx))
+    if key in _CACHE:
+        _CACHE.move_to_end(key)
+        return _CACHE[key]
+
+    n_fac = len(fac)
+    row = fac.ravel()
+    col = np.repeat(np.arange(n_fac), fac.shape[1])
+    data = np.ones(len(row), dtype=np.float64)
+    incidence = csr_matrix((data, (row, col)), shape=(n_vtx, n_fac))
+
+    # update cache
+    _CACHE[key] = incidence
+    if len(_CACHE) > _CACHE_SIZE:
+        _CACHE.popitem(last=False)
+
+    return incidence
@@ -13,7 +13,6 @@ from gbb.utils.vox2ras import vox2ras
 # local inputs
 from ..cmap.generate_coordinate_mapping import generate_coordinate_mapping
 from ..utils.resample_volume import resample_volume
-from ..utils.apply_affine_chunked import apply_affine_chunked
 
 
 def get_thickness(boundaries_in, ref_in, hemi, path_output, r=[0.4, 0.4, 0.4]):
@@ -59,8 +58,8 @@ def get_thickness(boundaries_in, ref_in, hemi, path_output, r=[0.4, 0.4, 0.4]):
     # get voxel to vertex ras coordinate transformation
     vox2ras_tkr, _ = vox2ras(os.path.join(path_output, "ref.nii"))
 
-    # apply transformation to cmap
-    ras_array = apply_affine_chunked(vox2ras_tkr, cmap.get_fdata())
+    # apply transformation to cmap (without computing the identity mapping)
+    ras_array = np.asarray(cmap.dataobj.transform(vox2ras_tkr))
 
     # split coordinates into single dimensions
     x_ras = nb.Nifti1Image(ras_array[:, :, :, 0], cmap.affine, cmap.header)
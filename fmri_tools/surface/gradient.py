@@ -4,6 +4,9 @@
 import numpy as np
 from numpy.linalg import norm
 
+# local inputs
+from ..surface.get_incidence_matrix import get_incidence_matrix
+
 
 def _face_area(v, f):
     """Helper function to compute face areas."""
@@ -40,22 +43,12 @@ def _face_normal(v, f):
 def _f2v(f, gf, a):
     """ Helper function to transform face- to vertex-wise expressions."""
 
-    nv = np.max(f) + 1  # number of vertices
-    nf = len(f)  # number of faces
-    gv = np.zeros((nv, 3))
-    magn = np.zeros(nv)
-    for i in range(nf):
-        gv[f[i, 0], :] += a[i] * gf[i, :]
-        gv[f[i, 1], :] += a[i] * gf[i, :]
-        gv[f[i, 2], :] += a[i] * gf[i, :]
-
-        magn[f[i, 0]] += a[i]
-        magn[f[i, 1]] += a[i]
-        magn[f[i, 2]] += a[i]
-
-    gv[:, 0] /= magn
-    gv[:, 1] /= magn
-    gv[:, 2] /= magn
+    # face to vertex incidence matrix
+    m = get_incidence_matrix(f)
+
+    # area weighted average of adjacent faces
+    magn = m.dot(a)
+    gv = m.dot(a[:, np.newaxis] * gf) / magn[:, np.newaxis]
 
     return gv
 
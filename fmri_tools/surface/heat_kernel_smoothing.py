@@ -2,7 +2,30 @@
 
 # external inputs
 import numpy as np
-from gbb.neighbor.nn_2d import nn_2d
+from scipy.sparse import csr_matrix, diags
+
+
+def _get_kernel(vtx, adjm, sigma):
+    """Helper function to compute the row-normalized heat kernel as sparse
+    matrix from the first order neighbors in the adjacency matrix."""
+
+    n_vertex = len(vtx)
+
+    # edges including the current vertex
+    adjm = csr_matrix(adjm, shape=(n_vertex, n_vertex)).tocoo()
+    edge = adjm.row != adjm.col
+    row = np.concatenate((np.arange(n_vertex), adjm.row[edge]))
+    col = np.concatenate((np.arange(n_vertex), adjm.col[edge]))
+
+    # heat kernel shape from squared distances
+    distance = np.sum((vtx[col] - vtx[row]) ** 2, axis=1)
+    weight = np.exp(-distance / (4 * sigma))
+    kernel = csr_matrix((weight, (row, col)), shape=(n_vertex, n_vertex))
+
+    # normalize kernel weights of each vertex
+    kernel = diags(1 / np.asarray(kernel.sum(axis=1)).ravel()).dot(kernel)
+
+    return kernel.tocsr()
 
 
 def heat_kernel_smoothing(vtx, data, adjm, sigma, n_smooth):
@@ -11,7 +34,9 @@ def heat_kernel_smoothing(vtx, data, adjm, sigma, n_smooth):
     This function performs heat kernel smoothing [1,2,3] on a triangle mesh. The 
     code is mainly adapted from the matlab code by Chung et al. [4]. The kernel 
     bandwidth corresponds to diffusion time in the heat equation [3]. The FWHM 
-    follows 4*sqrt(log 2*n_smooth*sigma) with the natural log.
+    follows 4*sqrt(log 2*n_smooth*sigma) with the natural log. The kernel is 
+    computed once as sparse matrix and applied in each iteration to all columns 
+    of the data array.
     
     If you use this code, please reference one of the following papers. The 
     details on the mathematical basis of of the algorithm can be found in these 
@@ -22,9 +47,10 @@ def heat_kernel_smoothing(vtx, data, adjm, sigma, n_smooth):
     vtx : ndarray
         Vertex points of surface mesh.
     data : ndarray
-        Array of vertex-wise sampled data points.
-    adjm : ndarray
-        Adjacency matrix.
+        Array of vertex-wise sampled data points of shape (vertices,) or 
+        (vertices, N), e.g. for multiple time points or layers.
+    adjm : csr_matrix
+        Sparse adjacency matrix.
     sigma : float
         Kernel bandwidth.
     n_smooth : int
@@ -33,7 +59,7 @@ def heat_kernel_smoothing(vtx, data, adjm, sigma, n_smooth):
     Returns
     -------
     res : ndarray
-        Array of vertex-wise smoothed data points.
+        Array of vertex-wise smoothed data points with the same shape as `data`.
 
     References
     -------
@@ -47,56 +73,12 @@ def heat_kernel_smoothing(vtx, data, adjm, sigma, n_smooth):
     
     """
     
-    # number of vertices
-    n_vertex = len(vtx)
-
-    # heat kernel shape
-    k_shape = lambda x, s: np.exp(-x / (4 * s)) / np.sum(np.exp(-x / (4 * s)))
-    
-    # get max degree (number of first order neighbors)
-    max_degree = 0
-    for i in range(n_vertex):
-        nn = nn_2d(i, adjm, 0)
-        degree = len(nn)
-        if degree > max_degree:
-            max_degree = degree
-    
     # heat kernel weight computation
-    neighbor = np.zeros((n_vertex, max_degree+1)).astype(int)  # including the current vertex
-    weight = np.zeros((n_vertex, max_degree+1))  # including the current vertex
-    for i in range(n_vertex):
-        
-        # get vertex neighbors
-        nn = nn_2d(i, adjm, 0)
-        degree = len(nn)
+    kernel = _get_kernel(vtx, adjm, sigma)
 
-        # get distance to vertex neighbors
-        distance = 0
-        for j in range(degree):
-            distance = np.append(distance,
-                                 np.sum((vtx[nn[j]] - vtx[i, :]) ** 2))
-            
-        # get heat kernel weighting for each neighbor
-        weight[i, :1+degree] = k_shape(distance, sigma)
-        
-        # get corresponding neighbor (add 1 because of dummy row)
-        neighbor[i, :1+degree] = np.append([i], nn) + 1
-
-    # add dummy row
-    data = np.append(1, data)
-    
     # iterative kernel smoothing
-    for i in range(n_smooth):
-    
-        # add weights
-        res = np.zeros_like(data)
-        for j in range(max_degree):
-            res[1:] += data[neighbor[:, j]] * weight[:, j]
-        
-        # initialize new data array
-        data = res.copy()
-    
-    # remove dummy row    
-    res = res[1:]
-    
+    res = np.asarray(data, dtype=np.float64)
+    for _ in range(n_smooth):
+        res = kernel.dot(res)
+
     return res
@@ -7,8 +7,10 @@ import subprocess
 
 # local inputs
 from ..io.get_filename import get_filename
+from ..io.result_cache import result_cache
 
 
+@result_cache
 def inflate_surf_mesh(file_in, file_out, n_iter):
     """Inflate surf mesh.
 
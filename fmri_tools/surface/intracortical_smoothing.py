@@ -2,16 +2,12 @@
 
 # python standard library inputs
 import os
-import datetime
 import subprocess
 import shutil as sh
-from shutil import copyfile
-
-# external inputs
-import numpy as np
 
 # local inputs
 from ..io.get_filename import get_filename
+from ..io.scratch_workspace import scratch_workspace, link_file
 
 
 def intracortical_smoothing(file_surf, file_overlay, file_out, tan_size=0, 
@@ -54,8 +50,6 @@ def intracortical_smoothing(file_surf, file_overlay, file_out, tan_size=0,
     ------
     ValueError
         If `file_out` has an invalid file extension.
-    FileExistsError
-        If `path_temp` already exists.
 
     Returns
     -------
@@ -82,57 +76,43 @@ def intracortical_smoothing(file_surf, file_overlay, file_out, tan_size=0,
         create_folder = 1
         os.makedirs(path_output)
     
-    # create temporary folder
-    tmp1 = np.random.randint(0, 10, 5)
-    tmp1 = ''.join(str(i) for i in tmp1)
-    tmp2 = datetime.datetime.now().strftime("%S%f")
-    tmp_string = tmp1 + tmp2
-    path_temp = os.path.join(path_output, "tmp_"+tmp_string)
-    path_surf = os.path.join(path_temp, "surf")
-    path_overlay = os.path.join(path_temp, "overlay")
-    
-    # make temporary folder
-    if not os.path.exists(path_temp):
-        os.mkdir(path_temp)
+    # workspace for intermediate files
+    path_scratch = None if cleanup else path_output
+    with scratch_workspace(path_scratch, cleanup) as path_temp:
+        path_surf = os.path.join(path_temp, "surf")
+        path_overlay = os.path.join(path_temp, "overlay")
         os.mkdir(path_surf)
         os.mkdir(path_overlay)
-    else:
-        raise FileExistsError("Temporary folder already exists!")
-    
-    # copy input files to temporary folder
-    for i, f in enumerate(file_surf):
-        name_tmp = "surf_"+str(i).zfill(4)
-        copyfile(f, os.path.join(path_surf, name_tmp))
-    
-    for i, f in enumerate(file_overlay):
-        name_tmp = "overlay_"+str(i).zfill(4)+ext_output
-        copyfile(f, os.path.join(path_overlay, name_tmp))
 
-    # unix command
-    command = [
-        'mris_smooth_intracortical', 
-        '--surf_dir', path_surf, 
-        '--surf_name', 'surf_*',
-        '--overlay_dir', path_overlay,
-        '--overlay_name', 'overlay_*.mgh',
-        '--output_dir', path_output,
-        '--output_name', name_output+ext_output,
-        '--tan-size', str(tan_size),
-        '--rad-size', str(rad_size),
-        '--rad-start', str(rad_start),
-        '--tan-weights', str(tan_weights)]
-    
-    command = ' '.join(command)
-    
-    # run smoothing
-    try:    
-        subprocess.run(command, check=True, shell=True)
-    except subprocess.CalledProcessError:
-        sh.rmtree(path_temp, ignore_errors=True)
-        if create_folder:
-            sh.rmtree(path_output, ignore_errors=True)
-        print("Intracortical smoothing failed!")
+        # link input files into workspace
+        for i, f in enumerate(file_surf):
+            name_tmp = "surf_"+str(i).zfill(4)
+            link_file(f, os.path.join(path_surf, name_tmp))
+
+        for i, f in enumerate(file_overlay):
+            name_tmp = "overlay_"+str(i).zfill(4)+ext_output
+            link_file(f, os.path.join(path_overlay, name_tmp))
+
+        # unix command
+        command = [
+            'mris_smooth_intracortical',
+            '--surf_dir', path_surf,
+            '--surf_name', 'surf_*',
+            '--overlay_dir', path_overlay,
+            '--overlay_name', 'overlay_*.mgh',
+            '--output_dir', path_output,
+            '--output_name', name_output+ext_output,
+            '--tan-size', str(tan_size),
+            '--rad-size', str(rad_size),
+            '--rad-start', str(rad_start),
+            '--tan-weights', str(tan_weights)]
         
-    # delete temporary files
-    if cleanup:
-        sh.rmtree(path_temp, ignore_errors=True)
+        command = ' '.join(command)
+
+        # run smoothing
+        try:
+            subprocess.run(command, check=True, shell=True)
+        except subprocess.CalledProcessError:
+            if create_folder:
+                sh.rmtree(path_output, ignore_errors=True)
+            print("Intracortical smoothing failed!")
@@ -3,9 +3,7 @@
 # python standard library inputs
 import os
 import sys
-import datetime
 import subprocess
-from shutil import copyfile
 
 # external inputs
 import numpy as np
@@ -13,6 +11,8 @@ from nibabel.freesurfer.io import read_geometry, write_geometry
 
 # local inputs
 from ..io.get_filename import get_filename
+from ..io.result_cache import result_cache
+from ..io.scratch_workspace import scratch_workspace
 from ..surface.inflate_surf_mesh import inflate_surf_mesh
 
 
@@ -35,6 +35,7 @@ def _pol2cart(r, phi, theta):
     return x, y, z
 
 
+@result_cache
 def make_sphere(file_in, file_out, n_inflate=100, radius=None):
     """Make sphere.
 
@@ -63,32 +64,25 @@ def make_sphere(file_in, file_out, n_inflate=100, radius=None):
     if not os.path.exists(path_output):
         os.makedirs(path_output)
     
-    # temporary file
-    tmp1 = np.random.randint(0, 10, 5)
-    tmp1 = ''.join(str(i) for i in tmp1)
-    tmp2 = datetime.datetime.now().strftime("%S%f")
-    tmp_string = tmp1 + tmp2
-    file_tmp = os.path.join(path_output, tmp_string)
-    
-    if os.path.exists(file_tmp):
-        raise FileExistsError("Temporary file already exists!")
+    # workspace for intermediate files
+    with scratch_workspace() as path_tmp:
 
-    # inflate surface mesh
-    if n_inflate:
-        inflate_surf_mesh(file_in, 
-                          file_tmp, 
-                          n_inflate)
-    else:
-        copyfile(file_in, file_tmp)
-    
-    # inflate surface
-    try:
-        subprocess.run(['mris_sphere', 
-                        '-q', 
-                        file_tmp, 
-                        file_out], check=True)
-    except subprocess.CalledProcessError:
-        sys.exit("Sphere computation failed!")
+        # inflate surface mesh
+        file_tmp = file_in
+        if n_inflate:
+            file_tmp = os.path.join(path_tmp, os.path.basename(file_in))
+            inflate_surf_mesh(file_in,
+                              file_tmp,
+                              n_inflate)
+
+        # inflate surface
+        try:
+            subprocess.run(['mris_sphere',
+                            '-q',
+                            file_tmp,
+                            file_out], check=True)
+        except subprocess.CalledProcessError:
+            sys.exit("Sphere computation failed!")
 
     # change radius      
     if radius:
@@ -98,5 +92,3 @@ def make_sphere(file_in, file_out, n_inflate=100, radius=None):
         vtx[:, 0], vtx[:, 1], vtx[:, 2] = _pol2cart(r, phi, theta)
         write_geometry(file_out, vtx, fac)
     
-    # remove temporary file
-    os.remove(file_tmp)
@@ -3,37 +3,53 @@
 # python standard library inputs
 import os
 import sys
-import datetime
-import shutil as sh
 
 # external inputs
 import numpy as np
 import nibabel as nb
-from sh import gunzip
 
 # local inputs
 from ..io.get_filename import get_filename
 from ..io.write_mgh import write_mgh
+from ..io.scratch_workspace import scratch_workspace
 from ..cmap.generate_coordinate_mapping import generate_coordinate_mapping
+from ..cmap.coordinate_mapping_proxy import CoordinateMappingProxy
 from ..utils.resample_volume import resample_volume
 from ..surface.deform_surface import deform_surface
 from ..mapping.map2surface import map2surface
 
 
-def _rescale_cmap(file_cmap, dim, dim_upsampled):
-    """Rescales and overwrites coordinate mapping if upsampled."""
+def _rescale_cmap(cmap, dim, dim_upsampled):
+    """Rescales coordinate mapping if upsampled."""
 
-    # load cmap
-    cmap = nb.load(file_cmap)
-    arr_cmap = cmap.get_fdata()
+    # get cmap
+    arr_cmap = cmap.get_fdata(dtype="float32")
 
     # rescale
     for i in range(cmap.header["dim"][4]):
         arr_cmap[:, :, :, i] = arr_cmap[:, :, :, i] / dim[i] * dim_upsampled[i]
 
-    # overwrite cmap
-    cmap = nb.Nifti1Image(arr_cmap, cmap.affine, cmap.header)
-    nb.save(cmap, file_cmap)
+    return nb.Nifti1Image(arr_cmap, cmap.affine, cmap.header)
+
+
+def _get_identity(img, img_upsampled):
+    """Returns the identity coordinate mapping of the input volume on the grid
+    of the upsampled volume, rescaled like `_rescale_cmap`. This is an affine
+    function of voxel indices and is therefore represented by a coordinate
+    mapping proxy which is only evaluated at sampled voxels."""
+
+    dim = np.array(img.shape[:3]) - 1
+    dim_upsampled = np.array(img_upsampled.shape[:3]) - 1
+
+    # upsampled voxel -> input voxel -> rescaled input voxel
+    affine = np.linalg.inv(img.affine).dot(img_upsampled.affine)
+    affine = np.diag(np.append(dim_upsampled / dim, 1)).dot(affine)
+
+    cmap = CoordinateMappingProxy(img_upsampled.shape[:3], affine)
+    header = nb.Nifti1Header()
+    header.set_data_dtype(cmap.dtype)
+
+    return nb.Nifti1Image(cmap, img_upsampled.affine, header)
 
 
 def mesh_sampling(surf_in, vol_in, write_output=False, path_output="",
@@ -67,7 +83,8 @@ def mesh_sampling(surf_in, vol_in, write_output=False, path_output="",
         Interpolation method if volume is upsampled. Possible arguments are NN, 
         Li, Cu and Bk. The default is "Cu".
     cleanup : bool, optional
-        Remove intermediate files. The default is True.
+        Remove intermediate files. If False, intermediate files are kept in a
+        temporary folder within the output folder. The default is True.
 
     Returns
     -------
@@ -80,25 +97,6 @@ def mesh_sampling(surf_in, vol_in, write_output=False, path_output="",
 
     """
 
-    # clean everything if no output is written
-    if not write_output:
-        path_output, _, _ = get_filename(vol_in)
-        cleanup = True
-
-    # make output folder
-    if not os.path.exists(path_output):
-        os.makedirs(path_output)
-
-    tmp1 = np.random.randint(0, 10, 5)
-    tmp1 = ''.join(str(i) for i in tmp1)
-    tmp2 = datetime.datetime.now().strftime("%S%f")
-    tmp_string = tmp1 + tmp2
-    path_tmp = os.path.join(path_output, "tmp_" + tmp_string)
-    if not os.path.exists(path_tmp):
-        os.makedirs(path_tmp)
-    else:
-        raise FileExistsError("Temporary folder already exists!")
-
     # get filenames
     _, hemi, name_mesh = get_filename(surf_in)
     name_mesh = name_mesh.replace(".", "")
@@ -108,81 +106,59 @@ def mesh_sampling(surf_in, vol_in, write_output=False, path_output="",
     if not hemi == "lh" and not hemi == "rh":
         sys.exit("Could not identify hemi from filename!")
 
-    # copy temporary vol
-    file_vol = os.path.join(path_tmp, name_vol + ext_vol)
-    sh.copy(vol_in, file_vol)
-
-    # unzip if necessary
-    if file_vol[-3:] == ".gz":
-        gunzip(file_vol)
-        file_vol = file_vol[:-3]
+    # make output folder
+    if write_output and not os.path.exists(path_output):
+        os.makedirs(path_output)
 
-    # get cmap
-    if source2target_in:
-        _, name_s2t, ext_s2t = get_filename(source2target_in)
-        file_s2t = os.path.join(path_tmp, name_s2t + ext_s2t)
-        sh.copy(source2target_in, file_s2t)
-    else:
-        name_s2t = "cmap_t2t"
-        ext_s2t = ".nii"
-        generate_coordinate_mapping(vol_in,
-                                    pad=0,
-                                    path_output=path_tmp,
-                                    suffix="t2t",
-                                    time=False,
-                                    write_output=True)
-        file_s2t = os.path.join(path_tmp, name_s2t + ext_s2t)
-
-    if file_s2t[-3:] == ".gz":
-        gunzip(file_s2t)
-        file_s2t = file_s2t[:-3]
-
-    # upsample volumes and rescale cmap
-    if r:
-        _, _, ext_vol = get_filename(file_vol)
-        _, _, ext_s2t = get_filename(file_s2t)
-
-        resample_volume(file_vol,
-                        os.path.join(path_tmp,
-                                     name_vol + "_upsampled" + ext_vol),
-                        dxyz=r,
-                        rmode=interp_upsample)
-
-        resample_volume(file_s2t,
-                        os.path.join(path_tmp,
-                                     name_s2t + "_upsampled" + ext_s2t),
-                        dxyz=r,
-                        rmode="Linear")
-
-        file_vol = os.path.join(path_tmp, name_vol + "_upsampled" + ext_vol)
-        file_s2t = os.path.join(path_tmp, name_s2t + "_upsampled" + ext_s2t)
-
-        _rescale_cmap(file_s2t,
-                      nb.load(vol_in).header["dim"][1:4] - 1,
-                      nb.load(file_vol).header["dim"][1:4] - 1)
-
-    # deform mesh
-    deform_surface(input_surf=surf_in,
-                   input_orig=file_s2t,
-                   input_deform=file_s2t,
-                   input_target=file_vol,
-                   path_output=path_tmp,
-                   input_mask=None,
-                   interp_method="trilinear",
-                   smooth_iter=0,
-                   flip_faces=False,
-                   cleanup=True)
-
-    # do mapping
-    file_def = os.path.join(path_tmp, hemi + "." + name_mesh + "_def")
-    arr, affine, header = map2surface(input_surf=file_def,
-                                      input_vol=file_vol,
-                                      write_output=False,
-                                      path_output=path_tmp,
-                                      interp_method=interp_method,
-                                      input_surf_target=None,
-                                      input_ind=None,
-                                      cleanup=True)
+    # intermediate files are only kept in the output folder if requested
+    path_scratch = None if cleanup or not write_output else path_output
+    with scratch_workspace(path_scratch, cleanup or not write_output) as path_tmp:
+
+        # get cmap
+        file_vol = vol_in
+        cmap = nb.load(source2target_in) if source2target_in else None
+
+        # upsample volumes and rescale cmap
+        if r:
+            file_vol = os.path.join(path_tmp,
+                                    name_vol + "_upsampled" + ext_vol)
+            vol = resample_volume(vol_in, file_vol, dxyz=r,
+                                  rmode=interp_upsample)
+
+            if cmap is None:
+                cmap = _get_identity(nb.load(vol_in), vol)
+            else:
+                cmap = resample_volume(cmap, dxyz=r, rmode="Linear")
+                cmap = _rescale_cmap(cmap,
+                                     nb.load(vol_in).header["dim"][1:4] - 1,
+                                     vol.header["dim"][1:4] - 1)
+
+        # an identity mapping is not computed before sampling
+        if cmap is None:
+            cmap = generate_coordinate_mapping(vol_in, pad=0)
+
+        # deform mesh
+        deform_surface(input_surf=surf_in,
+                       input_orig=cmap,
+                       input_deform=cmap,
+                       input_target=file_vol,
+                       path_output=path_tmp,
+                       input_mask=None,
+                       interp_method="trilinear",
+                       smooth_iter=0,
+                       flip_faces=False,
+                       cleanup=True)
+
+        # do mapping
+        file_def = os.path.join(path_tmp, hemi + "." + name_mesh + "_def")
+        arr, affine, header = map2surface(input_surf=file_def,
+                                          input_vol=file_vol,
+                                          write_output=False,
+                                          path_output=path_tmp,
+                                          interp_method=interp_method,
+                                          input_surf_target=None,
+                                          input_ind=None,
+                                          cleanup=True)
 
     if write_output:
         _, name_vol, _ = get_filename(file_vol)
@@ -190,10 +166,4 @@ def mesh_sampling(surf_in, vol_in, write_output=False, path_output="",
                                 hemi + "." + name_vol + "_" + name_mesh + ".mgh")
         write_mgh(file_out, arr, affine, header)
 
-    # delete intermediate files
-    if cleanup:
-        sh.rmtree(path_tmp, ignore_errors=True)
-        if not len(os.listdir(path_output)):
-            sh.rmtree(path_output)
-
     return arr, affine, header
@@ -8,6 +8,59 @@ import numpy as np
 from nibabel.freesurfer.io import read_geometry, write_geometry
     
 
+def remove_vertex_outliers_mesh(vtx, fac, ind, n=5):
+    """Remove vertex outliers mesh.
+
+    This function is the in-memory version of `remove_vertex_outliers`. Outlier
+    vertices are removed from vertex and index arrays by one boolean mask.
+    Faces containing outliers are removed and the remaining faces are
+    reindexed in one pass using the cumulative sum of the mask.
+
+    Parameters
+    ----------
+    vtx : ndarray
+        Array of vertices.
+    fac : ndarray
+        Array of faces.
+    ind : ndarray
+        Corresponding index list.
+    n : float, optional
+        Threshold parameter. The default is 5.
+
+    Returns
+    -------
+    vtx : ndarray
+        Remaining vertices.
+    fac : ndarray
+        Remaining faces.
+    ind : ndarray
+        Remaining indices.
+
+    """
+
+    # euclidean distance to geometric center
+    vtx_dist = np.sqrt(np.sum((vtx - np.mean(vtx, axis=0)) ** 2, 1))
+
+    # distance threshold
+    vtx_dist_threshold = np.mean(vtx_dist) + n * np.std(vtx_dist)
+
+    # vertices to keep
+    keep = vtx_dist <= vtx_dist_threshold
+
+    # new index of each kept vertex
+    ind_new = np.cumsum(keep) - 1
+
+    # remove outlier faces and update face numbering
+    fac = fac[np.all(keep[fac], axis=1)]
+    fac = ind_new[fac].astype(fac.dtype)
+
+    # remove outliers in vertex and ind
+    vtx = vtx[keep]
+    ind = ind[keep]
+
+    return vtx, fac, ind
+
+
 def remove_vertex_outliers(input_surf, input_ind, n=5, overwrite=True):
     """Remove vertex outliers.
     
@@ -25,7 +78,7 @@ def remove_vertex_outliers(input_surf, input_ind, n=5, overwrite=True):
         Path to the input surface mesh.
     input_ind : str
         Path to the corresponding index list (with .txt extension).
-    n : TYPE, float
+    n : float, optional
         Threshold parameter. The default is 5.
     overwrite : bool, optional
         Overwrite input surface. The default is True.
@@ -42,54 +95,8 @@ def remove_vertex_outliers(input_surf, input_ind, n=5, overwrite=True):
     # load index file
     ind = np.loadtxt(input_ind)
 
-    # get geometry center
-    x_mean = np.sum(vtx[:, 0]) / len(vtx[:, 0])
-    y_mean = np.sum(vtx[:, 1]) / len(vtx[:, 1])
-    z_mean = np.sum(vtx[:, 2]) / len(vtx[:, 2])
-
-    # euclidean distance to geometric center
-    vtx_dist = np.zeros_like(vtx)
-    vtx_dist[:, 0] = (vtx[:, 0] - x_mean) ** 2
-    vtx_dist[:, 1] = (vtx[:, 1] - y_mean) ** 2
-    vtx_dist[:, 2] = (vtx[:, 2] - z_mean) ** 2
-    vtx_dist = np.sqrt(np.sum(vtx_dist, 1))
-
-    # mean and std distance
-    vtx_dist_mean = np.mean(vtx_dist)
-    vtx_dist_std = np.std(vtx_dist)
-
-    # distance threshold
-    vtx_dist_threshold = vtx_dist_mean + n * vtx_dist_std
-
-    # sort faces
-    fac_old = fac.copy()
-    fac_outlier = np.zeros_like(fac)
-    n_outlier = np.zeros(len(vtx))
-    c_step = 0
-    n_step = [10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
-    for i in range(len(vtx)):    
-        if vtx_dist[i] > vtx_dist_threshold:
-            row, col = np.where(fac_old == i)
-            fac_outlier[row, col] = 1  # remember which faces to remove
-            n_outlier[i] = 1  # remember which vertices to remove
-            fac_temp = fac.copy()  # update face numbering
-            fac_temp[fac_old >= i] = -1
-            fac_temp[fac_temp != -1] = 0
-            fac += fac_temp
-
-        # print status
-        counter = np.floor(i / len(vtx) * 100).astype(int)
-        if counter == n_step[c_step]:
-            print("remove outliers: "+str(counter)+" %")
-            c_step += 1
-
-    # remove outlier faces
-    fac_outlier = np.sum(fac_outlier, 1)
-    fac = fac[fac_outlier == 0]
-
-    # remove outliers in vertex and ind
-    vtx = vtx[n_outlier == 0]
-    ind = ind[n_outlier == 0]
+    # remove outliers
+    vtx, fac, ind = remove_vertex_outliers_mesh(vtx, fac, ind, n)
 
     # write output
     if overwrite:
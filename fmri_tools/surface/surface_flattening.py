@@ -2,11 +2,10 @@
 
 # python standard library inputs
 import os
-import datetime
 import shutil as sh
 
-# external inputs
-import numpy as np
+# local inputs
+from ..io.scratch_workspace import scratch_workspace, link_file
 
 
 def surface_flattening(file_ref, file_patch, path_output, cleanup=True):
@@ -34,50 +33,36 @@ def surface_flattening(file_ref, file_patch, path_output, cleanup=True):
     
     """
     
-    # create temporary folder
-    tmp1 = np.random.randint(0, 10, 5)
-    tmp1 = ''.join(str(i) for i in tmp1)
-    tmp2 = datetime.datetime.now().strftime("%S%f")
-    tmp_string = tmp1 + tmp2
-    path_temp = os.path.join(os.path.dirname(file_ref), "tmp_" + tmp_string)
-    
-    # make temporary folder
-    if not os.path.exists(path_temp):
-        os.mkdir(path_temp)
-    else:
-        raise FileExistsError("Temporary folder already exists!")
-
-    # change to temporary folder
-    cwd = os.getcwd()
-    os.chdir(path_temp)
-    
     # divide patch basename
     hemi = os.path.splitext(os.path.splitext(os.path.splitext(os.path.basename(file_patch))[0])[0])[0]
     name_patch = os.path.splitext(os.path.splitext(os.path.splitext(os.path.basename(file_patch))[0])[0])[1]
-    
-    # copy reference file and path into temporary folder
-    sh.copy2(file_ref, os.path.join(path_temp, hemi + ".smoothwm"))
-    sh.copy(file_patch, os.path.basename(file_patch))
-    
-    # surface flattening
-    w = 0  # write out the surface every number of iterations.
-    s = 20  # size of neighbourhood to be used in the optimization
-    n = 7  # number of vertices at each distance to be used in the optimization
-    os.system("mris_flatten" +
-              " -w " + str(w) +
-              " -distances " + str(s) + " " + str(n) +
-              " " + hemi + name_patch + ".patch.3d" +
-              " " + hemi + name_patch + ".patch.flat")
-       
-    # copy output
-    sh.copy2(os.path.join(path_temp, hemi + name_patch + ".patch.flat"),
-             os.path.join(path_output, hemi + name_patch + ".patch.flat"))
-    sh.copy2(os.path.join(path_temp, hemi + name_patch + ".patch.flat.out"),
-             os.path.join(path_output, hemi + name_patch + ".patch.flat.out"))
-    
-    # change to old folder
-    os.chdir(cwd)
-    
-    # delete temporary files
-    if cleanup:
-        sh.rmtree(path_temp, ignore_errors=True)
+
+    # workspace for intermediate files
+    path_scratch = None if cleanup else os.path.dirname(file_ref)
+    with scratch_workspace(path_scratch, cleanup) as path_temp:
+
+        # link reference file and patch into workspace
+        link_file(file_ref, os.path.join(path_temp, hemi + ".smoothwm"))
+        link_file(file_patch, os.path.join(path_temp,
+                                           os.path.basename(file_patch)))
+
+        # surface flattening
+        w = 0  # write out the surface every number of iterations.
+        s = 20  # size of neighbourhood to be used in the optimization
+        n = 7  # number of vertices at each distance to be used in the optimization
+        cwd = os.getcwd()
+        os.chdir(path_temp)
+        try:
+            os.system("mris_flatten" +
+                      " -w " + str(w) +
+                      " -distances " + str(s) + " " + str(n) +
+                      " " + hemi + name_patch + ".patch.3d" +
+                      " " + hemi + name_patch + ".patch.flat")
+        finally:
+            os.chdir(cwd)
+
+        # copy output
+        sh.copy2(os.path.join(path_temp, hemi + name_patch + ".patch.flat"),
+                 os.path.join(path_output, hemi + name_patch + ".patch.flat"))
+        sh.copy2(os.path.join(path_temp, hemi + name_patch + ".patch.flat.out"),
+                 os.path.join(path_output, hemi + name_patch + ".patch.flat.out"))
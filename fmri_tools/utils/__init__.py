@@ -2,24 +2,32 @@
 """Python package for for analysis of high-resolution fMRI data."""
 
 # local inputs
-from .get_mean import get_mean
-from .get_mean4d import get_mean4d
-from .get_std import get_std
-from .get_tsnr import get_tsnr
-from .get_laminar_profile import get_laminar_profile
-from .get_acorr import get_acorr
-from .get_fft import get_fft
-from .multiply_images import multiply_images
-from .volume_threshold import volume_threshold
-from .get_gaussian import get_gaussian
-from .get_mip import get_mip
-from .get_surface_voxel import get_surface_voxel
-from .get_rf_pulse_bw import get_rf_pulse_bw
-from .get_series import get_series
-from .get_bandpass_filter import get_bandpass_filter
-from .average_layer import average_layer
-from .check_trigger import check_trigger
-from .resample_volume import resample_volume
-from .regrid_time_series import *
-from .remove_nans import remove_nans
-from .apply_affine_chunked import apply_affine_chunked
+from ..lazy_import import lazy_import
+
+_attrs = {
+    "get_mean": ["get_mean"],
+    "get_mean4d": ["get_mean4d"],
+    "get_std": ["get_std"],
+    "get_tsnr": ["get_tsnr"],
+    "get_laminar_profile": ["get_laminar_profile"],
+    "get_acorr": ["get_acorr"],
+    "get_fft": ["get_fft"],
+    "multiply_images": ["multiply_images"],
+    "volume_threshold": ["volume_threshold"],
+    "get_gaussian": ["get_gaussian"],
+    "get_mip": ["get_mip"],
+    "get_surface_voxel": ["get_surface_voxel"],
+    "get_rf_pulse_bw": ["get_rf_pulse_bw"],
+    "get_series": ["get_series"],
+    "get_bandpass_filter": ["get_bandpass_filter"],
+    "average_layer": ["average_layer"],
+    "check_trigger": ["check_trigger"],
+    "resample_volume": ["resample_volume"],
+    "regrid_time_series": ["regrid_time_series", "regrid_time_series_afni"],
+    "remove_nans": ["remove_nans"],
+    "apply_affine_chunked": ["apply_affine_chunked"],
+    "get_vox2ras_tkr": ["get_vox2ras_tkr"],
+    "get_spline_matrix": ["get_spline_matrix"],
+}
+
+__getattr__, __dir__, __all__ = lazy_import(__name__, attrs=_attrs)
@@ -2,17 +2,20 @@
 
 # python standard library inputs
 import os
-import copy
 
 # external inputs
 import numpy as np
 import nibabel as nb
 
 
-def get_mean(file_in, path_output, name_output, method="mean"):
+def get_mean(file_in, path_output, name_output, method="mean", chunk_size=8):
     """Get mean.
 
-    This function computes the mean image of one or more time series.
+    This function computes the mean image of one or more time series. Time
+    series are read slab-wise (along the third dimension) from memory-mapped
+    image proxies, i.e., only a few slices of all time points are held in memory
+    at once. The mean is accumulated over runs. For the median, all time points
+    of one slab are collected from all runs and the exact median is computed.
 
     Parameters
     ----------
@@ -24,11 +27,13 @@ def get_mean(file_in, path_output, name_output, method="mean"):
         Output file name without file extension.
     method : str, optional
         Can be either mean or median. The default is "mean".
+    chunk_size : int, optional
+        Number of slices which are read at once. The default is 8.
 
     Raises
     ------
     ValueError
-        If `method` is invalid.
+        If `method` is invalid or if time series have different dimensions.
 
     Returns
     -------
@@ -36,55 +41,43 @@ def get_mean(file_in, path_output, name_output, method="mean"):
 
     """
 
+    if method not in ["mean", "median"]:
+        raise ValueError("Choose a valid mean type!")
+
     # make subfolders
     if not os.path.exists(path_output):
         os.makedirs(path_output)
 
-    if len(np.shape(file_in)) > 0:
-
-        # get dimensions
-        data_img = nb.load(file_in[0])
-
-        x_size = data_img.header["dim"][1]
-        y_size = data_img.header["dim"][2]
-        z_size = data_img.header["dim"][3]
-
-        t_size = 0
-        for i in range(len(file_in)):
-            data_img = nb.load(file_in[i])
-            t_size += data_img.header["dim"][4]
-
-        data_all_array = np.zeros([x_size, y_size, z_size, t_size])
-        t_start = 0
-        for i in range(len(file_in)):
-            data_img = nb.load(file_in[i])
-            data_array = data_img.get_fdata()
-            t_end = data_img.header["dim"][4] + t_start
-            data_all_array[:, :, :, t_start:t_end] = data_array
-            t_start = copy.deepcopy(t_end)
-
-    else:
-
-        # load data
-        data_img = nb.load(file_in)
-        data_all_array = data_img.get_fdata()
-
-    # calculate mean
-    if method == "mean":
-        data_mean_array = np.mean(data_all_array, axis=3)
-    elif method == "median":
-        data_mean_array = np.median(data_all_array, axis=3)
-    else:
-        raise ValueError("Choose a valid mean type!")
-
-    # write output
-    if len(np.shape(file_in)) > 0:
-        data_img = nb.load(file_in[0])
-    else:
-        data_img = nb.load(file_in)
-    data_img.header["dim"][0] = 3
-    data_img.header["dim"][4] = 1
+    # load time series without reading data
+    if isinstance(file_in, str):
+        file_in = [file_in]
+    data_img = [nb.load(f) for f in file_in]
+
+    dims = data_img[0].shape[:3]
+    if any(d.shape[:3] != dims for d in data_img):
+        raise ValueError("Time series have different dimensions!")
+
+    # calculate mean slab-wise
+    data_mean_array = np.zeros(dims)
+    for z0 in range(0, dims[2], chunk_size):
+        z1 = min(z0 + chunk_size, dims[2])
+        slab = [np.asarray(d.dataobj[:, :, z0:z1, ...],
+                           dtype=np.float32).reshape(dims[:2] + (z1 - z0, -1))
+                for d in data_img]
+
+        if method == "mean":
+            n_time = sum(s.shape[3] for s in slab)
+            data_mean_array[:, :, z0:z1] = np.sum(
+                [np.sum(s, axis=3, dtype=np.float64) for s in slab],
+                axis=0) / n_time
+        else:
+            data_mean_array[:, :, z0:z1] = np.median(np.concatenate(slab,
+                                                                    axis=3),
+                                                     axis=3)
 
     # write mean image
-    mean_img = nb.Nifti1Image(data_mean_array, data_img.affine, data_img.header)
+    header = data_img[0].header.copy()
+    header["dim"][0] = 3
+    header["dim"][4] = 1
+    mean_img = nb.Nifti1Image(data_mean_array, data_img[0].affine, header)
     nb.save(mean_img, os.path.join(path_output, "mean_" + name_output + ".nii"))
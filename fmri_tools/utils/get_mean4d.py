@@ -8,10 +8,15 @@ import numpy as np
 import nibabel as nb
 
 
-def get_mean4d(file_in, path_output="", name_output="", write_output=False):
+def get_mean4d(file_in, path_output="", name_output="", write_output=False,
+               chunk_size=8):
     """Get mean 4D.
 
-    This function computes the mean time series of one or more time series.    
+    This function computes the mean time series of one or more time series.
+    Time series are read slab-wise (along the third dimension) from
+    memory-mapped image proxies and accumulated. Therefore, only the output
+    array and a few slices of one run are held in memory at once. The output
+    array is stored in single precision.
 
     Parameters
     ----------
@@ -23,6 +28,13 @@ def get_mean4d(file_in, path_output="", name_output="", write_output=False):
         Output file name without file extension. The default is "".
     write_output : bool, optional
         Write nifti volume. The default is False.
+    chunk_size : int, optional
+        Number of slices which are read at once. The default is 8.
+
+    Raises
+    ------
+    ValueError
+        If time series have different dimensions.
 
     Returns
     -------
@@ -36,17 +48,27 @@ def get_mean4d(file_in, path_output="", name_output="", write_output=False):
         if not os.path.exists(path_output):
             os.makedirs(path_output)
 
-    # get dimensions
-    data_img = nb.load(file_in[0])
+    # load time series without reading data
+    data_img = [nb.load(f) for f in file_in]
+
+    dims = data_img[0].shape
+    if any(d.shape != dims for d in data_img):
+        raise ValueError("Time series have different dimensions!")
 
-    res_array = np.zeros_like(data_img.get_fdata())
-    for i in range(len(file_in)):
-        res_array += nb.load(file_in[i]).get_fdata()
+    # accumulate time series slab-wise
+    res_array = np.zeros(dims, dtype=np.float32)
+    for z0 in range(0, dims[2], chunk_size):
+        z1 = min(z0 + chunk_size, dims[2])
+        slab = np.zeros(res_array[:, :, z0:z1].shape)
+        for d in data_img:
+            slab += np.asarray(d.dataobj[:, :, z0:z1, ...])
 
-    res_array = res_array / len(file_in)
+        res_array[:, :, z0:z1] = slab / len(data_img)
 
     # write mean time series
-    output = nb.Nifti1Image(res_array, data_img.affine, data_img.header)
+    header = data_img[0].header.copy()
+    header.set_data_dtype(np.float32)
+    output = nb.Nifti1Image(res_array, data_img[0].affine, header)
     if write_output:
         nb.save(output,
                 os.path.join(path_output, "mean_" + name_output + ".nii"))
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+# external inputs
+import numpy as np
+from scipy.interpolate import CubicSpline
+
+
+def get_spline_matrix(t_old, t_new):
+    """Get spline matrix.
+
+    This function computes the linear operator of cubic spline interpolation
+    from an old to a new time grid. Since the interpolating spline depends
+    linearly on the data points, interpolation of many time series which share
+    the same time grid reduces to one matrix product with the returned matrix.
+    The spline uses not-a-knot boundary conditions and is therefore identical to
+    an interpolating spline of degree 3 from `InterpolatedUnivariateSpline`.
+    Points outside of the old time grid are extrapolated.
+
+    Parameters
+    ----------
+    t_old : ndarray
+        Time points of the input data.
+    t_new : ndarray
+        Time points of the interpolated data.
+
+    Returns
+    -------
+    ndarray
+        Interpolation matrix of shape (len(t_new), len(t_old)).
+
+    """
+
+    # interpolate unit impulses
+    spline = CubicSpline(t_old, np.eye(len(t_old)), axis=0,
+                         bc_type="not-a-knot")
+
+    return spline(t_new)
@@ -2,17 +2,20 @@
 
 # python standard library inputs
 import os
-import copy
 
 # external inputs
 import numpy as np
 import nibabel as nb
 
 
-def get_std(file_in, path_output, name_output, set_outlier=None):
+def get_std(file_in, path_output, name_output, set_outlier=None, chunk_size=8):
     """Get std.
 
-    This function computes the standard deviation of one or more time series.    
+    This function computes the standard deviation of one or more time series.
+    Time series are read slab-wise (along the third dimension) from
+    memory-mapped image proxies. Mean and sum of squared deviations of each
+    run are merged with the parallel variant of Welford's algorithm. Therefore,
+    only a few slices of one run are held in memory at once.
 
     Parameters
     ----------
@@ -24,6 +27,13 @@ def get_std(file_in, path_output, name_output, set_outlier=None):
         Output file name without file extension.
     set_outlier : float, optional
         Can be nan, zero or None. The default is None.
+    chunk_size : int, optional
+        Number of slices which are read at once. The default is 8.
+
+    Raises
+    ------
+    ValueError
+        If time series have different dimensions.
 
     Returns
     -------
@@ -35,51 +45,45 @@ def get_std(file_in, path_output, name_output, set_outlier=None):
     if not os.path.exists(path_output):
         os.makedirs(path_output)
 
-    if len(np.shape(file_in)) > 0:
-
-        # get dimensions
-        data_img = nb.load(file_in[0])
-
-        x_size = data_img.header["dim"][1]
-        y_size = data_img.header["dim"][2]
-        z_size = data_img.header["dim"][3]
-
-        t_size = 0
-        for i in range(len(file_in)):
-            data_img = nb.load(file_in[i])
-            t_size += data_img.header["dim"][4]
-
-        data_all_array = np.zeros([x_size, y_size, z_size, t_size])
-        t_start = 0
-        for i in range(len(file_in)):
-            data_img = nb.load(file_in[i])
-            data_array = data_img.get_fdata()
-            t_end = data_img.header["dim"][4] + t_start
-            data_all_array[:, :, :, t_start:t_end] = data_array
-            t_start = copy.deepcopy(t_end)
-
-    else:
-
-        # load data
-        data_img = nb.load(file_in)
-        data_all_array = data_img.get_fdata()
-
-    # calculate std
-    data_std_array = np.std(data_all_array, axis=3)
+    # load time series without reading data
+    if isinstance(file_in, str):
+        file_in = [file_in]
+    data_img = [nb.load(f) for f in file_in]
+
+    dims = data_img[0].shape[:3]
+    if any(d.shape[:3] != dims for d in data_img):
+        raise ValueError("Time series have different dimensions!")
+
+    # calculate std slab-wise
+    data_std_array = np.zeros(dims)
+    for z0 in range(0, dims[2], chunk_size):
+        z1 = min(z0 + chunk_size, dims[2])
+        n = 0
+        mean = 0
+        m2 = 0
+        for d in data_img:
+            slab = np.asarray(d.dataobj[:, :, z0:z1, ...], dtype=np.float64)
+            slab = slab.reshape(dims[:2] + (z1 - z0, -1))
+
+            # merge run statistics
+            n_run = slab.shape[3]
+            mean_run = np.mean(slab, axis=3)
+            m2_run = np.sum((slab - mean_run[..., np.newaxis]) ** 2, axis=3)
+            delta = mean_run - mean
+            mean = mean + delta * n_run / (n + n_run)
+            m2 = m2 + m2_run + delta ** 2 * n * n_run / (n + n_run)
+            n += n_run
+
+        data_std_array[:, :, z0:z1] = np.sqrt(m2 / n)
 
     if set_outlier == "nan":
         data_std_array[data_std_array == 0] = np.nan  # set zeroes to nan
     elif set_outlier == "zero":
         data_std_array[data_std_array == 0] = 0
 
-    # write output
-    if len(np.shape(file_in)) > 0:
-        data_img = nb.load(file_in[0])
-    else:
-        data_img = nb.load(file_in)
-    data_img.header["dim"][0] = 3
-    data_img.header["dim"][4] = 1
-
-    # write mean image
-    mean_img = nb.Nifti1Image(data_std_array, data_img.affine, data_img.header)
-    nb.save(mean_img, os.path.join(path_output, "std_" + name_output + ".nii"))
+    # write std image
+    header = data_img[0].header.copy()
+    header["dim"][0] = 3
+    header["dim"][4] = 1
+    std_img = nb.Nifti1Image(data_std_array, data_img[0].affine, header)
+    nb.save(std_img, os.path.join(path_output, "std_" + name_output + ".nii"))
@@ -4,17 +4,18 @@
 import os
 
 # external inputs
-import numpy as np
 import nibabel as nb
 
 # local inputs
 from ..io.get_filename import get_filename
+from ..processing.get_temporal_statistics import get_temporal_statistics
 
 
 def get_tsnr(file_in, tsnr_max=200, write_output=False, path_output=""):
     """Get tSNR.
     
-    This function computes the tsnr of one time series.
+    This function computes the tsnr of one time series. The time series is
+    streamed slab-wise (see `get_temporal_statistics`).
 
     Parameters
     ----------
@@ -42,29 +43,21 @@ def get_tsnr(file_in, tsnr_max=200, write_output=False, path_output=""):
     # get filename
     _, file, ext = get_filename(file_in)
 
-    # load time series
-    data_img = nb.load(file_in)
-    data_array = data_img.get_fdata()
-    
-    # get mean and std
-    data_mean_array = np.mean(data_array, axis=3)
-    data_std_array = np.std(data_array, axis=3)
-    data_std_array[data_std_array == 0] = np.nan  # set zeroes to nan
-    
     # get tsnr of time series
-    data_tsnr_array = data_mean_array / data_std_array
-    data_tsnr_array[np.isnan(data_tsnr_array)] = 0
-    
+    data_img = nb.load(file_in)
+    data_tsnr_array = get_temporal_statistics(data_img)["tsnr"]
+
     # threshold tsnr
     if tsnr_max:
         data_tsnr_array[data_tsnr_array > tsnr_max] = tsnr_max
     
     # write output    
     if write_output:
-        data_img.header["dim"][0] = 3
-        data_img.header["dim"][4] = 1
+        header = data_img.header.copy()
+        header["dim"][0] = 3
+        header["dim"][4] = 1
 
-        data_img = nb.Nifti1Image(data_tsnr_array, data_img.affine, data_img.header)
+        data_img = nb.Nifti1Image(data_tsnr_array, data_img.affine, header)
         nb.save(data_img, os.path.join(path_output, "tsnr_"+file+ext))
     
     return data_tsnr_array
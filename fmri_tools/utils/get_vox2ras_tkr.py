@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+# external inputs
+import numpy as np
+
+
+def get_vox2ras_tkr(affine, dims):
+    """Get vox2ras-tkr.
+
+    This function computes the transformation between voxel space and
+    freesurfer vertex RAS (tkr) coordinate system from the affine
+    transformation matrix and the spatial dimensions of a volume. The result is
+    the same matrix which is returned by `mri_info --vox2ras-tkr`, i.e., the
+    rotation and scaling part of the scanner affine is kept and the volume
+    center is shifted to the origin. Transformations for both directions are
+    returned.
+
+    Parameters
+    ----------
+    affine : ndarray
+        Affine transformation matrix (vox2ras) of the volume.
+    dims : list
+        Number of voxels along the first three dimensions.
+
+    Returns
+    -------
+    vox2ras_tkr : ndarray
+        Transformation matrix from voxel to ras space.
+    ras2vox_tkr : ndarray
+        Transformation matrix from ras to voxel space.
+
+    """
+
+    # rotation and scaling part of the affine
+    mdc = np.asarray(affine, dtype=np.float64)[:3, :3]
+
+    # volume center in voxel coordinates
+    pcrs_c = np.asarray(dims[:3], dtype=np.float64) / 2
+
+    vox2ras_tkr = np.eye(4)
+    vox2ras_tkr[:3, :3] = mdc
+    vox2ras_tkr[:3, 3] = -mdc.dot(pcrs_c)
+    ras2vox_tkr = np.linalg.inv(vox2ras_tkr)
+
+    return vox2ras_tkr, ras2vox_tkr
@@ -7,18 +7,20 @@ import os
 import numpy as np
 import nibabel as nb
 from sh import gunzip
-from scipy.interpolate import InterpolatedUnivariateSpline as Interp
 
 # local inputs
 from ..io.get_filename import get_filename
+from ..utils.get_spline_matrix import get_spline_matrix
 
 
 def regrid_time_series(file_in, path_output, tr_old, tr_new, t_start=0):
     """Regrid time series.
 
-    This function interpolates the time series onto a new time grid using cubic 
-    interpolation. Only for writing the new TR in the header of the output time 
-    series, AFNI has to be included in the search path.    
+    This function interpolates the time series onto a new time grid using cubic
+    interpolation. All voxels share the same time grid and are interpolated
+    slice by slice from the memory-mapped time series by one matrix product.
+    Only for writing the new TR in the header of the output time series, AFNI
+    has to be included in the search path.
 
     Parameters
     ----------
@@ -66,27 +68,26 @@ def regrid_time_series(file_in, path_output, tr_old, tr_new, t_start=0):
         t_new_append = -tr_new
     t_new = np.append(t_new_append, t_new)
 
-    # load array with appended volumes
-    n_append = int(tr_append / tr_old)
-    data_array = np.zeros((nx, ny, nz, nt + 2 * n_append))
-    data_array[:, :, :, n_append:-n_append] = data.get_fdata()
-    for i in range(n_append):
-        data_array[:, :, :, i] = data.get_fdata()[:, :, :, 0]
-        data_array[:, :, :, -(i + 1)] = data.get_fdata()[:, :, :, -1]
+    # output volumes without appended volumes
+    t_new = t_new[(t_new >= 0) & (t_new < tt)]
+    spline_matrix = get_spline_matrix(t_old, t_new)
 
     # temporal interpolation
-    data_array_regrid = np.zeros((nx, ny, nz, len(t_new)))
-    for x in range(nx):
-        for y in range(ny):
-            for z in range(nz):
-                cubic_interper = Interp(t_old, data_array[x, y, z, :], k=3)
-                data_array_regrid[x, y, z, :] = cubic_interper(t_new)
-
-    # delete appended volumes
-    vols_keep1 = t_new >= 0
-    vols_keep2 = t_new < tt
-    vols_keep = vols_keep1 * vols_keep2
-    data_array_regrid = data_array_regrid[:, :, :, vols_keep]
+    n_append = int(tr_append / tr_old)
+    data_array_regrid = np.zeros((nx, ny, nz, len(t_new)), dtype=np.float32)
+    for z in range(nz):
+
+        # load slice with appended volumes
+        arr = np.asarray(data.dataobj[:, :, z, :])
+        arr = np.concatenate((np.repeat(arr[:, :, :1], n_append, axis=2),
+                              arr,
+                              np.repeat(arr[:, :, -1:], n_append, axis=2)),
+                             axis=2)
+
+        # interpolate all voxels of the slice
+        arr = np.dot(arr.reshape((nx * ny, nt + 2 * n_append)),
+                     spline_matrix.T)
+        data_array_regrid[:, :, z, :] = arr.reshape((nx, ny, len(t_new)))
 
     # clean corrected array
     data_array_regrid[np.isnan(data_array_regrid)] = 0
@@ -1,68 +1,140 @@
 # -*- coding: utf-8 -*-
 
 # python standard library inputs
-import os
-import datetime
-from shutil import copyfile
+from concurrent.futures import ThreadPoolExecutor
 
 # external inputs
 import numpy as np
-from sh import gunzip
+import nibabel as nb
+from scipy.ndimage import affine_transform
 
 # local inputs
-from ..io.get_filename import get_filename
+from ..io.result_cache import result_cache
 
+# spline order of interpolation methods (afni names are kept for convenience)
+_ORDER = {"NN": 0,
+          "Li": 1,
+          "Linear": 1,
+          "Bk": 2,
+          "Cu": 3,
+          "Sinc": 5,
+          }
 
-def resample_volume(file_in, file_out, dxyz=[0.4, 0.4, 0.4], rmode="Cu"):
+
+def _resample(arr, scale, shape, order, dtype):
+    """Helper function to resample one 3D array. Output voxel i is sampled at
+    input voxel coordinate (i + 0.5) * scale - 0.5 in each dimension."""
+
+    offset = (scale - 1) / 2
+    res = affine_transform(np.asarray(arr, dtype=np.float64), scale,
+                           offset=offset, output_shape=shape, order=order,
+                           mode="nearest")
+
+    if np.issubdtype(dtype, np.integer):
+        info = np.iinfo(dtype)
+        res = np.clip(np.round(res), info.min, info.max)
+
+    return res.astype(dtype)
+
+
+@result_cache(load=nb.load)
+def resample_volume(file_in, file_out=None, dxyz=[0.4, 0.4, 0.4], rmode="Cu",
+                    n_jobs=None):
     """Resample volume.
 
-    This function resamples a nifti volume using the afni function 3dresample. 
-    Before running the function, set the afni environment by calling AFNI in 
-    the terminal.    
+    This function resamples a 3D or 4D volume to a new voxel size with
+    scipy.ndimage. The field of view is preserved, i.e., the outer voxel edges
+    of the input and output grid coincide and the number of voxels in each
+    dimension is the rounded ratio of field of view and new voxel size (same as
+    the afni function 3dresample). Interpolation is done with splines of degree
+    0 (NN), 1 (Li, Linear), 2 (Bk), 3 (Cu) or 5 (Sinc, sinc-like). Values
+    outside of the input grid are taken from the nearest voxel. 4D volumes are
+    read once and resampled volume-by-volume in a thread pool. The data type of
+    the input volume is kept (scaled integer data is converted to float32). The
+    output volume is returned as in-memory image and is only written to disk if
+    an output filename is given.
 
     Parameters
     ----------
-    file_in : str
-        Nifti input filename.
-    file_out : str
-        Nifti output filename.
+    file_in : str or niimg
+        Input volume.
+    file_out : str, optional
+        Output filename. The default is None.
     dxyz : list, optional
-        Array of target resolution in single dimensions. The default is 
+        Array of target resolution in single dimensions. The default is
         [0.4, 0.4, 0.4].
     rmode : str, optional
-        Interpolation methods (Linear, NN, Cu, Bk). The default is "Cu".
+        Interpolation methods (NN, Li, Linear, Bk, Cu, Sinc). The default is
+        "Cu".
+    n_jobs : int, optional
+        Number of threads used for 4D volumes. If None, the default number of
+        the thread pool is used. The default is None.
+
+    Raises
+    ------
+    ValueError
+        If `rmode` is not a supported interpolation method or if the input
+        volume is neither 3D nor 4D.
 
     Returns
     -------
-    None.
-    
+    niimg
+        Resampled volume.
+
     """
 
-    # get path and file extension of input file
-    path_in, _, ext_in = get_filename(file_in)
+    if rmode not in _ORDER:
+        raise ValueError("Unknown interpolation method: " + str(rmode))
 
-    # make temporary copy of input file
-    tmp1 = np.random.randint(0, 10, 5)
-    tmp1 = ''.join(str(i) for i in tmp1)
-    tmp2 = datetime.datetime.now().strftime("%S%f")
-    tmp_string = tmp1 + tmp2
-    file_tmp = os.path.join(path_in, "tmp_" + tmp_string + ext_in)
+    # load volume without reading data
+    img = nb.load(file_in) if isinstance(file_in, str) else file_in
+    if len(img.shape) not in [3, 4]:
+        raise ValueError("Only 3D and 4D volumes are supported!")
 
-    if not os.path.exists(file_tmp) and not os.path.exists(file_tmp[:-3]):
-        copyfile(file_in, file_tmp)
+    # scaled integer data is resampled as float
+    dtype = img.get_data_dtype()
+    if getattr(img.dataobj, "slope", 1) != 1 or \
+            getattr(img.dataobj, "inter", 0) != 0:
+        dtype = np.dtype(np.float32)
+
+    shape_in = np.array(img.shape[:3])
+
+    # output grid
+    zooms = np.sqrt(np.sum(img.affine[:3, :3] ** 2, axis=0))
+    scale = np.asarray(dxyz, dtype=np.float64) / zooms
+    shape_out = tuple(np.maximum(
+        np.floor(shape_in / scale + 0.499).astype(int), 1))
+
+    affine = np.eye(4)
+    affine[:3, :3] = np.diag(scale)
+    affine[:3, 3] = (scale - 1) / 2
+    affine = img.affine.dot(affine)
+
+    # resample data
+    order = _ORDER[rmode]
+    if len(img.shape) == 3:
+        arr = _resample(img.dataobj, scale, shape_out, order, dtype)
     else:
-        raise FileExistsError("Temporary file already exists!")
+        nt = img.shape[3]
+        arr = np.zeros(shape_out + (nt,), dtype=dtype)
+
+        # read data once. Reading single volumes from the proxy would
+        # decompress gzipped files again from the start for each volume.
+        # Uncompressed files are memory-mapped.
+        arr_in = np.asanyarray(img.dataobj)
+
+        def _run(t):
+            arr[..., t] = _resample(arr_in[..., t], scale, shape_out, order,
+                                    dtype)
+
+        with ThreadPoolExecutor(n_jobs) as executor:
+            list(executor.map(_run, range(nt)))
 
-    if os.path.splitext(file_tmp)[1] == ".gz":
-        gunzip(file_tmp)
-        file_tmp = os.path.splitext(file_tmp)[0]
+    header = img.header.copy()
+    header.set_data_dtype(dtype)
+    res = img.__class__(arr, affine, header)
 
-    # resample volume
-    os.system("3dresample " +
-              "-dxyz " + str(dxyz[0]) + " " + str(dxyz[1]) + " " + str(dxyz[2]) + " " +
-              "-rmode " + str(rmode) + " " +
-              "-inset " + file_tmp + " " +
-              "-prefix " + file_out)
+    if file_out:
+        nb.save(res, file_out)
 
-    # remove temporary copy
-    os.remove(file_tmp)
+    return res
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark import time
+
+This script measures the time needed to import parts of the fmri_tools package
+in a fresh interpreter as it happens in joblib workers or short-lived cluster
+jobs. Each import statement is run in a new subprocess with lazy loading
+(default) and with eager loading of all subpackages (FMRI_TOOLS_EAGER_IMPORT=1).
+Additionally, heavy dependencies which were loaded by the import statement are
+listed.
+
+"""
+
+# python standard library inputs
+import os
+import sys
+import subprocess
+
+# external inputs
+import numpy as np
+
+# input
+statements = ["import fmri_tools",
+              "from fmri_tools.io import read_mgh",
+              "from fmri_tools.io.read_mgh import read_mgh",
+              "from fmri_tools.utils import get_mean",
+              "from fmri_tools.surface import get_incidence_matrix",
+              ]
+dependencies = ["nipype", "nighres", "gbb", "matplotlib", "shapely",
+                "skimage", "h5py"]
+n_repeat = 5  # number of repetitions per statement
+
+# do not edit below
+
+code = """
+import sys, time
+t_start = time.perf_counter()
+{statement}
+t = time.perf_counter() - t_start
+print(t, ",".join(d for d in {dependencies} if d in sys.modules))
+"""
+
+
+def run(statement, eager):
+    """Import time and loaded dependencies of one statement in a new
+    interpreter."""
+
+    env = dict(os.environ)
+    env["FMRI_TOOLS_EAGER_IMPORT"] = "1" if eager else "0"
+    res = subprocess.run([sys.executable, "-c",
+                          code.format(statement=statement,
+                                      dependencies=dependencies)],
+                         env=env, capture_output=True, text=True)
+    if res.returncode:
+        return None, res.stderr.strip().splitlines()[-1]
+
+    t, _, deps = res.stdout.strip().splitlines()[-1].partition(" ")
+    return float(t), deps
+
+
+for statement in statements:
+    for eager in [False, True]:
+        t = []
+        deps = ""
+        for _ in range(n_repeat):
+            t_run, deps = run(statement, eager)
+            if t_run is None:
+                break
+            t.append(t_run)
+
+        mode = "eager" if eager else "lazy"
+        if not t:
+            print(statement + " (" + mode + "): failed (" + deps + ")")
+            continue
+
+        print(statement + " (" + mode + "): " +
+              str(np.round(np.min(t), 3)) + " s, dependencies: " +
+              (deps or "none"))
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Check invert coordinate mapping
+
+This script checks the accuracy of `invert_coordinate_mapping` on synthetic
+affine coordinate mappings whose inverse is known analytically. Each mapping
+covers only part of the source grid so that the inversion has to handle the
+border of the point cloud. The number of source voxels within the mapping, the
+number of voxels which deviate from the analytic inverse by more than the
+tolerance and the maximum deviation are printed for each mapping. The script
+exits with an error if any voxel exceeds the tolerance.
+
+"""
+
+# python standard library inputs
+import sys
+
+# external inputs
+import numpy as np
+import nibabel as nb
+
+# local inputs
+from fmri_tools.cmap.coordinate_mapping_proxy import CoordinateMappingProxy
+from fmri_tools.cmap.invert_coordinate_mapping import invert_coordinate_mapping
+
+# input
+dims_target = (20, 22, 18)  # target grid of the coordinate mapping
+dims_source = (26, 26, 24)  # source grid of the inverted mapping
+n_mapping = 5  # number of random affine mappings
+tol = 1e-3  # tolerance in voxels
+
+# do not edit below
+
+
+def random_affine(rng):
+    """Random affine transformation with moderate scaling, shearing and
+    translation."""
+
+    affine = np.eye(4)
+    affine[:3, :3] += rng.uniform(-0.15, 0.15, (3, 3))
+    affine[:3, 3] = rng.uniform(-1, 3, 3)
+
+    return affine
+
+
+rng = np.random.default_rng(0)
+img_source = nb.Nifti1Image(np.zeros(dims_source, dtype=np.float32),
+                            np.eye(4))
+
+# source voxel grid
+grid = np.meshgrid(*[np.arange(n) for n in dims_source], indexing="ij")
+grid = np.stack(grid, axis=-1)
+
+n_fail = 0
+for i in range(n_mapping):
+    affine = random_affine(rng)
+    cmap = nb.Nifti1Image(CoordinateMappingProxy(dims_target, affine),
+                          np.eye(4))
+    arr = invert_coordinate_mapping(cmap, img_source).get_fdata()
+
+    # compare with analytic inverse
+    affine_inv = np.linalg.inv(affine)
+    arr_inv = np.dot(grid, affine_inv[:3, :3].T) + affine_inv[:3, 3]
+
+    mask = np.any(arr != 0, axis=3)
+    err = np.max(np.abs(arr[mask] - arr_inv[mask]), axis=1)
+    n_fail += np.sum(err > tol)
+
+    print("mapping " + str(i) + ": " + str(np.sum(mask)) + " voxels, " +
+          str(np.sum(err > tol)) + " above tolerance, maximum deviation: " +
+          str(np.max(err)))
+
+if n_fail:
+    sys.exit("Inversion deviates from analytic inverse!")
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark match vertex number
+
+This script measures the run time of `match_vertex_number` on synthetic meshes.
+For each mesh size, a regular triangulated grid is created which serves as
+white and pial surface in a common reference space. A fraction of vertices is
+randomly removed from each surface to mimic vertices lost during deformation
+before both surfaces are matched.
+
+"""
+
+# python standard library inputs
+import time
+
+# external inputs
+import numpy as np
+
+# local inputs
+from fmri_tools.surface.match_vertex_number import match_vertex_number
+
+# input
+n_vertex = [100000, 500000, 1000000, 2000000]  # approximate mesh sizes
+frac_remove = 0.01  # fraction of removed vertices per surface
+n_repeat = 3  # number of repetitions per mesh size
+
+# do not edit below
+
+
+def grid_mesh(n):
+    """Regular triangulated grid with approximately n vertices."""
+
+    n_side = int(np.sqrt(n))
+    x, y = np.meshgrid(np.arange(n_side), np.arange(n_side), indexing="ij")
+    vtx = np.stack((x.ravel(), y.ravel(), np.zeros(n_side ** 2)), axis=1)
+
+    ind = np.arange(n_side ** 2).reshape(n_side, n_side)
+    v00 = ind[:-1, :-1].ravel()
+    v10 = ind[1:, :-1].ravel()
+    v01 = ind[:-1, 1:].ravel()
+    v11 = ind[1:, 1:].ravel()
+    fac = np.concatenate((np.stack((v00, v10, v11), axis=1),
+                          np.stack((v00, v11, v01), axis=1)))
+
+    return vtx.astype(np.float32), fac.astype(np.int32)
+
+
+def remove_random(vtx, fac, frac, rng):
+    """Remove random vertices and return the deformed surface in the same way
+    as it is stored after deformation (remaining vertices, faces and index
+    list)."""
+
+    ind = np.sort(rng.choice(len(vtx), int((1 - frac) * len(vtx)),
+                             replace=False))
+    keep = np.zeros(len(vtx), dtype=bool)
+    keep[ind] = True
+    ind_new = np.cumsum(keep) - 1
+    fac = ind_new[fac[np.all(keep[fac], axis=1)]]
+
+    return vtx[ind], fac, ind
+
+
+rng = np.random.default_rng(0)
+for n in n_vertex:
+    vtx, fac = grid_mesh(n)
+    vtx_white, fac_white, ind_white = remove_random(vtx, fac, frac_remove, rng)
+    vtx_pial, _, ind_pial = remove_random(vtx, fac, frac_remove, rng)
+
+    t = []
+    for _ in range(n_repeat):
+        t_start = time.perf_counter()
+        match_vertex_number(vtx_white, vtx_pial, fac_white, ind_white,
+                            ind_pial)
+        t.append(time.perf_counter() - t_start)
+
+    print("vertices: " + str(len(vtx)) + ", faces: " + str(len(fac)) +
+          ", time: " + str(np.round(np.min(t), 3)) + " s")
@@ -28,6 +28,7 @@ import nibabel as nb
 # local inputs
 from fmri_tools.io.get_filename import get_filename
 from fmri_tools.processing.get_onset_vols import get_onset_vols
+from fmri_tools.processing.get_temporal_statistics import get_temporal_statistics
 
 # input data
 img_input = [
@@ -117,23 +118,15 @@ for i in range(len(img_input)):
         # change input to highpass filtered time series
         name_file = "b" + name_file
 
-    # open baseline corrected data
-    data_img = nb.load(os.path.join(path_file, name_file + ext_file))
-    data_array = data_img.get_fdata()
+    # condition specific mean and std
+    res = get_temporal_statistics(os.path.join(path_file, name_file + ext_file),
+                                  onsets={condition0: onsets0,
+                                          condition1: onsets1})
 
-    # sort volumes to conditions
-    data_condition0 = data_array[:, :, :, onsets0]
-    data_condition1 = data_array[:, :, :, onsets1]
-
-    # mean
-    data_condition0_mean = np.mean(data_condition0, axis=3)
-    data_condition1_mean = np.mean(data_condition1, axis=3)
-    data_condition0_std = np.std(data_condition0, axis=3)
-    data_condition0_std[data_condition0_std == 0] = np.nan
-
-    # percent signal change
-    cnr = (np.abs(data_condition1_mean - data_condition0_mean)) / data_condition0_std * 100
-    cnr[np.isnan(cnr)] = 0
+    # contrast-to-noise ratio
+    cnr = np.abs(res["mean_" + condition1] - res["mean_" + condition0])
+    cnr = np.divide(cnr, res["std_" + condition0], out=np.zeros_like(cnr),
+                    where=res["std_" + condition0] != 0) * 100
 
     # sum volumes for each run
     mean_cnr += cnr
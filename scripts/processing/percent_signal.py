@@ -22,11 +22,11 @@ import datetime
 # external inputs
 import numpy as np
 import nibabel as nb
-from scipy.stats import zscore
 
 # local inputs
 from fmri_tools.io.get_filename import get_filename
 from fmri_tools.processing.get_onset_vols import get_onset_vols
+from fmri_tools.processing.get_temporal_statistics import get_temporal_statistics
 
 # input data
 img_input = [
@@ -63,7 +63,6 @@ condition1 = "left"  # experimental condition 1
 condition2 = "right"  # experimental condition 2
 percent_threshold = 50  # remove unrealistic high signal values (if set > 0)
 skip_vol = 2  # skip number of volumes in each block
-use_z_score = False
 use_highpass = False
 use_lowpass = False
 TR = 3  # repetition time in s
@@ -136,33 +135,16 @@ for i in range(len(img_input)):
         # change input to highpass filtered time series
         name_file = "b" + name_file
 
-    # open baseline corrected data
-    data_img = nb.load(os.path.join(path_file, name_file + ext_file))
-    data_array = data_img.get_fdata()
-
-    # sort volumes to conditions
-    data_condition0 = data_array[:, :, :, onsets0]
-    data_condition1 = data_array[:, :, :, onsets1]
-    data_condition2 = data_array[:, :, :, onsets2]
-
-    # z-score
-    if use_z_score:
-        data_condition0 = zscore(data_condition0, axis=3)
-        data_condition1 = zscore(data_condition1, axis=3)
-        data_condition2 = zscore(data_condition2, axis=3)
-
-    # mean
-    data_condition0_mean = np.mean(data_condition0, axis=3)
-    data_condition1_mean = np.mean(data_condition1, axis=3)
-    data_condition2_mean = np.mean(data_condition2, axis=3)
-    data_condition0_mean[data_condition0_mean == 0] = np.nan
+    # condition means and percent signal change relative to baseline
+    res = get_temporal_statistics(os.path.join(path_file, name_file + ext_file),
+                                  onsets={condition0: onsets0,
+                                          condition1: onsets1,
+                                          condition2: onsets2},
+                                  baseline=condition0)
 
     # percent signal change
-    percent_signal1 = (data_condition1_mean - data_condition2_mean) / data_condition0_mean * 100
-    percent_signal2 = (data_condition2_mean - data_condition1_mean) / data_condition0_mean * 100
-
-    percent_signal1[np.isnan(percent_signal1)] = 0
-    percent_signal2[np.isnan(percent_signal2)] = 0
+    percent_signal1 = res["psc_" + condition1] - res["psc_" + condition2]
+    percent_signal2 = res["psc_" + condition2] - res["psc_" + condition1]
 
     # sum volumes for each run
     mean_percent_signal1 += percent_signal1
@@ -244,7 +226,6 @@ fileID.write("condition2: " + condition2 + "\n")
 fileID.write("percent threshold: " + str(percent_threshold) + "\n")
 fileID.write("TR: " + str(TR) + "\n")
 fileID.write("skip_vol: " + str(skip_vol) + "\n")
-fileID.write("z-score: " + str(use_z_score) + "\n")
 fileID.write("highpass: " + str(use_highpass) + "\n")
 fileID.write("lowpass: " + str(use_lowpass) + "\n")
 fileID.write("cutoff highpass: " + str(cutoff_highpass) + "\n")
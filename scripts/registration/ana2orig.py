@@ -13,13 +13,11 @@ images. The script needs an installation of freesurfer.
 import os
 import shutil as sh
 
-# external inputs
-from nighres.registration import apply_coordinate_mappings
-
 # local inputs
 from fmri_tools.io.get_filename import get_filename
 from fmri_tools.io.mgh2nii import mgh2nii
 from fmri_tools.registration.get_scanner_transform import get_scanner_transform
+from fmri_tools.registration.apply_coordinate_mapping import apply_coordinate_mapping
 
 # input data
 file_t1 = "/data/pt_01880/Experiment3_Stripes/p3/anatomy/S7_MP2RAGE_0p7_T1_Images_2.45_gnlcorr.nii"
@@ -55,14 +53,14 @@ if ext_t1 != ".nii":
     mgh2nii(os.path.join(path_temp, "T1" + ext_t1), path_temp, out_type="nii")
 
 # scanner transformation
-get_scanner_transform(os.path.join(path_temp, "orig.nii"),
-                      os.path.join(path_temp, "T1.nii"),
-                      path_temp,
-                      True)
-get_scanner_transform(os.path.join(path_temp, "T1.nii"),
-                      os.path.join(path_temp, "orig.nii"),
-                      path_temp,
-                      True)
+orig2t1 = get_scanner_transform(os.path.join(path_temp, "orig.nii"),
+                                os.path.join(path_temp, "T1.nii"),
+                                path_temp,
+                                True)
+t12orig = get_scanner_transform(os.path.join(path_temp, "T1.nii"),
+                                os.path.join(path_temp, "orig.nii"),
+                                path_temp,
+                                True)
 
 # get output
 os.rename(os.path.join(path_temp, "orig_2_T1_scanner.nii.gz"),
@@ -72,32 +70,18 @@ os.rename(os.path.join(path_temp, "T1_2_orig_scanner.nii.gz"),
 
 # apply deformation
 # ana -> epi
-apply_coordinate_mappings(os.path.join(path_temp, "orig.nii"),  # input
-                          os.path.join(path_output, "orig2T1.nii.gz"),  # cmap
-                          interpolation="linear",  # nearest or linear
-                          padding="zero",  # closest, zero or max
-                          save_data=True,  # save output data to file (boolean)
-                          overwrite=True,  # overwrite existing results (boolean)
-                          output_dir=path_output,  # output directory
-                          file_name="orig2T1_example"  # base name with file extension for output
-                          )
+apply_coordinate_mapping(os.path.join(path_temp, "orig.nii"),
+                         orig2t1,
+                         os.path.join(path_output, "orig2T1_example.nii.gz"),
+                         interpolation="linear",
+                         padding="zero")
 
 # epi -> ana
-apply_coordinate_mappings(os.path.join(path_temp, "T1.nii"),  # input
-                          os.path.join(path_output, "T12orig.nii.gz"),  # cmap
-                          interpolation="linear",  # nearest or linear
-                          padding="zero",  # closest, zero or max
-                          save_data=True,  # save output data to file (boolean)
-                          overwrite=True,  # overwrite existing results (boolean)
-                          output_dir=path_output,  # output directory
-                          file_name="T12orig_example"  # base name with file extension for output
-                          )
-
-# rename final deformation examples
-os.rename(os.path.join(path_output, "orig2T1_example_def-img.nii.gz"),
-          os.path.join(path_output, "orig2T1_example.nii.gz"))
-os.rename(os.path.join(path_output, "T12orig_example_def-img.nii.gz"),
-          os.path.join(path_output, "T12orig_example.nii.gz"))
+apply_coordinate_mapping(os.path.join(path_temp, "T1.nii"),
+                         t12orig,
+                         os.path.join(path_output, "T12orig_example.nii.gz"),
+                         interpolation="linear",
+                         padding="zero")
 
 # clean intermediate files
 if cleanup:
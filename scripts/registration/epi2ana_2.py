@@ -32,6 +32,7 @@ from nipype.interfaces.ants import N4BiasFieldCorrection
 from nighres.registration import embedded_antsreg, apply_coordinate_mappings
 
 # local inputs
+from fmri_tools.cmap.compose_coordinate_mapping import compose_coordinate_mapping
 from fmri_tools.cmap.clean_coordinate_mapping import clean_coordinate_mapping
 from fmri_tools.cmap.expand_coordinate_mapping import expand_coordinate_mapping
 from fmri_tools.skullstrip.skullstrip_refined import skullstrip_refined
@@ -165,32 +166,14 @@ embedded_antsreg(os.path.join(path_epi_target, "pbepi.nii"),  # source image
 
 # merge deformations
 # ana -> epi
-apply_coordinate_mappings(file_ana2epi,  # input
-                          os.path.join(path_syn, "syn_ants-map.nii.gz"),  # cmap
-                          interpolation="linear",  # nearest or linear
-                          padding="zero",  # closest, zero or max
-                          save_data=True,  # save output data to file (boolean)
-                          overwrite=True,  # overwrite existing results (boolean)
-                          output_dir=path_output,  # output directory
-                          file_name="ana2epi"  # base name with file extension for output
-                          )
+compose_coordinate_mapping(file_ana2epi,
+                           os.path.join(path_syn, "syn_ants-map.nii.gz"),
+                           os.path.join(path_output, "ana2epi.nii.gz"))
 
 # epi -> ana
-apply_coordinate_mappings(os.path.join(path_syn, "syn_ants-invmap.nii.gz"),  # input
-                          file_epi2ana,  # cmap
-                          interpolation="linear",  # nearest or linear
-                          padding="zero",  # closest, zero or max
-                          save_data=True,  # save output data to file (boolean)
-                          overwrite=True,  # overwrite existing results (boolean)
-                          output_dir=path_output,  # output directory
-                          file_name="epi2ana"  # base name with file extension for output
-                          )
-
-# rename final deformations
-os.rename(os.path.join(path_output, "ana2epi_def-img.nii.gz"),
-          os.path.join(path_output, "ana2epi.nii.gz"))
-os.rename(os.path.join(path_output, "epi2ana_def-img.nii.gz"),
-          os.path.join(path_output, "epi2ana.nii.gz"))
+compose_coordinate_mapping(os.path.join(path_syn, "syn_ants-invmap.nii.gz"),
+                           file_epi2ana,
+                           os.path.join(path_output, "epi2ana.nii.gz"))
 
 # clean deformation
 if clean_cmap:
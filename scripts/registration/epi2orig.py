@@ -40,6 +40,7 @@ from nipype.interfaces.ants import N4BiasFieldCorrection
 from nighres.registration import embedded_antsreg, apply_coordinate_mappings
 
 # local inputs
+from fmri_tools.cmap.compose_coordinate_mapping import compose_coordinate_mapping
 from fmri_tools.cmap.clean_coordinate_mapping import clean_coordinate_mapping
 from fmri_tools.cmap.expand_coordinate_mapping import expand_coordinate_mapping
 from fmri_tools.registration.get_scanner_transform import get_scanner_transform
@@ -213,32 +214,14 @@ embedded_antsreg(os.path.join(path_t1, "pT1.nii"),  # source image
 
 # merge deformations
 # orig -> epi
-apply_coordinate_mappings(os.path.join(path_scanner, "orig_2_T1_scanner.nii"),  # input
-                          os.path.join(path_syn, "syn_ants-map.nii.gz"),  # cmap
-                          interpolation="linear",  # nearest or linear
-                          padding="zero",  # closest, zero or max
-                          save_data=True,  # save output data to file (boolean)
-                          overwrite=True,  # overwrite existing results (boolean)
-                          output_dir=path_output,  # output directory
-                          file_name="orig2epi"  # base name with file extension for output
-                          )
+compose_coordinate_mapping(os.path.join(path_scanner, "orig_2_T1_scanner.nii"),
+                           os.path.join(path_syn, "syn_ants-map.nii.gz"),
+                           os.path.join(path_output, "orig2epi.nii.gz"))
 
 # epi -> orig
-apply_coordinate_mappings(os.path.join(path_syn, "syn_ants-invmap.nii.gz"),  # input
-                          os.path.join(path_scanner, "T1_2_orig_scanner.nii"),  # cmap
-                          interpolation="linear",  # nearest or linear
-                          padding="zero",  # closest, zero or max
-                          save_data=True,  # save output data to file (boolean)
-                          overwrite=True,  # overwrite existing results (boolean)
-                          output_dir=path_output,  # output directory
-                          file_name="epi2orig"  # base name with file extension for output
-                          )
-
-# rename final deformations
-os.rename(os.path.join(path_output, "orig2epi_def-img.nii.gz"),
-          os.path.join(path_output, "orig2epi.nii.gz"))
-os.rename(os.path.join(path_output, "epi2orig_def-img.nii.gz"),
-          os.path.join(path_output, "epi2orig.nii.gz"))
+compose_coordinate_mapping(os.path.join(path_syn, "syn_ants-invmap.nii.gz"),
+                           os.path.join(path_scanner, "T1_2_orig_scanner.nii"),
+                           os.path.join(path_output, "epi2orig.nii.gz"))
 
 # clean deformation
 if clean_cmap:
@@ -34,6 +34,7 @@ from nighres.registration import embedded_antsreg, apply_coordinate_mappings
 # local inputs
 from fmri_tools.io.get_filename import get_filename
 from fmri_tools.io.mgh2nii import mgh2nii
+from fmri_tools.cmap.compose_coordinate_mapping import compose_coordinate_mapping
 from fmri_tools.cmap.clean_coordinate_mapping import clean_coordinate_mapping
 from fmri_tools.cmap.expand_coordinate_mapping import expand_coordinate_mapping
 from fmri_tools.registration.mask_ana import mask_ana
@@ -198,32 +199,14 @@ embedded_antsreg(os.path.join(path_epi_target, "pbepi.nii"),  # source image
 
 # merge deformations
 # orig -> epi
-apply_coordinate_mappings(file_orig2epi,  # input
-                          os.path.join(path_syn, "syn_ants-map.nii.gz"),  # cmap
-                          interpolation="linear",  # nearest or linear
-                          padding="zero",  # closest, zero or max
-                          save_data=True,  # save output data to file (boolean)
-                          overwrite=True,  # overwrite existing results (boolean)
-                          output_dir=path_output,  # output directory
-                          file_name="orig2epi"  # base name with file extension for output
-                          )
+compose_coordinate_mapping(file_orig2epi,
+                           os.path.join(path_syn, "syn_ants-map.nii.gz"),
+                           os.path.join(path_output, "orig2epi.nii.gz"))
 
 # epi -> orig
-apply_coordinate_mappings(os.path.join(path_syn, "syn_ants-invmap.nii.gz"),  # input
-                          file_epi2orig,  # cmap
-                          interpolation="linear",  # nearest or linear
-                          padding="zero",  # closest, zero or max
-                          save_data=True,  # save output data to file (boolean)
-                          overwrite=True,  # overwrite existing results (boolean)
-                          output_dir=path_output,  # output directory
-                          file_name="epi2orig"  # base name with file extension for output
-                          )
-
-# rename final deformations
-os.rename(os.path.join(path_output, "orig2epi_def-img.nii.gz"),
-          os.path.join(path_output, "orig2epi.nii.gz"))
-os.rename(os.path.join(path_output, "epi2orig_def-img.nii.gz"),
-          os.path.join(path_output, "epi2orig.nii.gz"))
+compose_coordinate_mapping(os.path.join(path_syn, "syn_ants-invmap.nii.gz"),
+                           file_epi2orig,
+                           os.path.join(path_output, "epi2orig.nii.gz"))
 
 # clean deformation
 if clean_cmap:
@@ -4,9 +4,9 @@
 import setuptools
 
 
-INSTALL_REQUIREMENTS = ['numpy',
+INSTALL_REQUIREMENTS = ['numpy>=1.17',
                         'nibabel',
-                        'scipy',
+                        'scipy>=1.6',
                         'matplotlib',
                         'scikit-image',
                         'imageio',
@@ -22,7 +22,6 @@ INSTALL_REQUIREMENTS = ['numpy',
 EXTRA_REQUIREMENTS = {"addon": ['pydicom', 'natsort', 'joblib']}
 
 CLASSIFIERS = ["Programming Language :: Python :: 3",
-               "Programming Language :: Python :: 3.6",
                "Programming Language :: Python :: 3.7",
                "Programming Language :: Python :: 3.8",
                "License :: OSI Approved :: GNU General Public License v3 (GPLv3)",
@@ -52,7 +51,7 @@ setuptools.setup(
     install_requires=INSTALL_REQUIREMENTS,
     extras_require=EXTRA_REQUIREMENTS,
     classifiers=CLASSIFIERS,
-    python_requires='>=3.6',
+    python_requires='>=3.7',
     include_package_data=True,
     zip_safe=False,
     )